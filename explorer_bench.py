@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+from explorer_core import DirSizeMemo, copy_items, delete_paths, disk_usage, find_files, sort_order
+from listing_cache import ListingCache, list_directory_cached
+from metadata_index import MetadataIndex, list_subdirs_task
+
+"""
+基准测试
+- 在临时目录中生成指定形状的合成目录树：wide（一个目录 50 万个文件）、deep（深层嵌套）、
+  tiny（大量小文件），规模可以按比例缩放，随机种子固定，结果可以复现
+- 通过界面使用的同一套代码计时：列举（冷/热缓存、持久化索引）、排序、筛选、
+  导航树展开（有无索引）、文件夹大小、搜索、复制、移动和删除
+- 每项测试输出一行 JSON（同时写入 --output 文件），第一行为环境信息（含当前提交），
+  便于逐个提交比较、发现性能退化
+"""
+
+# 各形状在 scale=1 时的规模
+SHAPES = {
+    "wide": {"files_per_dir": 500000, "file_size": 0},
+    "deep": {"depth": 200, "files_per_dir": 20, "file_size": 256},
+    "tiny": {"dirs": 200, "files_per_dir": 500, "file_size": 2048},
+}
+# 生成文件名时使用的扩展名（覆盖分类表中的各类别和未知扩展名）
+EXTENSIONS = [".txt", ".py", ".jpg", ".mp3", ".mp4", ".zip", ".exe", ".dat", ""]
+BENCHMARKS = ["list", "sort", "filter", "nav", "du", "search", "copy", "move", "delete"]
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_output.txt")
+
+
+def _scaled(value, scale):
+    return max(1, int(value * scale))
+
+
+def generate_tree(root, shape, scale=1.0, seed=0):
+    """在 root 下生成 shape 形状的目录树，返回 (目录列表, 文件数, 总字节数)
+
+    wide: 一个目录中 files_per_dir 个文件；deep: depth 层嵌套，每层 files_per_dir 个文件；
+    tiny: dirs 个并列目录，每个 files_per_dir 个小文件（大小在 1..file_size 之间随机）。
+    文件以打乱的顺序创建，名称中带数字，排序和自然排序都不会遇到已排好序的输入。
+    """
+    spec = SHAPES[shape]
+    rng = random.Random(seed)
+    files_per_dir = _scaled(spec["files_per_dir"], scale)
+    if shape == "deep":
+        dirs = [root]
+        for level in range(1, _scaled(spec["depth"], scale)):
+            dirs.append(os.path.join(dirs[-1], f"level{level}"))
+    elif shape == "tiny":
+        dirs = [root] + [os.path.join(root, f"dir{i}") for i in range(_scaled(spec["dirs"], scale))]
+    else:
+        dirs = [root]
+
+    file_count = 0
+    total_bytes = 0
+    for directory in dirs:
+        os.makedirs(directory, exist_ok=True)
+        if shape == "tiny" and directory == root:
+            continue  # 根目录只包含子目录
+        numbers = list(range(files_per_dir))
+        rng.shuffle(numbers)
+        for number in numbers:
+            name = f"file{number}{EXTENSIONS[number % len(EXTENSIONS)]}"
+            size = rng.randint(1, spec["file_size"]) if spec["file_size"] else 0
+            with open(os.path.join(directory, name), "wb") as f:
+                if size:
+                    f.write(rng.randbytes(size))
+            file_count += 1
+            total_bytes += size
+    return dirs, file_count, total_bytes
+
+
+def _time(func, repeat):
+    """运行 repeat 次，返回 (每次的秒数, 最后一次的返回值)"""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - started)
+    return runs, result
+
+
+def _record(shape, name, items, runs, **extra):
+    median = statistics.median(runs)
+    record = {
+        "shape": shape,
+        "benchmark": name,
+        "items": items,
+        "seconds": round(median, 6),
+        "best": round(min(runs), 6),
+        "runs": [round(run, 6) for run in runs],
+        "items_per_second": round(items / median) if median > 0 else None,
+    }
+    record.update(extra)
+    return record
+
+
+def _ignore(progress):
+    pass
+
+
+def run_shape(base, shape, scale, repeat, seed, only):
+    """生成一个形状的目录树并逐项计时，逐条产生结果记录"""
+    root = os.path.join(base, shape)
+    started = time.perf_counter()
+    dirs, file_count, total_bytes = generate_tree(root, shape, scale, seed)
+    yield _record(shape, "generate", file_count, [time.perf_counter() - started],
+                  dirs=len(dirs), bytes=total_bytes)
+    entry_count = file_count + len(dirs) - 1
+
+    def list_all(cache, index=None):
+        listings = [list_directory_cached(cache, directory, index, emit=_ignore)[0] for directory in dirs]
+        return max(listings, key=len)
+
+    # 持久化索引放在目录树旁边；界面启动后第一次打开目录时，内存缓存为空、索引中有记录
+    try:
+        index = MetadataIndex(os.path.join(base, f"{shape}-index.db"))
+    except RuntimeError:  # 没有 sqlite3：跳过与索引有关的测试项
+        index = None
+
+    largest = None
+    if "list" in only or "sort" in only or "filter" in only:
+        # 冷缓存：每次都新建缓存，与首次打开目录相同；热缓存：目录未变化，只需 stat
+        runs, largest = _time(lambda: list_all(ListingCache()), repeat)
+        yield _record(shape, "list_cold", entry_count, runs)
+        cache = ListingCache()
+        list_all(cache)
+        runs, _ = _time(lambda: list_all(cache), repeat)
+        yield _record(shape, "list_warm", entry_count, runs)
+        if index is not None:
+            list_all(ListingCache(), index)
+            runs, _ = _time(lambda: list_all(ListingCache(), index), repeat)
+            yield _record(shape, "list_indexed", entry_count, runs)
+
+    if "sort" in only:
+        for column in ("name", "natural", "type", "size", "modified"):
+            def sort_column(column=column):
+                largest.invalidate_orders()  # 每次都从头排序，不使用按列缓存的结果
+                return sort_order(largest, column, natural=(column == "natural"))
+            runs, _ = _time(sort_column, repeat)
+            yield _record(shape, f"sort_{column}", len(largest), runs)
+        runs, _ = _time(lambda: sort_order(largest, "size", descending=True), repeat)
+        yield _record(shape, "sort_cached_reverse", len(largest), runs)
+
+    if "filter" in only:
+        order = sort_order(largest, "name")
+        runs, result = _time(lambda: largest.filter_indices("file1", order), repeat)
+        yield _record(shape, "filter", len(largest), runs, matches=len(result))
+
+    if "nav" in only:
+        # 导航树展开每个节点：与界面相同的任务，只列子目录，不取 stat 数据；有索引时先读取索引
+        def expand_all(index=None):
+            return sum(list_subdirs_task(directory, index, emit=_ignore) for directory in dirs)
+        runs, _ = _time(expand_all, repeat)
+        yield _record(shape, "nav_expand", entry_count, runs, nodes=len(dirs))
+        if index is not None:
+            list_all(ListingCache(), index)  # 建立索引
+            runs, _ = _time(lambda: expand_all(index), repeat)
+            yield _record(shape, "nav_expand_indexed", entry_count, runs, nodes=len(dirs))
+
+    if "du" in only:
+        runs, _ = _time(lambda: disk_usage([root], memo=DirSizeMemo()), repeat)
+        yield _record(shape, "du_cold", entry_count, runs)
+        memo = DirSizeMemo()
+        disk_usage([root], memo=memo)
+        runs, _ = _time(lambda: disk_usage([root], memo=memo), repeat)
+        yield _record(shape, "du_warm", entry_count, runs)
+
+    if "search" in only:
+        runs, result = _time(lambda: find_files(root, "file12", "substring"), repeat)
+        yield _record(shape, "search", entry_count, runs, matches=len(result))
+
+    if "copy" in only or "move" in only or "delete" in only:
+        # 复制、移动（同一分区上为重命名）和删除依次进行，每轮使用新的副本
+        copy_runs, move_runs, delete_runs = [], [], []
+        for iteration in range(repeat):
+            copied = os.path.join(base, f"{shape}-copy{iteration}")
+            moved = os.path.join(base, f"{shape}-moved{iteration}")
+            started = time.perf_counter()
+            job = copy_items([(root, copied)])
+            copy_runs.append(time.perf_counter() - started)
+            if job.errors:
+                raise OSError(f"复制失败: {job.errors[0]}")
+            started = time.perf_counter()
+            copy_items([(copied, moved)], move=True)
+            move_runs.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            job = delete_paths([moved])
+            delete_runs.append(time.perf_counter() - started)
+            if job.errors:
+                raise OSError(f"删除失败: {job.errors[0]}")
+        if "copy" in only:
+            yield _record(shape, "copy", file_count, copy_runs, bytes=total_bytes)
+        if "move" in only:
+            yield _record(shape, "move", file_count, move_runs)
+        if "delete" in only:
+            yield _record(shape, "delete", entry_count, delete_runs)
+
+
+def environment():
+    """环境信息：提交、Python 版本、平台和 CPU 数"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "benchmark": "environment",
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="explorer_bench", description="资源管理器基准测试")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help=f"逗号分隔的形状（{', '.join(SHAPES)}）")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"逗号分隔的测试项（{', '.join(BENCHMARKS)}）")
+    parser.add_argument("--scale", type=float, default=1.0, help="目录树规模的比例（例如 0.01 用于快速检查）")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测试的重复次数，结果取中位数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dir", default=None, help="生成目录树的位置（默认系统临时目录）")
+    parser.add_argument("--keep", action="store_true", help="结束后保留生成的目录树")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="结果文件（每行一个 JSON 对象）")
+    return parser
+
+
+def main(argv=None):
+    """主函数：返回退出码"""
+    args = build_parser().parse_args(argv)
+    shapes = [shape for shape in args.shapes.split(",") if shape]
+    only = {name for name in args.only.split(",") if name}
+    unknown = [shape for shape in shapes if shape not in SHAPES] + sorted(only - set(BENCHMARKS))
+    if unknown:
+        sys.stderr.write(f"未知的形状或测试项: {', '.join(unknown)}\n")
+        return 2
+
+    base = tempfile.mkdtemp(prefix="explorer-bench-", dir=args.dir)
+    try:
+        with open(args.output, "w", encoding="utf-8") as output:
+            def emit(record):
+                line = json.dumps(record, ensure_ascii=False)
+                output.write(line + "\n")
+                output.flush()
+                print(line, flush=True)
+
+            emit(environment())
+            for shape in shapes:
+                for record in run_shape(base, shape, args.scale, max(1, args.repeat), args.seed, only):
+                    emit(record)
+    finally:
+        if args.keep:
+            sys.stderr.write(f"目录树保留在: {base}\n")
+        else:
+            shutil.rmtree(base, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+import os
+import re
+import sys
+import json
+import argparse
+
+from explorer_core import (SEARCH_MODES, SORT_COLUMNS, copy_items, delete_paths, disk_usage, find_files,
+                           format_duration, format_size, format_time, list_directory)
+
+"""
+资源管理器命令行
+- 与界面使用同一套核心（explorer_core），不导入 tkinter，可以在没有显示器的批处理和 CI 环境中运行
+- 子命令：ls、du、find、cp、rm
+- 输出为每行一条记录的 JSON（--format json）或带表头的 TSV（--format tsv），边产生边输出
+- 进度和错误信息写到标准错误；有项目失败时退出码为 1
+"""
+
+
+class RecordWriter:
+    """把记录逐条写到输出流：JSON 每行一个对象，TSV 第一行为表头"""
+
+    def __init__(self, fields, fmt="json", stream=None):
+        self.fields = fields
+        self.fmt = fmt
+        self.stream = stream if stream is not None else sys.stdout
+        if fmt == "tsv":
+            self.stream.write("\t".join(fields) + "\n")
+
+    @staticmethod
+    def _tsv_value(value):
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        # 名称中的制表符和换行会破坏列，转义后输出
+        return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+    def write(self, record):
+        if self.fmt == "tsv":
+            self.stream.write("\t".join(self._tsv_value(record.get(field)) for field in self.fields) + "\n")
+        else:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self.stream.flush()
+
+
+def _progress(text):
+    """在终端的标准错误上显示单行进度（不是终端时不显示）"""
+    if sys.stderr.isatty():
+        sys.stderr.write("\r" + text[:120].ljust(120))
+        sys.stderr.flush()
+
+
+def _end_progress():
+    if sys.stderr.isatty():
+        sys.stderr.write("\r" + " " * 120 + "\r")
+
+
+def _report_errors(errors):
+    for path, message in errors:
+        sys.stderr.write(f"{path}: {message}\n")
+
+
+def _entry_record(entry, name, human):
+    return {
+        "name": name,
+        "path": entry.path,
+        "type": entry.type_name,
+        "is_dir": entry.is_dir,
+        "size": (format_size(entry.size) if human else entry.size) if entry.size is not None else None,
+        "modified": format_time(entry.mtime) if human else entry.mtime,
+    }
+
+
+ENTRY_FIELDS = ["name", "path", "type", "is_dir", "size", "modified"]
+
+
+def cmd_ls(args):
+    writer = RecordWriter(ENTRY_FIELDS, args.format)
+    status = 0
+    for path in args.paths:
+        try:
+            view = list_directory(path, args.sort, args.reverse, not args.no_natural)
+        except OSError as e:
+            _report_errors([(path, e.strerror or str(e))])
+            status = 1
+            continue
+        for entry in view:
+            writer.write(_entry_record(entry, entry.name, args.human))
+        writer.flush()
+    return status
+
+
+def cmd_du(args):
+    writer = RecordWriter(["path", "size", "complete"], args.format)
+    status = 0
+    paths = []
+    for path in args.paths:
+        if os.path.exists(path):
+            paths.append(path)
+        else:
+            _report_errors([(path, "不存在")])
+            status = 1
+
+    def on_progress(results):
+        _progress(f"已统计 {format_size(sum(size for size, _ in results.values()))}")
+
+    results = disk_usage(paths, emit=on_progress)
+    _end_progress()
+    for path in paths:
+        size, complete = results[path]
+        writer.write({"path": path, "size": format_size(size) if args.human else size, "complete": complete})
+    writer.flush()
+    return status
+
+
+def cmd_find(args):
+    writer = RecordWriter(ENTRY_FIELDS, args.format)
+    written = 0
+
+    def flush_new(listing, count):
+        # 搜索线程只追加，已交付的前 count 项可以安全读取
+        nonlocal written
+        for index in range(written, count):
+            entry = listing[index]
+            writer.write(_entry_record(entry, entry.name, args.human))
+        written = count
+        writer.flush()
+
+    try:
+        listing = find_files(args.root, args.query, args.mode, emit=lambda progress: flush_new(*progress))
+    except (ValueError, re.error) as e:  # 未知模式或正则表达式语法错误
+        _report_errors([(args.query, str(e))])
+        return 2
+    flush_new(listing, len(listing))
+    return 0
+
+
+def _copy_plan(sources, target):
+    """cp 的参数转换成 [(源, 目标)]：目标为已存在的目录时复制到其中，否则只允许一个源"""
+    if os.path.isdir(target):
+        return [(source, os.path.join(target, os.path.basename(os.path.normpath(source)))) for source in sources]
+    if len(sources) > 1:
+        raise ValueError(f"复制多个项目时目标必须是已存在的目录: {target}")
+    return [(sources[0], target)]
+
+
+def cmd_cp(args):
+    writer = RecordWriter(["source", "destination", "status"], args.format)
+    try:
+        items = _copy_plan(args.sources, args.target)
+    except ValueError as e:
+        _report_errors([(args.target, str(e))])
+        return 2
+
+    def on_progress(progress):
+        percent = progress.done * 100 // progress.total if progress.total else 0
+        text = f"{percent}% {format_size(progress.done)} / {format_size(progress.total)}"
+        if progress.eta is not None:
+            text += f"，剩余 {format_duration(progress.eta)}"
+        _progress(text)
+
+    try:
+        job = copy_items(items, args.move, emit=on_progress)
+    except OSError as e:
+        _end_progress()
+        _report_errors([(args.target, str(e))])
+        return 1
+    _end_progress()
+    renamed = set(job.renamed)
+    failed_sources = {path for path, _ in job.errors}
+    for source, destination in items:
+        if (source, destination) in renamed:
+            status = "renamed"
+        elif any(path == source or path.startswith(os.path.join(source, "")) for path in failed_sources):
+            status = "partial"
+        else:
+            status = "moved" if args.move else "copied"
+        writer.write({"source": source, "destination": destination, "status": status})
+    writer.flush()
+    _report_errors(job.errors)
+    return 1 if job.errors else 0
+
+
+def cmd_rm(args):
+    writer = RecordWriter(["path", "status"], args.format)
+    missing = [path for path in args.paths if not os.path.lexists(path)]
+    paths = [path for path in args.paths if path not in missing]
+    _report_errors([(path, "不存在") for path in missing])
+
+    def on_progress(progress):
+        _progress(f"{progress.items_done} / {progress.items_total}，已删除 {progress.removed:,} 个文件和文件夹")
+
+    job = delete_paths(paths, emit=on_progress)
+    _end_progress()
+    # 清理时的错误以暂存目录中的路径记录：换算回用户给出的路径，再判断哪些项目没有删除干净
+    errors = [(job.original_path(path), message) for path, message in job.errors]
+    for path in paths:
+        prefix = os.path.join(path, "")
+        failed = any(error_path == path or error_path.startswith(prefix) for error_path, _ in errors)
+        writer.write({"path": path, "status": "failed" if failed or os.path.lexists(path) else "deleted"})
+    writer.flush()
+    _report_errors(errors)
+    return 1 if errors or missing else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="explorer_cli", description="资源管理器命令行（与界面使用同一套核心）")
+    parser.add_argument("--format", choices=["json", "tsv"], default="json", help="输出格式（默认每行一个 JSON 对象）")
+    parser.add_argument("-H", "--human", action="store_true", help="大小和时间以易读的形式输出")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ls = commands.add_parser("ls", help="列出目录内容")
+    ls.add_argument("paths", nargs="*", default=["."])
+    ls.add_argument("--sort", choices=[column for column in SORT_COLUMNS if column != "natural"], default="name")
+    ls.add_argument("-r", "--reverse", action="store_true", help="降序")
+    ls.add_argument("--no-natural", action="store_true", help="名称按字符顺序而不是自然顺序排序")
+    ls.set_defaults(func=cmd_ls)
+
+    du = commands.add_parser("du", help="统计文件夹总大小")
+    du.add_argument("paths", nargs="*", default=["."])
+    du.set_defaults(func=cmd_du)
+
+    find = commands.add_parser("find", help="按文件名搜索")
+    find.add_argument("root")
+    find.add_argument("query")
+    find.add_argument("--mode", choices=SEARCH_MODES, default="substring")
+    find.set_defaults(func=cmd_find)
+
+    cp = commands.add_parser("cp", help="复制文件或文件夹")
+    cp.add_argument("sources", nargs="+")
+    cp.add_argument("target")
+    cp.add_argument("--move", action="store_true", help="移动（同一分区上直接重命名）")
+    cp.set_defaults(func=cmd_cp)
+
+    rm = commands.add_parser("rm", help="删除文件或文件夹（多线程并行删除，不能撤销）")
+    rm.add_argument("paths", nargs="+")
+    rm.set_defaults(func=cmd_rm)
+    return parser
+
+
+def main(argv=None):
+    """主函数：返回退出码"""
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        _end_progress()
+        return 130
+    except BrokenPipeError:
+        # 输出被管道截断（如 | head）：把标准输出换成 devnull，退出时刷新缓冲区不会再报错
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
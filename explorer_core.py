@@ -0,0 +1,97 @@
+import os
+import time
+
+from file_delete import DeleteJob
+from file_search import SEARCH_MODES, Matcher, SearchIndexCache, search_files
+from file_transfer import TransferJob, TransferProgress, format_duration
+from file_types import FileType, classify, load_file_types
+from folder_size import DirSizeMemo, FolderSizeCalculator
+from fs_listing import SORT_COLUMNS, Entry, Listing, ListingView, get_type_name, list_directory_task, stat_entry
+from volumes import Volume, VolumeCache, list_mounts
+
+"""
+资源管理器核心
+- 不依赖 tkinter：列举、分类、排序、文件夹大小、搜索、复制和删除都可以在脚本、
+  命令行（explorer_cli.py）和基准测试中直接使用，界面只是其中的一个调用者
+- 这里汇集各模块的公开接口，并提供界面和命令行共用的格式化与排序函数
+"""
+
+__all__ = [
+    "DeleteJob", "DirSizeMemo", "Entry", "FileType", "FolderSizeCalculator", "Listing", "ListingView",
+    "Matcher", "SEARCH_MODES", "SORT_COLUMNS", "SearchIndexCache", "TransferJob", "TransferProgress",
+    "Volume", "VolumeCache", "classify", "copy_items", "delete_paths", "disk_usage", "find_files",
+    "format_duration", "format_size", "format_time", "get_type_name", "list_directory", "list_directory_task",
+    "list_mounts", "load_file_types", "sort_order", "stat_entry",
+]
+
+
+def format_size(size_bytes):
+    """格式化文件大小"""
+    if size_bytes < 1024:
+        return f"{size_bytes} B"
+    elif size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.2f} KB"
+    elif size_bytes < 1024 * 1024 * 1024:
+        return f"{size_bytes / (1024 * 1024):.2f} MB"
+    else:
+        return f"{size_bytes / (1024 * 1024 * 1024):.2f} GB"
+
+
+def format_time(timestamp):
+    """格式化修改时间"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+def sort_order(listing, column="name", descending=False, natural=True):
+    """返回按指定列排序的下标（升序结果由 Listing 按列缓存，降序只是反转）
+
+    natural=True 时名称列按自然顺序比较（file2 排在 file10 前面）。
+    """
+    if column == "name" and natural:
+        column = "natural"
+    order = listing.sorted_indices(column)
+    return order[::-1] if descending else order
+
+
+def list_directory(path, column="name", descending=False, natural=True):
+    """同步列举目录，返回按指定列排序的 ListingView"""
+    listing = Listing(path)
+    list_directory_task(path, emit=listing.extend)
+    return ListingView(listing, sort_order(listing, column, descending, natural))
+
+
+def disk_usage(paths, memo=None, token=None, emit=None):
+    """计算各目录的总大小，返回 {目录: (字节数, 是否完成)}；文件直接取自身大小"""
+    results = {}
+    dirs = []
+    for path in paths:
+        if os.path.isdir(path):
+            dirs.append(path)
+        else:
+            results[path] = (os.path.getsize(path), True)
+    results.update(FolderSizeCalculator(memo).calculate(dirs, token=token, emit=emit))
+    return results
+
+
+def find_files(root, query, mode="substring", index_cache=None, token=None, emit=None):
+    """在 root 下按文件名搜索，返回 Listing（名称为相对 root 的路径）
+
+    搜索过程中通过 emit 交付 (listing, 已完成项数)，调用者可以逐批输出新增的结果。
+    """
+    listing, _ = search_files(root, Matcher(query, mode), index_cache, token=token, emit=emit)
+    return listing
+
+
+def copy_items(items, move=False, token=None, emit=None):
+    """复制（move=True 时移动）[(源, 目标)]，返回 TransferJob（含 errors 和 renamed）"""
+    job = TransferJob(items, move)
+    job.run(token=token, emit=emit)
+    return job
+
+
+def delete_paths(paths, token=None, emit=None):
+    """立即删除（不保留撤销期限），返回 DeleteJob（含 errors）"""
+    job = DeleteJob(paths, undo_window=0)
+    job.stage()
+    job.run(token=token, emit=emit)
+    return job
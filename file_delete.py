@@ -0,0 +1,397 @@
+import os
+import sys
+import time
+import stat
+import queue
+import itertools
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+删除
+- 分两个阶段：先把要删除的项目重命名到同一分区上的隐藏暂存目录，界面立即更新，
+  在撤销期限内可以原样恢复；然后在后台多线程并行删除暂存目录中的文件，回报进度
+- 无法暂存的项目（如没有可写的暂存目录）在第二阶段原地删除，不能撤销
+- 单个文件删除失败时记录错误并继续，结束后统一报告
+- 上次未清理完的暂存目录（程序在清理中退出）在下次删除同一分区上的项目时一并清理
+"""
+
+# 暂存目录的名称：优先放在分区的根目录，不可写时放在被删除项目所在的目录
+TRASH_DIR_NAME = ".explorer-trash"
+# 暂存后等待多久才开始真正删除，在此之前可以撤销（秒）
+UNDO_WINDOW = 10.0
+# 其他进程留下的暂存目录超过这个时间仍存在，视为未清理完的残留（秒）
+STALE_AFTER = 3600
+# 并行删除的线程数
+DELETE_WORKERS = 8
+# 进度回报的间隔（秒）
+REPORT_INTERVAL = 0.2
+
+# 删除进度：removed 为已删除的文件和目录数，items_done/items_total 为选中项目数，errors 为失败数
+DeleteProgress = namedtuple("DeleteProgress", ["removed", "items_done", "items_total", "errors"])
+
+# Windows 目录联接的重解析标记（stat 模块只在 Windows 上定义）
+IO_REPARSE_TAG_MOUNT_POINT = getattr(stat, "IO_REPARSE_TAG_MOUNT_POINT", 0xA0000003)
+
+# 设备号 -> 分区根目录
+_mount_points = {}
+_job_ids = itertools.count()
+
+
+def _mount_point(path):
+    """返回 path 所在分区的根目录"""
+    if sys.platform == "win32":
+        drive, _ = os.path.splitdrive(path)
+        return drive + os.sep
+    dev = os.stat(path).st_dev
+    mount = _mount_points.get(dev)
+    if mount is None:
+        mount = path
+        while True:
+            parent = os.path.dirname(mount)
+            if parent == mount or os.stat(parent).st_dev != dev:
+                break
+            mount = parent
+        _mount_points[dev] = mount
+    return mount
+
+
+def _hide(path):
+    """Windows 上给暂存目录加隐藏属性（以 "." 开头的名称在资源管理器中并不隐藏）"""
+    if sys.platform != "win32":
+        return
+    import ctypes
+    FILE_ATTRIBUTE_HIDDEN = 0x2
+    attributes = ctypes.windll.kernel32.GetFileAttributesW(path)
+    if attributes != -1 and not attributes & FILE_ATTRIBUTE_HIDDEN:
+        ctypes.windll.kernel32.SetFileAttributesW(path, attributes | FILE_ATTRIBUTE_HIDDEN)
+
+
+def _remove_empty_roots(job_dirs):
+    """删除已经空了的暂存目录（还有其他任务的暂存项目时保留）"""
+    for root in {os.path.dirname(job_dir) for job_dir in job_dirs}:
+        try:
+            os.rmdir(root)
+        except OSError:
+            pass
+
+
+def staging_root(path):
+    """返回与 path 在同一分区上、可写的暂存目录（不存在时创建），都不可用时返回 None"""
+    parent = os.path.dirname(os.path.abspath(path))
+    try:
+        dev = os.stat(parent).st_dev
+        candidates = [_mount_point(parent), parent]
+    except OSError:
+        return None
+    for base in candidates:
+        root = os.path.join(base, TRASH_DIR_NAME)
+        try:
+            if not os.path.isdir(root):
+                os.makedirs(root, exist_ok=True)
+                _hide(root)
+            if os.stat(root).st_dev == dev and os.access(root, os.W_OK | os.X_OK):
+                return root
+        except OSError:
+            continue
+    return None
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except PermissionError:
+        if sys.platform != "win32":
+            raise
+        # Windows 上只读文件不能直接删除，去掉只读属性后重试
+        os.chmod(path, stat.S_IWRITE)
+        os.unlink(path)
+
+
+def _is_junction(stats):
+    """Windows 目录联接：lstat 也把它当作目录，但不能进入删除其中的内容"""
+    return getattr(stats, "st_reparse_tag", 0) == IO_REPARSE_TAG_MOUNT_POINT
+
+
+def _is_junction_entry(dir_entry):
+    is_junction = getattr(dir_entry, "is_junction", None)  # Python 3.12+
+    if is_junction is not None:
+        return is_junction()
+    return sys.platform == "win32" and _is_junction(dir_entry.stat(follow_symlinks=False))
+
+
+def _is_stale(name, now):
+    """暂存目录名为 "创建时间-进程号-序号"：不属于本进程且足够旧的视为残留"""
+    try:
+        created, pid, _ = name.split("-")
+        return int(pid) != os.getpid() and now - int(created) > STALE_AFTER
+    except ValueError:
+        return False
+
+
+class DeleteJob:
+    """删除一批文件和目录
+
+    UI 线程调用 stage 完成第一阶段；run 作为后台任务通过 TaskRunner.submit 运行，
+    等待撤销期限后删除暂存的项目。撤销期限内可以调用 undo 恢复。
+    """
+
+    def __init__(self, paths, undo_window=UNDO_WINDOW):
+        self.paths = list(paths)
+        self.undo_window = undo_window
+        self.staged = []  # [(原路径, 暂存路径)]
+        self.direct = []  # 无法暂存、需要原地删除的路径
+        self.deleted = []  # 第二阶段原地删除成功的路径
+        self.errors = []  # [(路径, 错误信息)]
+        self.removed = 0
+        self.items_done = 0
+        self.undone = False
+        self._purging = False
+        self._purge_now = threading.Event()
+        self._lock = threading.Lock()
+        self._job_dirs = set()  # 本任务在各分区上的暂存目录
+
+    # ---- 第一阶段：暂存 ----
+
+    def stage(self):
+        """把各项目重命名到暂存目录，返回已暂存（从原位置消失）的路径"""
+        roots = {}
+        job_name = f"{int(time.time())}-{os.getpid()}-{next(_job_ids)}"
+        for number, path in enumerate(self.paths):
+            parent = os.path.dirname(os.path.abspath(path))
+            if parent not in roots:
+                roots[parent] = staging_root(path)
+            root = roots[parent]
+            if root is None:
+                self.direct.append(path)
+                continue
+            job_dir = os.path.join(root, job_name)
+            try:
+                if job_dir not in self._job_dirs:
+                    os.mkdir(job_dir)
+                    self._job_dirs.add(job_dir)
+                # 用序号作为暂存名，不同目录中的同名项目不会冲突
+                staged_path = os.path.join(job_dir, str(number))
+                os.rename(path, staged_path)
+            except OSError:
+                # 例如移动目录需要对目录本身有写权限：改为原地删除
+                self.direct.append(path)
+                continue
+            self.staged.append((path, staged_path))
+        # 没能用上的暂存目录（例如其中的任务目录无法创建）不留在用户的目录中
+        unused = {root for root in roots.values() if root is not None} - \
+            {os.path.dirname(job_dir) for job_dir in self._job_dirs}
+        _remove_empty_roots(os.path.join(root, job_name) for root in unused)
+        return [path for path, _ in self.staged]
+
+    def original_path(self, path):
+        """把暂存目录中的路径换算回删除前的路径（用于报告错误）；其他路径原样返回"""
+        for original, staged_path in self.staged:
+            if path == staged_path:
+                return original
+            if path.startswith(os.path.join(staged_path, "")):
+                return os.path.join(original, os.path.relpath(path, staged_path))
+        return path
+
+    @property
+    def can_undo(self):
+        return bool(self.staged) and not self._purging and not self.undone
+
+    def undo(self):
+        """清理开始前把暂存的项目移回原处，返回 [(原路径, 恢复到的路径)]
+
+        原位置已被占用时恢复为 "名称(1)" 等；清理已经开始时什么也不做。
+        """
+        with self._lock:
+            if self._purging or self.undone:
+                return []
+            self.undone = True
+        restored = []
+        for path, staged_path in self.staged:
+            target = path
+            counter = 1
+            while os.path.lexists(target):
+                name, ext = os.path.splitext(os.path.basename(path))
+                target = os.path.join(os.path.dirname(path), f"{name}({counter}){ext}")
+                counter += 1
+            try:
+                os.rename(staged_path, target)
+            except OSError as e:
+                self.errors.append((path, str(e)))
+                continue
+            restored.append((path, target))
+        for job_dir in self._job_dirs:
+            try:
+                os.rmdir(job_dir)
+            except OSError:
+                pass  # 仍有未能恢复的项目
+        _remove_empty_roots(self._job_dirs)
+        self._purge_now.set()
+        return restored
+
+    def purge_now(self):
+        """不再等待撤销期限，立即开始清理"""
+        self._purge_now.set()
+
+    # ---- 第二阶段：清理 ----
+
+    def progress(self):
+        return DeleteProgress(self.removed, self.items_done, len(self.staged) + len(self.direct), len(self.errors))
+
+    def run(self, token=None, emit=None):
+        """等待撤销期限后并行删除暂存和无法暂存的项目，返回第二阶段原地删除的路径
+
+        每隔 REPORT_INTERVAL 秒通过 emit 交付 DeleteProgress。
+        """
+        deadline = time.monotonic() + self.undo_window
+        while self.staged and time.monotonic() < deadline and not self._purge_now.is_set():
+            if token is not None and token.cancelled:
+                return self.deleted
+            self._purge_now.wait(REPORT_INTERVAL)
+        with self._lock:
+            if self.undone:
+                return self.deleted
+            self._purging = True
+
+        last_report = [time.monotonic()]
+
+        def report(force=False):
+            now = time.monotonic()
+            if emit is not None and (force or now - last_report[0] >= REPORT_INTERVAL):
+                last_report[0] = now
+                emit(self.progress())
+
+        executor = ThreadPoolExecutor(max_workers=DELETE_WORKERS, thread_name_prefix="delete")
+        try:
+            for _, staged_path in self.staged:
+                if token is not None and token.cancelled:
+                    break
+                self._purge(staged_path, executor, token, report)
+                self.items_done += 1
+            for job_dir in self._job_dirs:
+                try:
+                    os.rmdir(job_dir)
+                except OSError:
+                    pass  # 有删除失败的项目，留待以后清理
+            for path in self.direct:
+                if token is not None and token.cancelled:
+                    break
+                if self._purge(path, executor, token, report):
+                    self.deleted.append(path)
+                self.items_done += 1
+            self._purge_stale(executor, token, report)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        report(force=True)
+        return self.deleted
+
+    def _purge_stale(self, executor, token, report):
+        """删除本任务用到的暂存目录中其他进程残留的暂存目录；暂存目录空了就删除它
+
+        只是顺带清理：失败时打印出来，不计入本任务的 errors（与用户选中的项目无关）。
+        """
+        now = time.time()
+        for root in {os.path.dirname(job_dir) for job_dir in self._job_dirs}:
+            try:
+                names = os.listdir(root)
+            except OSError:
+                continue
+            for name in names:
+                if token is not None and token.cancelled:
+                    return
+                if _is_stale(name, now):
+                    errors = []
+                    self._purge(os.path.join(root, name), executor, token, report, errors)
+                    if errors:
+                        path, message = errors[0]
+                        print(f"清理残留的暂存目录失败（{len(errors)} 项），例如 {path}: {message}")
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass  # 还有其他任务的暂存项目
+
+    def _purge(self, path, executor, token, report, errors=None):
+        """并行删除 path（文件或整个目录树），全部删除成功时返回 True
+
+        每个目录由一个工作线程列举并删除其中的文件，子目录再提交给线程池；
+        全部文件删除后从最深的目录开始删除目录本身。错误追加到 errors（默认为 self.errors）。
+        """
+        if errors is None:
+            errors = self.errors
+        errors_before = len(errors)
+        try:
+            stats = os.lstat(path)
+        except OSError as e:
+            errors.append((path, str(e)))
+            return False
+        junction = _is_junction(stats)
+        if junction or not stat.S_ISDIR(stats.st_mode):
+            try:
+                if junction:
+                    os.rmdir(path)  # 只删除联接本身，不删除它指向的目录中的内容
+                else:
+                    _unlink(path)
+                self.removed += 1
+            except OSError as e:
+                errors.append((path, str(e)))
+            report()
+            return len(errors) == errors_before
+
+        results = queue.Queue()
+
+        def visit(directory):
+            # 每个目录在队列中恰好放入一条消息：(目录, 子目录列表, 删除的文件数, 错误列表)。
+            # 消息放入队列后才提交子目录，保证父目录在 dirs 中总排在子目录之前
+            subdirs = []
+            removed = 0
+            failed = []
+            if token is None or not token.cancelled:
+                try:
+                    with os.scandir(directory) as it:
+                        for dir_entry in it:
+                            try:
+                                if dir_entry.is_dir(follow_symlinks=False):
+                                    if _is_junction_entry(dir_entry):
+                                        # 与 shutil.rmtree 相同：不进入目录联接，只删除联接本身
+                                        os.rmdir(dir_entry.path)
+                                        removed += 1
+                                    else:
+                                        subdirs.append(dir_entry.path)
+                                    continue
+                                _unlink(dir_entry.path)
+                                removed += 1
+                            except OSError as e:
+                                failed.append((dir_entry.path, str(e)))
+                except OSError as e:
+                    failed.append((directory, str(e)))
+            results.put((directory, subdirs, removed, failed))
+            for subdir in subdirs:
+                executor.submit(visit, subdir)
+
+        dirs = []
+        outstanding = 1
+        executor.submit(visit, path)
+        while outstanding:
+            if token is not None and token.cancelled:
+                return False
+            try:
+                directory, subdirs, removed, failed = results.get(timeout=REPORT_INTERVAL)
+            except queue.Empty:
+                report()
+                continue
+            outstanding += len(subdirs) - 1
+            dirs.append(directory)
+            self.removed += removed
+            errors.extend(failed)
+            report()
+
+        for directory in reversed(dirs):
+            try:
+                os.rmdir(directory)
+                self.removed += 1
+            except OSError as e:
+                if len(errors) == errors_before:
+                    errors.append((directory, str(e)))
+        report()
+        return len(errors) == errors_before
@@ -0,0 +1,189 @@
+import io
+import os
+import sys
+import mmap
+import stat
+import codecs
+import threading
+from collections import OrderedDict, namedtuple
+
+from metrics import metrics
+
+try:
+    from PIL import Image
+except ImportError:  # 没有安装 Pillow 时只能预览 Tk 自身支持的图片格式
+    Image = None
+
+"""
+文件预览
+- 文本文件通过 mmap 只读取开头 PREVIEW_TEXT_BYTES 字节，不把整个文件读入内存
+- 图片在工作线程中解码并缩小为缩略图，编码成 Tk 可以直接加载的 PPM 数据；
+  没有 Pillow 时只预览 PNG/GIF（由 Tk 在 UI 线程中解码后按整数倍缩小）
+- 结果放入按字节数限制的 LRU 缓存，键为 路径 + 修改时间 + 大小，文件未变化时不重复解码
+"""
+
+# 文本预览读取的最大字节数
+PREVIEW_TEXT_BYTES = 64 * 1024
+# 缩略图的最大宽高（像素）
+THUMBNAIL_SIZE = (320, 320)
+# 没有 Pillow 时交给 Tk 解码的图片文件大小上限（字节）
+TK_IMAGE_MAX_BYTES = 8 * 1024 * 1024
+# 预览缓存的内存上限（字节）
+PREVIEW_CACHE_BYTES = 64 * 1024 * 1024
+
+# Pillow 能解码的常见图片格式；Tk 8.6 自身只支持 PNG、GIF 和 PPM/PGM
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff", ".webp", ".ico", ".ppm", ".pgm"}
+TK_IMAGE_EXTENSIONS = {".png", ".gif", ".ppm", ".pgm"}
+
+# 预览结果：kind 为 "text" / "image" / "binary" / "none"
+# - text: text 为解码后的开头部分，truncated 表示文件比预览长
+# - image: data 为图片数据（PPM 缩略图或原始 PNG/GIF），scaled 表示 data 已经是缩略图，
+#   width/height 为原图尺寸（Tk 解码时未知，为 0）
+# - binary / none: message 说明原因
+Preview = namedtuple("Preview", ["kind", "text", "truncated", "data", "scaled", "width", "height", "message"])
+
+
+def _preview(kind, text="", truncated=False, data=b"", scaled=False, width=0, height=0, message=""):
+    return Preview(kind, text, truncated, data, scaled, width, height, message)
+
+
+def _decode_text(data, truncated):
+    """按 UTF-8（带 BOM）、UTF-16（带 BOM）、GB18030 依次尝试解码；包含 NUL 的视为二进制，返回 None"""
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return data.decode("utf-16", errors="replace")
+    if b"\0" in data:
+        return None
+    for encoding in ("utf-8-sig", "gb18030"):
+        # 截断处可能切开一个多字节字符：增量解码器不完成最后的字符即可
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            return decoder.decode(data, final=not truncated)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("latin-1")
+
+
+def _read_text(path, size):
+    """用 mmap 读取文件开头的 PREVIEW_TEXT_BYTES 字节"""
+    length = min(size, PREVIEW_TEXT_BYTES)
+    if length == 0:
+        return b""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ) as mapped:
+            return mapped[:length]
+
+
+def _thumbnail(path):
+    """用 Pillow 解码并缩小图片，返回 (PPM 数据, 原宽, 原高)"""
+    with Image.open(path) as image:
+        width, height = image.size
+        # draft 让 JPEG 解码器直接以较小的比例解码，大照片快很多
+        image.draft("RGB", THUMBNAIL_SIZE)
+        image.thumbnail(THUMBNAIL_SIZE)
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            # PPM 没有透明通道：合成到白色背景上
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, "PPM")
+        return buffer.getvalue(), width, height
+
+
+def _estimate_size(preview):
+    return sys.getsizeof(preview.text) + len(preview.data) + 200
+
+
+class PreviewCache:
+    """按 路径 + 修改时间 + 大小 缓存预览结果，按 LRU 淘汰直到不超过 max_bytes"""
+
+    def __init__(self, max_bytes=PREVIEW_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # 键 -> (预览, 估算字节数)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path, stats):
+        return os.path.normcase(os.path.abspath(path)), stats.st_mtime_ns, stats.st_size
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                metrics.count("preview_cache.miss")
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            metrics.count("preview_cache.hit")
+            return item[0]
+
+    def put(self, key, preview):
+        size = _estimate_size(preview)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._items[key] = (preview, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, oldest_size) = self._items.popitem(last=False)
+                self.total_bytes -= oldest_size
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+def load_preview(path, cache=None, token=None, emit=None):
+    """后台预览任务：返回 Preview；cache 中有同一版本文件的结果时直接返回"""
+    stats = os.stat(path)
+    if stat.S_ISDIR(stats.st_mode):
+        return _preview("none", message="文件夹")
+    if not stat.S_ISREG(stats.st_mode):
+        # 管道、设备等读取时可能阻塞
+        return _preview("none", message="不是普通文件")
+    key = PreviewCache.key(path, stats)
+    if cache is not None:
+        preview = cache.get(key)
+        if preview is not None:
+            return preview
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext in IMAGE_EXTENSIONS and Image is not None:
+        try:
+            data, width, height = _thumbnail(path)
+            preview = _preview("image", data=data, scaled=True, width=width, height=height)
+        except Exception as e:  # Pillow 对损坏的图片可能抛出各种异常
+            preview = _preview("none", message=f"无法解码图片: {str(e)}")
+    elif ext in TK_IMAGE_EXTENSIONS:
+        if stats.st_size > TK_IMAGE_MAX_BYTES:
+            preview = _preview("none", message="图片太大，安装 Pillow 后可以预览")
+        else:
+            with open(path, "rb") as f:
+                preview = _preview("image", data=f.read())
+    elif ext in IMAGE_EXTENSIONS:
+        preview = _preview("none", message="预览此格式的图片需要安装 Pillow")
+    else:
+        truncated = stats.st_size > PREVIEW_TEXT_BYTES
+        text = _decode_text(_read_text(path, stats.st_size), truncated)
+        if text is None:
+            preview = _preview("binary", message="二进制文件")
+        else:
+            preview = _preview("text", text=text, truncated=truncated)
+
+    if cache is not None and (token is None or not token.cancelled):
+        cache.put(key, preview)
+    return preview
@@ -0,0 +1,224 @@
+import os
+import re
+import time
+import queue
+import fnmatch
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from fs_listing import FLAG_DIR, SKIPPED_NAMES, Listing, get_type_name
+
+"""
+文件名搜索
+- 支持子串、通配符（glob）和正则表达式，均不区分大小写，只匹配文件名本身
+- 多个 scandir 工作线程并行遍历目录树，匹配结果分批交付给界面
+- 遍历时顺便建立文件名三元组索引；对同一根目录的重复查询直接查索引，不再遍历
+"""
+
+# 搜索模式
+SEARCH_MODES = ("substring", "glob", "regex")
+
+# 索引的有效期（秒）：超过后重新遍历，以包含之后新建的文件
+SEARCH_INDEX_TTL = 300
+
+
+class Matcher:
+    """编译好的查询条件"""
+
+    def __init__(self, query, mode="substring"):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"未知的搜索模式: {mode}")
+        self.query = query
+        self.mode = mode
+        if mode == "substring":
+            folded = query.casefold()
+            self._match = lambda name, name_folded: folded in name_folded
+            self.literals = [folded]
+        elif mode == "glob":
+            pattern = query.casefold()
+            self._match = lambda name, name_folded: fnmatch.fnmatchcase(name_folded, pattern)
+            # 方括号表达式不是必需的字面量，先替换成通配符再拆分
+            plain = re.sub(r"\[[^\]]*\]", "*", pattern)
+            self.literals = [part for part in re.split(r"[*?]+", plain) if part]
+        else:
+            regex = re.compile(query, re.IGNORECASE)  # 语法错误时抛出 re.error
+            self._match = lambda name, name_folded: regex.search(name) is not None
+            self.literals = []
+
+    def match(self, name, name_folded=None):
+        if name_folded is None:
+            name_folded = name.casefold()
+        return self._match(name, name_folded)
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """一次遍历得到的文件名索引：相对路径、是否目录，以及文件名的三元组倒排表"""
+
+    def __init__(self, root):
+        self.root = root
+        self.built_at = time.time()
+        self.rel_paths = []
+        self.folded_names = []
+        self.flags = array("B")
+        self.postings = {}  # 三元组 -> array("I") 记录编号
+
+    def add(self, rel_path, name, is_dir):
+        record_id = len(self.rel_paths)
+        folded = name.casefold()
+        self.rel_paths.append(rel_path)
+        self.folded_names.append(folded)
+        self.flags.append(FLAG_DIR if is_dir else 0)
+        for trigram in _trigrams(folded):
+            posting = self.postings.get(trigram)
+            if posting is None:
+                posting = self.postings[trigram] = array("I")
+            posting.append(record_id)
+
+    def candidates(self, matcher):
+        """返回可能匹配的记录编号：有长度不小于 3 的字面量时取倒排表的交集，否则返回全部"""
+        sets = None
+        for literal in matcher.literals:
+            if len(literal) < 3:
+                continue
+            for trigram in _trigrams(literal):
+                posting = self.postings.get(trigram)
+                if posting is None:
+                    return []
+                sets = set(posting) if sets is None else sets.intersection(posting)
+                if not sets:
+                    return []
+        if sets is None:
+            return range(len(self.rel_paths))
+        return sorted(sets)
+
+    def __len__(self):
+        return len(self.rel_paths)
+
+
+class SearchIndexCache:
+    """按根目录保存最近建立的索引"""
+
+    def __init__(self, ttl=SEARCH_INDEX_TTL, max_roots=4):
+        self.ttl = ttl
+        self.max_roots = max_roots
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, root):
+        with self._lock:
+            index = self._indexes.get(os.path.normcase(os.path.abspath(root)))
+            if index is not None and time.time() - index.built_at <= self.ttl:
+                return index
+            return None
+
+    def put(self, index):
+        with self._lock:
+            self._indexes[os.path.normcase(os.path.abspath(index.root))] = index
+            while len(self._indexes) > self.max_roots:
+                oldest = min(self._indexes, key=lambda key: self._indexes[key].built_at)
+                del self._indexes[oldest]
+
+
+def _stat_match(listing, root, rel_path, is_dir):
+    """把一个匹配项（包括大小和修改时间）追加到结果中；文件已不存在时跳过"""
+    try:
+        stats = os.stat(os.path.join(root, rel_path))
+    except OSError:
+        return
+    listing.append(rel_path, is_dir, "文件夹" if is_dir else get_type_name(rel_path),
+                   None if is_dir else stats.st_size, stats.st_mtime)
+
+
+def search_files(root, matcher, index_cache=None, max_workers=8, report_interval=0.2, token=None, emit=None):
+    """后台搜索任务，返回 (Listing, 是否使用了索引)
+
+    结果 Listing 的 directory 为 root，名称为相对 root 的路径。搜索过程中每隔
+    report_interval 秒通过 emit 交付 (listing, 已完成项数)；listing 只由本线程追加，
+    界面读取前若干项是安全的。
+    """
+    listing = Listing(root)
+    last_report = time.time()
+
+    def report(force=False):
+        nonlocal last_report
+        now = time.time()
+        if emit is not None and (force or now - last_report >= report_interval):
+            last_report = now
+            emit((listing, len(listing)))
+
+    index = index_cache.get(root) if index_cache is not None else None
+    if index is not None:
+        for record_id in index.candidates(matcher):
+            if token is not None and token.cancelled:
+                break
+            rel_path = index.rel_paths[record_id]
+            name = os.path.basename(rel_path)
+            if matcher.match(name, index.folded_names[record_id]):
+                _stat_match(listing, root, rel_path, bool(index.flags[record_id] & FLAG_DIR))
+                report()
+        report(force=True)
+        return listing, True
+
+    index = SearchIndex(root) if index_cache is not None else None
+    results = queue.Queue()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+
+    def visit(rel_dir):
+        # 每个目录在队列中恰好放入一条消息：(相对目录, [(名称, 是否目录)], 匹配项, 子目录数)。
+        # 消息放入队列后才提交子目录，保证父目录的消息总在子目录之前被处理
+        names = []
+        matches = []
+        subdirs = []
+        if token is None or not token.cancelled:
+            try:
+                with os.scandir(os.path.join(root, rel_dir)) as it:
+                    for dir_entry in it:
+                        try:
+                            is_dir = dir_entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        name = dir_entry.name
+                        if is_dir and name.upper() in SKIPPED_NAMES:
+                            continue
+                        names.append((name, is_dir))
+                        rel_path = os.path.join(rel_dir, name) if rel_dir else name
+                        if matcher.match(name):
+                            matches.append((rel_path, is_dir))
+                        if is_dir and not dir_entry.is_symlink():
+                            subdirs.append(rel_path)
+            except OSError:
+                pass  # 无法访问的目录跳过
+        results.put((rel_dir, names, matches, len(subdirs)))
+        for rel_path in subdirs:
+            executor.submit(visit, rel_path)
+
+    outstanding = 1
+    executor.submit(visit, "")
+    try:
+        while outstanding:
+            if token is not None and token.cancelled:
+                break
+            try:
+                rel_dir, names, matches, subdir_count = results.get(timeout=report_interval)
+            except queue.Empty:
+                report()
+                continue
+            outstanding += subdir_count - 1
+            if index is not None:
+                for name, is_dir in names:
+                    index.add(os.path.join(rel_dir, name) if rel_dir else name, name, is_dir)
+            for rel_path, is_dir in matches:
+                _stat_match(listing, root, rel_path, is_dir)
+            report()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if index is not None and not outstanding:
+        index_cache.put(index)
+    report(force=True)
+    return listing, False
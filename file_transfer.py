@@ -0,0 +1,415 @@
+import os
+import sys
+import time
+import stat
+import errno
+import shutil
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+文件传输
+- 复制在工作线程中进行，先遍历一次源目录树得到总字节数和文件列表
+- 目录中的文件分发到线程池并行复制，正在复制的字节总数有上限；大量小文件时
+  不再受逐个文件的系统调用延迟限制
+- 单个文件或符号链接复制失败时记录错误并继续，结束后统一报告
+- 优先使用内核内的复制（Linux 上的 copy_file_range / sendfile），数据不经过 Python 缓冲区；
+  不支持时退回到 readinto + write
+- 按块复制，块之间检查暂停和取消；取消或出错时删除已复制的部分
+- 定期交付进度：已复制字节数、总字节数、速度和剩余时间
+- 移动（剪切）时源和目标在同一设备上则直接重命名，不复制数据；跨设备时先完整复制，
+  成功后才删除源，复制失败时删除已复制的部分，源保持不变
+"""
+
+# 每次系统调用复制的字节数，也是检查暂停/取消和累计进度的粒度
+CHUNK_SIZE = 8 * 1024 * 1024
+# 进度回报的间隔（秒）
+REPORT_INTERVAL = 0.2
+# 并行复制文件的线程数
+COPY_WORKERS = 8
+# 同时在复制中的文件大小之和的上限（字节）；单个更大的文件独占全部额度
+IN_FLIGHT_BYTES = 256 * 1024 * 1024
+# 小文件合并成一批交给一个线程，减少任务调度开销：每批最多的文件数和字节数
+BATCH_FILES = 64
+BATCH_BYTES = 8 * 1024 * 1024
+# readinto 方式使用的缓冲区大小
+BUFFER_SIZE = 1024 * 1024
+# 管道、套接字和设备文件不复制，记为这个错误
+SPECIAL_FILE_ERROR = "不是普通文件（管道、套接字或设备），已跳过"
+
+# 复制进度：done/total 为字节数，rate 为字节/秒，eta 为剩余秒数（未知时为 None），
+# files_done/files_total 为文件数，errors 为复制失败的项目数
+TransferProgress = namedtuple("TransferProgress",
+                              ["done", "total", "rate", "eta", "current", "files_done", "files_total", "errors"])
+
+# 这些错误表示当前文件（或文件系统组合）不支持某种快速复制方式，换下一种即可
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF, errno.EPERM,
+                    getattr(errno, "ENOTSUP", errno.EINVAL), getattr(errno, "EOPNOTSUPP", errno.EINVAL)}
+
+
+class TransferCancelled(Exception):
+    """复制被用户取消"""
+
+
+def _copy_methods():
+    """当前平台可用的文件复制方式，按优先顺序"""
+    methods = []
+    if hasattr(os, "copy_file_range"):
+        methods.append("copy_file_range")
+    if sys.platform.startswith("linux") and hasattr(os, "sendfile"):
+        methods.append("sendfile")  # Linux 2.6.33 起 sendfile 的目标可以是普通文件
+    methods.append("readinto")
+    return tuple(methods)
+
+
+_COPY_METHODS = _copy_methods()
+
+
+class TransferJob:
+    """一个复制任务：把若干文件或目录复制到各自的目标路径，作为一个整体执行和报告进度
+
+    items 为 [(源, 目标)]。run 通过 TaskRunner.submit 在工作线程中运行；
+    pause/resume 可以在任意线程中调用。move=True 时为移动（剪切）：
+    同一设备上的项目直接重命名，其余的复制完成后删除源。
+    """
+
+    def __init__(self, items, move=False):
+        self.items = list(items)
+        self.move = move
+        self.renamed = []  # 通过重命名完成移动的 (源, 目标)
+        self.done_bytes = 0
+        self.total_bytes = 0
+        self.files_done = 0
+        self.files_total = 0
+        self.errors = []  # [(路径, 错误信息)]
+        self.current = ""
+        self._resume = threading.Event()
+        self._resume.set()
+        self._paused_time = 0.0  # 开始后累计的暂停时间（整个任务只记一次，与线程数无关）
+        self._paused_at = None  # 当前暂停的开始时间
+        self._started = None
+        self._finished = None  # 结束后耗时不再增长，速度不再下降
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()  # 每个复制线程自己的 readinto 缓冲区
+
+    @property
+    def destinations(self):
+        return [destination for _, destination in self.items]
+
+    # ---- 控制 ----
+
+    def pause(self):
+        with self._lock:
+            if self._paused_at is None:
+                self._paused_at = time.monotonic()
+            self._resume.clear()
+
+    def resume(self):
+        with self._lock:
+            if self._paused_at is not None:
+                if self._started is not None:
+                    self._paused_time += time.monotonic() - max(self._paused_at, self._started)
+                self._paused_at = None
+            self._resume.set()
+
+    @property
+    def paused(self):
+        return not self._resume.is_set()
+
+    # ---- 进度 ----
+
+    def elapsed(self):
+        """开始以来不含暂停的秒数；结束后不再增长"""
+        with self._lock:
+            if self._started is None:
+                return 0.0
+            end = self._finished if self._finished is not None else time.monotonic()
+            if self._paused_at is not None:
+                end = min(end, max(self._paused_at, self._started))
+            return max(0.0, end - self._started - self._paused_time)
+
+    def progress(self):
+        """返回当前进度（速度按不含暂停的耗时计算）"""
+        elapsed = self.elapsed()
+        rate = self.done_bytes / elapsed if elapsed > 0 else 0.0
+        eta = (self.total_bytes - self.done_bytes) / rate if rate > 0 else None
+        return TransferProgress(self.done_bytes, self.total_bytes, rate, eta, self.current,
+                                self.files_done, self.files_total, len(self.errors))
+
+    def _checkpoint(self, token, emit):
+        """块之间调用：等待暂停结束、检查取消、按间隔回报进度"""
+        if not self._resume.is_set():
+            # 暂停时间由 pause/resume 统一记录，各复制线程只等待
+            if emit is not None:
+                emit(self.progress())
+            while not self._resume.wait(REPORT_INTERVAL):
+                if token is not None and token.cancelled:
+                    break
+        if token is not None and token.cancelled:
+            raise TransferCancelled()
+        now = time.monotonic()
+        if emit is not None and now - self._last_report >= REPORT_INTERVAL:
+            self._last_report = now
+            emit(self.progress())
+
+    # ---- 复制 ----
+
+    def _plan(self, source, destination, dirs, files, links):
+        """遍历一次源，把要创建的目录、要复制的文件 (源, 目标, 大小) 和符号链接追加到各列表
+
+        无法访问的项目和管道、套接字、设备等特殊文件记入 errors 并跳过（打开管道会一直阻塞），
+        其余部分照常复制。
+        """
+        if os.path.islink(source):
+            links.append((source, destination))
+            return
+        if not os.path.isdir(source):
+            stats = os.stat(source)
+            if stat.S_ISREG(stats.st_mode):
+                files.append((source, destination, stats.st_size))
+            else:
+                self.errors.append((source, SPECIAL_FILE_ERROR))
+            return
+        stack = [(source, destination)]
+        while stack:
+            src_dir, dst_dir = stack.pop()
+            try:
+                with os.scandir(src_dir) as it:
+                    children = list(it)
+            except OSError as e:
+                self.errors.append((src_dir, str(e)))
+                continue
+            dirs.append((src_dir, dst_dir))
+            for dir_entry in children:
+                dst_path = os.path.join(dst_dir, dir_entry.name)
+                try:
+                    if dir_entry.is_symlink():
+                        links.append((dir_entry.path, dst_path))
+                    elif dir_entry.is_dir(follow_symlinks=False):
+                        stack.append((dir_entry.path, dst_path))
+                    elif dir_entry.is_file(follow_symlinks=False):
+                        files.append((dir_entry.path, dst_path, dir_entry.stat(follow_symlinks=False).st_size))
+                    else:
+                        self.errors.append((dir_entry.path, SPECIAL_FILE_ERROR))
+                except OSError as e:
+                    self.errors.append((dir_entry.path, str(e)))
+
+    def _copy_file(self, src, dst, size, token, emit):
+        """复制一个文件的内容和元数据（size 为列举时的大小）"""
+        self.current = src
+        # 不带缓冲的文件对象：快速复制直接使用文件描述符，readinto 也不需要再缓冲一次
+        with open(src, "rb", buffering=0) as fsrc, open(dst, "wb", buffering=0) as fdst:
+            src_fd = fsrc.fileno()
+            dst_fd = fdst.fileno()
+            methods = list(_COPY_METHODS)
+            offset = 0
+            while True:
+                self._checkpoint(token, emit)
+                method = methods[0]
+                try:
+                    if method == "copy_file_range":
+                        copied = os.copy_file_range(src_fd, dst_fd, CHUNK_SIZE, offset, offset)
+                    elif method == "sendfile":
+                        copied = os.sendfile(dst_fd, src_fd, offset, CHUNK_SIZE)
+                    else:
+                        view = getattr(self._local, "buffer", None)
+                        if view is None:
+                            view = self._local.buffer = memoryview(bytearray(BUFFER_SIZE))
+                        fsrc.seek(offset)
+                        copied = fsrc.readinto(view)
+                        fdst.seek(offset)
+                        written = 0
+                        while written < copied:  # 无缓冲的 write 可能只写入一部分
+                            written += fdst.write(view[written:copied])
+                except OSError as e:
+                    if method != "readinto" and e.errno in _FALLBACK_ERRNOS:
+                        methods.pop(0)  # 此文件不支持该方式，从当前位置换下一种
+                        continue
+                    raise
+                if not copied:
+                    break
+                offset += copied
+                with self._lock:
+                    self.done_bytes += copied
+                if offset >= size and method != "readinto":
+                    break  # 已复制列举时的大小，省去一次返回 0 的系统调用
+        shutil.copystat(src, dst)
+        with self._lock:
+            self.files_done += 1
+
+    def _copy_files(self, files, token, emit):
+        """用线程池并行复制文件；正在复制的字节数不超过 IN_FLIGHT_BYTES"""
+        budget = threading.Condition()
+        in_flight = [0]
+        fatal = []  # 取消或意外错误：停止整个任务
+
+        def copy_batch(batch, cost):
+            try:
+                for src, dst, size in batch:
+                    if fatal:
+                        break
+                    try:
+                        self._copy_file(src, dst, size, token, emit)
+                    except OSError as e:
+                        with self._lock:
+                            self.errors.append((src, str(e)))
+                        _remove_path(dst)  # 不留下不完整的文件
+            except BaseException as e:  # 包括 TransferCancelled
+                fatal.append(e)
+            finally:
+                with budget:
+                    in_flight[0] -= cost
+                    budget.notify_all()
+
+        def submit(batch, cost):
+            cost = min(cost, IN_FLIGHT_BYTES)
+            with budget:
+                # 有文件在复制且额度不足时等待；没有在复制的文件时总是允许提交
+                while in_flight[0] and in_flight[0] + cost > IN_FLIGHT_BYTES and not fatal:
+                    budget.wait(REPORT_INTERVAL)
+                in_flight[0] += cost
+            self._checkpoint(token, emit)
+            executor.submit(copy_batch, batch, cost)
+
+        executor = ThreadPoolExecutor(max_workers=COPY_WORKERS, thread_name_prefix="copy")
+        try:
+            batch = []
+            batch_bytes = 0
+            for item in files:
+                if fatal:
+                    break
+                batch.append(item)
+                batch_bytes += item[2]
+                if len(batch) >= BATCH_FILES or batch_bytes >= BATCH_BYTES:
+                    submit(batch, batch_bytes)
+                    batch = []
+                    batch_bytes = 0
+            if batch and not fatal:
+                submit(batch, batch_bytes)
+        except TransferCancelled as e:
+            fatal.append(e)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=bool(fatal))
+        if fatal:
+            raise fatal[0]
+
+    @staticmethod
+    def _same_device(source, destination):
+        """源和目标所在目录是否在同一设备（文件系统）上"""
+        try:
+            source_dev = os.stat(source, follow_symlinks=False).st_dev
+            target_dev = os.stat(os.path.dirname(os.path.abspath(destination))).st_dev
+        except OSError:
+            return False
+        return source_dev == target_dev
+
+    def _try_rename(self, source, destination):
+        """同一设备上的移动直接重命名；返回 False 表示需要复制"""
+        if not self._same_device(source, destination):
+            return False
+        if os.path.lexists(destination):
+            raise FileExistsError(errno.EEXIST, "目标已存在", destination)
+        try:
+            # 不用 os.replace：目标已存在时宁可失败也不覆盖
+            os.rename(source, destination)
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                return False  # 同一 st_dev 但不能跨挂载点重命名（如绑定挂载），改为复制
+            raise
+        return True
+
+    def run(self, token=None, emit=None):
+        """执行复制或移动，返回 TransferProgress
+
+        取消或出现意外错误时删除本任务复制出的目标；移动时只要有项目复制失败，
+        也撤销复制，源保持不变（已通过重命名完成的项目除外）。
+        """
+        with self._lock:
+            self._started = time.monotonic()
+        try:
+            return self._run(token, emit)
+        finally:
+            with self._lock:
+                self._finished = time.monotonic()
+
+    def _run(self, token, emit):
+        copy_items = []
+        for source, destination in self.items:
+            if token is not None and token.cancelled:
+                raise TransferCancelled()
+            if self.move and self._try_rename(source, destination):
+                self.renamed.append((source, destination))
+            else:
+                copy_items.append((source, destination))
+
+        # 回滚时会删除复制目标，因此先确认它们都不存在，不会误删已有的数据
+        for _, destination in copy_items:
+            if os.path.lexists(destination):
+                raise FileExistsError(errno.EEXIST, "目标已存在", destination)
+
+        dirs, files, links = [], [], []
+        for source, destination in copy_items:
+            self._plan(source, destination, dirs, files, links)
+        self.total_bytes = sum(size for _, _, size in files)
+        self.files_total = len(files)
+        try:
+            for src_dir, dst_dir in dirs:
+                self._checkpoint(token, emit)
+                try:
+                    os.mkdir(dst_dir)
+                except OSError as e:
+                    self.errors.append((src_dir, str(e)))
+            for src, dst in links:
+                try:
+                    os.symlink(os.readlink(src), dst)
+                except OSError as e:
+                    # 例如 Windows 上没有创建符号链接的权限
+                    self.errors.append((src, str(e)))
+            if files:
+                self._copy_files(files, token, emit)
+            # 目录的修改时间在其中的文件写完之后再设置，从最深的目录开始
+            for src_dir, dst_dir in reversed(dirs):
+                try:
+                    shutil.copystat(src_dir, dst_dir)
+                except OSError:
+                    pass  # 目录本身没能创建，错误已经记录
+            if self.errors and self.move:
+                # 移动不完整：撤销已复制的部分，源保持不变
+                path, message = self.errors[0]
+                raise OSError(f"{len(self.errors)} 个项目复制失败，例如 {path}: {message}")
+        except BaseException:
+            for _, destination in copy_items:
+                _remove_path(destination)
+            raise
+        if self.move:
+            # 目标已完整复制，才删除源；删除失败时目标保留，错误交给调用者
+            for source, _ in copy_items:
+                if os.path.isdir(source) and not os.path.islink(source):
+                    shutil.rmtree(source)
+                else:
+                    os.remove(source)
+        self.current = ""
+        with self._lock:
+            self._finished = time.monotonic()
+        return self.progress()
+
+
+def _remove_path(path):
+    """删除复制出的文件或目录（不存在时忽略），失败时只打印错误"""
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            os.remove(path)
+    except OSError as e:
+        print(f"清理未完成的复制失败: {str(e)}")
+
+
+def format_duration(seconds):
+    """把秒数格式化为 mm:ss 或 h:mm:ss"""
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
@@ -0,0 +1,149 @@
+import os
+import json
+import functools
+from collections import namedtuple
+
+"""
+文件类型分类
+- 一张表：扩展名 -> (图标, 类型描述, 类别)，启动时建立一次，可以用配置文件扩展或覆盖
+- 按扩展名缓存查找结果，每个文件只需一次字典查找；表中没有的扩展名按 LRU 缓存，数量有上限
+- 不再调用 mimetypes，也不再对每一行做一串列表成员测试
+"""
+
+# 用户配置文件：与收藏夹文件放在一起
+FILE_TYPES_FILE = os.path.join(os.path.expanduser("~"), ".resource_explorer_file_types.json")
+
+FileType = namedtuple("FileType", ["icon", "label", "category"])
+
+# 类别 -> (图标, 类别名称)；扩展名没有单独的描述时，描述为 "扩展名大写 + 类别名称"
+CATEGORIES = {
+    "document": ("📝", "文档"),
+    "image": ("🖼️", "图像"),
+    "audio": ("🔊", "音频"),
+    "video": ("🎬", "视频"),
+    "executable": ("⚙️", "程序"),
+    "archive": ("📦", "压缩文件"),
+    "code": ("📜", "源文件"),
+    "other": ("📄", "文件"),
+}
+
+# 类别 -> {扩展名: 类型描述或 None}
+BUILTIN_TYPES = {
+    "document": {
+        ".txt": "文本文档", ".md": "Markdown 文档", ".rtf": "RTF 文档", ".pdf": "PDF 文档",
+        ".doc": "Word 文档", ".docx": "Word 文档", ".xls": "Excel 工作表", ".xlsx": "Excel 工作表",
+        ".ppt": "PowerPoint 演示文稿", ".pptx": "PowerPoint 演示文稿", ".csv": "CSV 文件",
+        ".log": "日志文件", ".ini": "配置设置", ".odt": None, ".epub": None,
+    },
+    "image": {
+        ".jpg": "JPEG 图像", ".jpeg": "JPEG 图像", ".png": None, ".gif": None, ".bmp": None,
+        ".tif": "TIFF 图像", ".tiff": "TIFF 图像", ".svg": None, ".webp": None, ".ico": "图标",
+        ".heic": None, ".psd": "Photoshop 图像",
+    },
+    "audio": {
+        ".mp3": None, ".wav": None, ".flac": None, ".aac": None, ".ogg": None, ".m4a": None, ".wma": None,
+    },
+    "video": {
+        ".mp4": None, ".avi": None, ".mkv": None, ".mov": None, ".wmv": None, ".flv": None, ".webm": None,
+    },
+    "executable": {
+        ".exe": "应用程序", ".msi": "Windows 安装包", ".bat": "批处理文件", ".cmd": "批处理文件",
+        ".sh": "Shell 脚本", ".ps1": "PowerShell 脚本", ".dll": "应用程序扩展", ".so": "共享库",
+        ".apk": "Android 安装包",
+    },
+    "archive": {
+        ".zip": None, ".rar": None, ".7z": None, ".tar": None, ".gz": None, ".bz2": None, ".xz": None,
+        ".iso": "光盘映像",
+    },
+    "code": {
+        ".py": "Python 源文件", ".js": "JavaScript 源文件", ".ts": "TypeScript 源文件",
+        ".c": "C 源文件", ".h": "C 头文件", ".cpp": "C++ 源文件", ".hpp": "C++ 头文件",
+        ".java": "Java 源文件", ".go": "Go 源文件", ".rs": "Rust 源文件", ".cs": "C# 源文件",
+        ".html": "HTML 文档", ".htm": "HTML 文档", ".css": "CSS 样式表", ".json": "JSON 文件",
+        ".xml": "XML 文档", ".yaml": "YAML 文件", ".yml": "YAML 文件", ".sql": "SQL 脚本",
+    },
+}
+
+# 未知扩展名的查找结果最多缓存的个数（例如以哈希值命名的文件，扩展名几乎各不相同）
+UNKNOWN_TYPES_CACHE = 4096
+
+# 扩展名 -> FileType：内置表 + 配置文件（未知扩展名另行缓存，数量有上限）
+_types = {}
+_categories = {}
+
+
+def _extension_label(ext, category_label):
+    """扩展名没有单独的描述时的类型描述；内置表、配置文件和未知扩展名共用同一格式"""
+    return f"{ext[1:].upper()} {category_label}"
+
+
+def _build(config):
+    """由内置表和配置（load_config 的结果）建立 类别表 和 扩展名表"""
+    categories = {name: FileType(icon, label, name) for name, (icon, label) in CATEGORIES.items()}
+    for name, values in config.get("categories", {}).items():
+        base = categories.get(name, categories["other"])
+        categories[name] = FileType(values.get("icon", base.icon), values.get("label", base.label), name)
+
+    types = {}
+    for category, extensions in BUILTIN_TYPES.items():
+        base = categories[category]
+        for ext, label in extensions.items():
+            types[ext] = FileType(base.icon, label or _extension_label(ext, base.label), category)
+    for ext, values in config.get("extensions", {}).items():
+        ext = ext.lower() if ext.startswith(".") else "." + ext.lower()
+        old = types.get(ext)
+        category = values.get("category", old.category if old else "other")
+        base = categories.get(category, categories["other"])
+        if old is not None and old.category != category:
+            old = None  # 换了类别：图标和描述也按新类别
+        icon = values.get("icon", old.icon if old else base.icon)
+        label = values.get("label", old.label if old else _extension_label(ext, base.label))
+        types[ext] = FileType(icon, label, category)
+    return categories, types
+
+
+def load_config(path=FILE_TYPES_FILE):
+    """读取配置文件，不存在或无效时返回空配置
+
+    格式：{"categories": {类别: {"icon": ..., "label": ...}},
+           "extensions": {".扩展名": {"icon": ..., "label": ..., "category": ...}}}，各字段都可以省略
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if not isinstance(config, dict):
+            raise ValueError("配置文件的顶层应为对象")
+        return config
+    except (OSError, ValueError) as e:
+        print(f"读取文件类型配置失败: {str(e)}")
+        return {}
+
+
+def load_file_types(path=FILE_TYPES_FILE):
+    """启动时调用一次：用内置表和配置文件重建分类表（清空已缓存的查找结果）"""
+    global _types, _categories
+    try:
+        _categories, _types = _build(load_config(path))
+        _unknown_type.cache_clear()
+    except (AttributeError, TypeError) as e:
+        print(f"文件类型配置格式错误: {str(e)}")
+
+
+@functools.lru_cache(maxsize=UNKNOWN_TYPES_CACHE)
+def _unknown_type(ext):
+    other = _categories["other"]
+    return FileType(other.icon, _extension_label(ext, other.label) if ext else other.label, "other")
+
+
+def classify(name):
+    """返回文件名对应的 FileType；未知扩展名按 LRU 缓存，不会无限增长"""
+    ext = os.path.splitext(name)[1].lower()
+    file_type = _types.get(ext)
+    if file_type is None:
+        file_type = _unknown_type(ext)
+    return file_type
+
+
+_categories, _types = _build({})
@@ -0,0 +1,133 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+文件夹大小计算
+- 多个 scandir 工作线程并行遍历子树，部分结果定期回报，可以取消
+- 按目录记忆"直接包含的文件大小之和 + 子目录列表"，用目录自身的 mtime/inode 校验
+- 再次计算时未变化的目录只需一次 stat，不再列举、也不再 stat 其中的文件
+"""
+
+
+def _is_link(dir_entry):
+    """符号链接和 Windows 目录联接都不跟随，避免重复计算和循环"""
+    if dir_entry.is_symlink():
+        return True
+    is_junction = getattr(dir_entry, "is_junction", None)  # Python 3.12+
+    return bool(is_junction and is_junction())
+
+
+class DirSizeMemo:
+    """目录 -> (mtime_ns, ino, 直接文件大小之和, 子目录路径元组)，按 LRU 限制数量"""
+
+    def __init__(self, max_dirs=500000):
+        self.max_dirs = max_dirs
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def scan(self, path):
+        """返回目录直接包含的文件大小之和与子目录列表；目录未变化时直接使用记忆的结果"""
+        stats = os.stat(path)
+        with self._lock:
+            item = self._items.get(path)
+            if item is not None and item[0] == stats.st_mtime_ns and item[1] == stats.st_ino:
+                self._items.move_to_end(path)
+                return item[2], item[3]
+
+        own_bytes = 0
+        subdirs = []
+        with os.scandir(path) as it:
+            for dir_entry in it:
+                try:
+                    if _is_link(dir_entry):
+                        continue
+                    if dir_entry.is_dir(follow_symlinks=False):
+                        subdirs.append(dir_entry.path)
+                    elif dir_entry.is_file(follow_symlinks=False):
+                        own_bytes += dir_entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue  # 跳过无法访问的项目
+        subdirs = tuple(subdirs)
+
+        with self._lock:
+            self._items[path] = (stats.st_mtime_ns, stats.st_ino, own_bytes, subdirs)
+            self._items.move_to_end(path)
+            while len(self._items) > self.max_dirs:
+                self._items.popitem(last=False)
+        return own_bytes, subdirs
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class FolderSizeCalculator:
+    """用线程池并行计算多个文件夹的总大小"""
+
+    def __init__(self, memo=None, max_workers=8, report_interval=0.2):
+        self.memo = memo if memo is not None else DirSizeMemo()
+        self.max_workers = max_workers
+        self.report_interval = report_interval
+
+    def calculate(self, roots, token=None, emit=None):
+        """计算 roots 中每个目录的总大小，返回 {目录: (字节数, 是否完成)}
+
+        供 TaskRunner.submit 使用：计算过程中每隔 report_interval 秒通过 emit 交付一次
+        当前的部分结果（同样的字典格式），token 被取消时尽快结束。
+        """
+        if not roots:
+            return {}
+        totals = {root: 0 for root in roots}
+        pending = {root: 1 for root in roots}  # 每个根目录尚未处理完的目录数
+        remaining = [len(roots)]  # 尚未完成的根目录数
+        lock = threading.Lock()
+        all_done = threading.Event()
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="folder-size")
+
+        def finish_one(root):
+            # 调用时已持有 lock
+            pending[root] -= 1
+            if pending[root] == 0:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    all_done.set()
+
+        def visit(root, path):
+            subdirs = ()
+            if token is None or not token.cancelled:
+                try:
+                    own_bytes, subdirs = self.memo.scan(path)
+                except OSError:
+                    own_bytes = 0  # 无权限访问的目录按 0 计算
+                with lock:
+                    totals[root] += own_bytes
+                    pending[root] += len(subdirs)
+            for subdir in subdirs:
+                executor.submit(visit, root, subdir)
+            with lock:
+                finish_one(root)
+
+        def snapshot():
+            with lock:
+                return {root: (totals[root], pending[root] == 0) for root in roots}
+
+        try:
+            for root in roots:
+                executor.submit(visit, root, root)
+            while not all_done.wait(self.report_interval):
+                if token is not None and token.cancelled:
+                    break
+                if emit is not None:
+                    emit(snapshot())
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return snapshot()
+
+
+def calculate_folder_size(path, memo=None):
+    """同步计算单个目录的总大小（字节）"""
+    total, _ = FolderSizeCalculator(memo).calculate([path])[path]
+    return total
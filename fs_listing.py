@@ -0,0 +1,396 @@
+import os
+import re
+import sys
+import time
+import stat
+import bisect
+import threading
+import unicodedata
+from array import array
+from collections import namedtuple
+
+from file_types import classify
+from metrics import metrics
+
+"""
+目录列举引擎
+- 每个目录只用一次 os.scandir 遍历
+- 直接使用 DirEntry 缓存的类型信息和 stat 数据，避免重复的 isdir/isfile/stat 调用
+"""
+
+# 列举时跳过的系统目录（统一用大写比较）；.EXPLORER-TRASH 是删除时的暂存目录（见 file_delete）
+SKIPPED_NAMES = {"$RECYCLE.BIN", ".EXPLORER-TRASH"}
+
+# 目录项记录：导航树、内容视图、排序和属性窗口共用
+# 目录的 size 在未计算文件夹大小时为 None；with_stat=False 时文件的 size/mtime 为 0
+Entry = namedtuple("Entry", ["name", "path", "is_dir", "type_name", "size", "mtime"])
+
+
+def get_type_name(name):
+    """根据文件名返回类型描述（查分类表，每个扩展名只计算一次）"""
+    return classify(name).label
+
+
+def iter_entries(path, dirs_only=False, with_stat=True):
+    """单次遍历目录，逐个产生 Entry（按 scandir 返回顺序）
+
+    权限错误等目录级异常直接抛给调用者；单个条目无法访问时跳过。
+    开启性能指标时分别累计 enumerate / stat / classify 的耗时（不含调用者处理各项的时间）。
+    """
+    timed = metrics.enabled
+    own_time = stat_time = classify_time = 0.0
+    count = 0
+    resumed = time.perf_counter() if timed else 0.0
+    try:
+        with os.scandir(path) as it:
+            for dir_entry in it:
+                name = dir_entry.name
+                if name.upper() in SKIPPED_NAMES:
+                    continue
+                try:
+                    # is_dir/is_file 优先使用 readdir 返回的类型，不产生额外系统调用
+                    is_dir = dir_entry.is_dir()
+                    if not is_dir and (dirs_only or not dir_entry.is_file()):
+                        continue
+                    if with_stat:
+                        # Windows 上 stat 数据随目录列举一起返回；其他平台每项最多一次 stat
+                        if timed:
+                            started = time.perf_counter()
+                            stats = dir_entry.stat()
+                            stat_time += time.perf_counter() - started
+                        else:
+                            stats = dir_entry.stat()
+                        size = None if is_dir else stats.st_size
+                        mtime = stats.st_mtime
+                    else:
+                        size = None if is_dir else 0
+                        mtime = 0
+                except OSError:
+                    continue  # 跳过无法访问的项目
+
+                count += 1
+                if is_dir:
+                    entry = Entry(name, dir_entry.path, True, "文件夹", size, mtime)
+                elif timed:
+                    started = time.perf_counter()
+                    entry = Entry(name, dir_entry.path, False, get_type_name(name), size, mtime)
+                    classify_time += time.perf_counter() - started
+                else:
+                    entry = Entry(name, dir_entry.path, False, get_type_name(name), size, mtime)
+                if timed:
+                    own_time += time.perf_counter() - resumed
+                    yield entry
+                    resumed = time.perf_counter()
+                else:
+                    yield entry
+    finally:
+        if timed:
+            own_time += time.perf_counter() - resumed
+            metrics.record("enumerate", own_time - stat_time - classify_time)
+            metrics.record("stat", stat_time, count if with_stat else 0)
+            metrics.record("classify", classify_time, count)
+            metrics.count("syscall.scandir")
+            if with_stat and os.name != "nt":
+                metrics.count("syscall.stat", count)
+            metrics.count("entries", count)
+
+
+def stat_entry(directory, name):
+    """返回单个目录项的 Entry（与 iter_entries 的规则一致）；不存在或应跳过时返回 None"""
+    if name.upper() in SKIPPED_NAMES:
+        return None
+    path = os.path.join(directory, name)
+    try:
+        stats = os.stat(path)
+    except OSError:
+        return None
+    if stat.S_ISDIR(stats.st_mode):
+        return Entry(name, path, True, "文件夹", None, stats.st_mtime)
+    if stat.S_ISREG(stats.st_mode):
+        return Entry(name, path, False, get_type_name(name), stats.st_size, stats.st_mtime)
+    return None
+
+
+def scan_directory(path, dirs_only=False, with_stat=True):
+    """单次遍历目录，返回 Entry 列表（目录在前，文件在后）"""
+    dirs = []
+    files = []
+    for entry in iter_entries(path, dirs_only, with_stat):
+        (dirs if entry.is_dir else files).append(entry)
+    dirs.extend(files)
+    return dirs
+
+
+def list_directory_task(path, dirs_only=False, with_stat=True, batch_size=1000, token=None, emit=None):
+    """后台列举任务：每 batch_size 项通过 emit 交付一批 Entry，返回总项目数
+
+    供 TaskRunner.submit 使用；token 被取消时提前结束。
+    """
+    batch = []
+    count = 0
+    for entry in iter_entries(path, dirs_only, with_stat):
+        if token is not None and token.cancelled:
+            return count
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            count += len(batch)
+            emit(batch)
+            batch = []
+    if batch:
+        count += len(batch)
+        emit(batch)
+    return count
+
+
+# 数字串（包括全角等 Unicode 数字）
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _encode_digits(match):
+    digits = match.group()
+    value = str(int(digits))
+    # 标记字符 + 有效位数 + 数值 + 原始位数：位数少的数值更小；数值相同时位数少的在前（file1 < file01）
+    return "\x01" + chr(0x30 + len(value)) + value + chr(0x30 + len(digits))
+
+
+def natural_sort_key(name):
+    """自然排序键：数字串按数值比较（file2 < file10），文字部分忽略大小写和全/半角差异
+
+    结果仍是一个字符串：每个数字串被编码为以 \x01 开头、可按字符串直接比较的形式。
+    名称中没有数字时与折叠后的名称相同，可以共享同一个对象。
+    """
+    folded = unicodedata.normalize("NFKC", name).casefold()
+    if not _DIGITS_RE.search(folded):
+        return folded
+    return _DIGITS_RE.sub(_encode_digits, folded)
+
+
+def _shared(key, name):
+    """排序键与名称相同时复用名称对象，避免重复保存同样的字符串"""
+    return name if key == name else key
+
+
+# 类型描述表：各 Listing 只保存下标
+_type_names = []
+_type_ids = {}
+_type_lock = threading.Lock()
+
+
+def _type_id(type_name):
+    type_id = _type_ids.get(type_name)
+    if type_id is None:
+        with _type_lock:
+            type_id = _type_ids.get(type_name)
+            if type_id is None:
+                type_id = len(_type_names)
+                _type_names.append(type_name)
+                _type_ids[type_name] = type_id
+    return type_id
+
+
+# flags 列中的位
+FLAG_DIR = 1
+FLAG_SIZE_KNOWN = 2  # 目录的总大小已计算
+
+# 可用于 sorted_indices 的列
+SORT_COLUMNS = ("name", "natural", "type", "size", "modified")
+
+
+class Listing:
+    """一个目录的列举结果，按列紧凑存储
+
+    - names: 名称（sys.intern 去重）
+    - sizes / mtimes / flags / type_ids: array 数值列
+    - name_keys / natural_keys: 构建时计算的排序键，与名称相同时共享同一字符串对象
+    完整路径、类型描述和显示用的格式化字符串都在访问时才生成。
+    """
+
+    def __init__(self, directory="", entries=()):
+        self.directory = directory
+        self.names = []
+        self.sizes = array("q")
+        self.mtimes = array("d")
+        self.flags = array("B")
+        self.type_ids = array("H")
+        self.name_keys = []
+        self.natural_keys = []
+        self._orders = {}  # 列 -> 升序下标列表（缓存）
+        self._positions = None  # 名称 -> 下标（增量更新时才建立）
+        self.extend(entries)
+
+    def append(self, name, is_dir, type_name, size, mtime):
+        """追加一项并计算它的排序键"""
+        name = sys.intern(name)
+        self.names.append(name)
+        self.sizes.append(size or 0)
+        self.mtimes.append(mtime)
+        self.flags.append(FLAG_DIR if is_dir else 0)
+        self.type_ids.append(_type_id(type_name))
+        name_key = _shared(name.casefold(), name)
+        self.name_keys.append(name_key)
+        self.natural_keys.append(_shared(natural_sort_key(name), name_key))
+
+    def extend(self, entries):
+        """追加 Entry 并计算它们的排序键"""
+        with metrics.phase("build"):
+            for entry in entries:
+                self.append(entry.name, entry.is_dir, entry.type_name, entry.size, entry.mtime)
+        self._orders.clear()
+        self._positions = None
+
+    def invalidate_orders(self):
+        """丢弃按列缓存的排序结果，下次 sorted_indices 重新排序"""
+        self._orders.clear()
+
+    def copy(self):
+        """返回可以独立修改的副本（名称和排序键对象共享，各列和已缓存的排序结果复制）
+
+        缓存和索引中的 Listing 由工作线程读取，界面要原地修改（按行应用变化、
+        记录文件夹大小）的是自己的副本。
+        """
+        other = Listing.__new__(Listing)
+        other.directory = self.directory
+        for column in ("names", "sizes", "mtimes", "flags", "type_ids", "name_keys", "natural_keys"):
+            setattr(other, column, getattr(self, column)[:])
+        other._orders = {column: order[:] for column, order in self._orders.items()}
+        other._positions = None
+        return other
+
+    def _sort_key(self, column):
+        """返回 下标 -> 指定列排序键 的函数"""
+        if column == "type":
+            type_keys = [type_name.casefold() for type_name in _type_names]
+            type_ids = self.type_ids
+            return lambda index: type_keys[type_ids[index]]
+        return {
+            "name": self.name_keys,
+            "natural": self.natural_keys,
+            "size": self.sizes,
+            "modified": self.mtimes,
+        }[column].__getitem__
+
+    def sorted_indices(self, column):
+        """返回按指定列升序排列的下标列表（只读，按列缓存）"""
+        order = self._orders.get(column)
+        if order is None:
+            # 下标用 array 保存，每项 8 字节，而不是每项一个 int 对象
+            with metrics.phase("sort"):
+                order = array("q", sorted(range(len(self.names)), key=self._sort_key(column)))
+            self._orders[column] = order
+        else:
+            metrics.count("sort.cached")
+        return order
+
+    def apply_changes(self, changes, allow_add=True):
+        """按 {名称: Entry 或 None（已删除）} 原地更新，已缓存的排序结果随之增量调整
+
+        allow_add=False 时忽略不在列表中的名称（用于搜索结果）。返回 (新增数, 删除数, 更新数)。
+        """
+        positions = self._position_table()
+        removed = sorted(positions[name] for name, entry in changes.items() if entry is None and name in positions)
+        updated = [(positions[name], entry) for name, entry in changes.items()
+                   if entry is not None and name in positions]
+        added = [entry for name, entry in changes.items()
+                 if entry is not None and name not in positions and allow_add]
+
+        # 更新：先从各排序结果中取出，修改后再按新的键插入
+        for index, entry in updated:
+            for order in self._orders.values():
+                order.remove(index)
+            self.sizes[index] = entry.size or 0
+            self.mtimes[index] = entry.mtime
+            self.flags[index] = FLAG_DIR if entry.is_dir else 0
+            self.type_ids[index] = _type_id(entry.type_name)
+        for column, order in self._orders.items():
+            key = self._sort_key(column)
+            for index, _ in updated:
+                bisect.insort(order, index, key=key)
+
+        # 删除：各列去掉对应项，排序结果中的下标依次前移
+        if removed:
+            removed_set = set(removed)
+            for column in ("names", "sizes", "mtimes", "flags", "type_ids", "name_keys", "natural_keys"):
+                values = getattr(self, column)
+                kept = [value for index, value in enumerate(values) if index not in removed_set]
+                setattr(self, column, array(values.typecode, kept) if isinstance(values, array) else kept)
+            for column, order in self._orders.items():
+                self._orders[column] = array("q", [index - bisect.bisect_left(removed, index)
+                                                   for index in order if index not in removed_set])
+
+        # 新增：追加到末尾并插入各排序结果
+        for entry in added:
+            self.append(entry.name, entry.is_dir, entry.type_name, entry.size, entry.mtime)
+        if added:
+            for column, order in self._orders.items():
+                key = self._sort_key(column)
+                for index in range(len(self.names) - len(added), len(self.names)):
+                    bisect.insort(order, index, key=key)
+
+        if removed or added:
+            self._positions = None
+        return len(added), len(removed), len(updated)
+
+    def filter_indices(self, query, order):
+        """返回 order 中名称包含 query（忽略大小写）的下标，保持 order 的顺序
+
+        使用构建时折叠好的 name_keys，不重新列举也不逐项转换大小写。
+        """
+        query = query.casefold()
+        name_keys = self.name_keys
+        with metrics.phase("filter"):
+            return array("q", [index for index in order if query in name_keys[index]])
+
+    def is_dir(self, index):
+        return bool(self.flags[index] & FLAG_DIR)
+
+    def _position_table(self):
+        """名称 -> 下标，按需建立，增删项目后重建"""
+        if self._positions is None:
+            self._positions = {name: index for index, name in enumerate(self.names)}
+        return self._positions
+
+    def index_of(self, name):
+        """名称对应的下标，不在列表中时返回 None"""
+        return self._position_table().get(name)
+
+    def set_dir_size(self, index, size):
+        """记录目录的总大小（文件夹大小计算的结果）"""
+        self.sizes[index] = size
+        self.flags[index] |= FLAG_SIZE_KNOWN
+        self._orders.pop("size", None)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        """按需生成 Entry 记录"""
+        name = self.names[index]
+        flags = self.flags[index]
+        # 未计算大小的目录 size 为 None
+        size = self.sizes[index] if flags & (FLAG_SIZE_KNOWN | FLAG_DIR) != FLAG_DIR else None
+        return Entry(name, os.path.join(self.directory, name), bool(flags & FLAG_DIR),
+                     _type_names[self.type_ids[index]], size, self.mtimes[index])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class ListingView:
+    """按给定下标顺序访问 Listing，不复制数据"""
+
+    def __init__(self, listing, order):
+        self.listing = listing
+        self.order = order
+
+    def item_key(self, index):
+        """显示位置 index 对应项的名称，用于在重新排序或重新列举后保留选中项"""
+        return self.listing.names[self.order[index]]
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, index):
+        return self.listing[self.order[index]]
+
+    def __iter__(self):
+        return (self.listing[i] for i in self.order)
@@ -0,0 +1,265 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import threading
+
+try:
+    import ctypes
+    import ctypes.util
+except ImportError:  # 精简的 Python 发行版可能没有 ctypes
+    ctypes = None
+
+from fs_listing import scan_directory, stat_entry
+
+"""
+目录变化监视
+- Linux 上通过 ctypes 调用 inotify，直接得到发生变化的文件名
+- 其他平台（或 inotify 不可用时）定时比较目录的 mtime，变化时重新列举并与上次的结果比较
+- 一段时间窗口内的事件合并后统一交付：{目录: {名称: Entry 或 None（已删除）}}，
+  无法确定具体变化（事件队列溢出、目录本身被删除）时目录对应的值为 None
+"""
+
+# 收到第一个事件后再等待多久合并后续事件（秒）
+COALESCE_WINDOW = 0.2
+# 轮询模式下检查目录 mtime 的间隔（秒）
+POLL_INTERVAL = 1.0
+# 等待事件的最长时间，也是响应取消和监视路径变化的间隔（秒）
+WAIT_TIMEOUT = 0.5
+
+# inotify 常量（linux/inotify.h）
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    """返回支持 inotify 的 libc，不可用时返回 None"""
+    if ctypes is None or not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class _InotifyBackend:
+    """inotify：每个被监视的目录一个 watch"""
+
+    name = "inotify"
+
+    def __init__(self, libc):
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.paths = {}  # 目录 -> wd
+        self.wds = {}  # wd -> 目录
+
+    def set_paths(self, paths):
+        for path in list(self.paths):
+            if path not in paths:
+                self.libc.inotify_rm_watch(self.fd, self.paths.pop(path))
+        for path in paths:
+            if path in self.paths:
+                continue
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                continue  # 目录不存在或无权限，不监视
+            self.paths[path] = wd
+            self.wds[wd] = path
+
+    def wait(self, timeout):
+        """等待事件，返回 [(目录, 名称或 None)]"""
+        try:
+            readable, _, _ = select.select([self.fd], [], [], timeout)
+        except InterruptedError:
+            return []
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        changes = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            raw_name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # 事件丢失：所有目录都需要完整刷新
+                changes.extend((path, None) for path in self.paths)
+                continue
+            path = self.wds.get(wd)
+            if path is None:
+                continue
+            if mask & IN_IGNORED:
+                self.wds.pop(wd, None)
+                if self.paths.get(path) == wd:
+                    del self.paths[path]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                changes.append((path, None))
+            elif raw_name:
+                changes.append((path, os.fsdecode(raw_name)))
+        return changes
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingBackend:
+    """轮询：比较目录 mtime，变化时重新列举并与上次的名称表比较"""
+
+    name = "polling"
+
+    def __init__(self):
+        self.snapshots = {}  # 目录 -> (mtime_ns, {名称: (是否目录, 大小, 修改时间)})
+        self.wake = threading.Event()
+        self.last_poll = time.monotonic()
+
+    @staticmethod
+    def _snapshot(path):
+        stats = os.stat(path)
+        entries = {entry.name: (entry.is_dir, entry.size, entry.mtime) for entry in scan_directory(path)}
+        return stats.st_mtime_ns, entries
+
+    def set_paths(self, paths):
+        for path in list(self.snapshots):
+            if path not in paths:
+                del self.snapshots[path]
+        for path in paths:
+            if path not in self.snapshots:
+                try:
+                    self.snapshots[path] = self._snapshot(path)
+                except OSError:
+                    pass  # 目录不存在或无权限，不监视
+
+    def wait(self, timeout):
+        woken = self.wake.wait(max(0.0, min(timeout, self.last_poll + POLL_INTERVAL - time.monotonic())))
+        self.wake.clear()
+        if not woken and time.monotonic() < self.last_poll + POLL_INTERVAL:
+            return []
+        self.last_poll = time.monotonic()
+        changes = []
+        for path, (mtime_ns, entries) in list(self.snapshots.items()):
+            try:
+                if os.stat(path).st_mtime_ns == mtime_ns:
+                    continue
+                snapshot = self._snapshot(path)
+            except OSError:
+                del self.snapshots[path]
+                changes.append((path, None))
+                continue
+            self.snapshots[path] = snapshot
+            new_entries = snapshot[1]
+            for name in entries.keys() | new_entries.keys():
+                if entries.get(name) != new_entries.get(name):
+                    changes.append((path, name))
+        return changes
+
+    def close(self):
+        pass
+
+
+class DirectoryWatcher:
+    """监视一组目录（不含子目录）的变化
+
+    run 作为常驻后台任务通过 TaskRunner.submit 运行；被监视的目录可以随时用 set_paths 修改。
+    """
+
+    def __init__(self, use_inotify=True):
+        self.use_inotify = use_inotify
+        self.backend_name = None
+        self._paths = set()
+        self._paths_changed = True
+        self._backend = None
+        self._lock = threading.Lock()
+
+    def set_paths(self, paths):
+        """设置被监视的目录"""
+        with self._lock:
+            self._paths = set(paths)
+            self._paths_changed = True
+
+    def check_now(self):
+        """轮询模式下立即检查一次（inotify 模式下事件本来就是即时的）"""
+        backend = self._backend
+        if isinstance(backend, _PollingBackend):
+            backend.wake.set()
+
+    def _create_backend(self):
+        libc = _load_libc() if self.use_inotify else None
+        if libc is not None:
+            try:
+                return _InotifyBackend(libc)
+            except OSError as e:
+                print(f"无法使用 inotify，改为轮询: {os.strerror(e.errno or errno.EINVAL)}")
+        return _PollingBackend()
+
+    def run(self, token=None, emit=None):
+        """常驻任务：合并 COALESCE_WINDOW 内的事件后通过 emit 交付，直到 token 被取消"""
+        backend = self._backend = self._create_backend()
+        self.backend_name = backend.name
+        pending = {}  # 目录 -> 名称集合，或 None 表示需要完整刷新
+        deadline = None
+        try:
+            while token is None or not token.cancelled:
+                with self._lock:
+                    paths = self._paths if self._paths_changed else None
+                    self._paths_changed = False
+                if paths is not None:
+                    backend.set_paths(paths)
+                    # 不再监视的目录不再交付
+                    pending = {path: names for path, names in pending.items() if path in paths}
+
+                timeout = WAIT_TIMEOUT if deadline is None else max(0.0, deadline - time.monotonic())
+                for path, name in backend.wait(timeout):
+                    if name is None:
+                        pending[path] = None
+                    elif pending.get(path, ()) is not None:
+                        pending.setdefault(path, set()).add(name)
+                    if deadline is None:
+                        deadline = time.monotonic() + COALESCE_WINDOW
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    deadline = None
+                    if pending and emit is not None:
+                        emit(self._resolve(pending))
+                    pending = {}
+        finally:
+            self._backend = None
+            backend.close()
+
+    @staticmethod
+    def _resolve(pending):
+        """把变化的名称转换成当前的 Entry（已不存在时为 None）"""
+        changes = {}
+        for path, names in pending.items():
+            if names is None:
+                changes[path] = None
+            else:
+                changes[path] = {name: stat_entry(path, name) for name in names}
+        return changes
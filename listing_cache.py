@@ -0,0 +1,158 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from fs_listing import Listing, list_directory_task
+from metrics import metrics
+
+"""
+目录列举缓存
+- 以目录路径为键，用目录自身的 st_mtime_ns / st_ino 校验是否过期
+- 按最近使用顺序（LRU）淘汰，可限制缓存目录数和估算内存
+- 线程安全：后台列举任务和 UI 线程都可以访问
+- 缓存中的 Listing 放入后不再修改；list_directory_cached 交给调用者的是副本，
+  界面原地修改副本时，工作线程不会读到修改了一半的数据
+"""
+
+# 列表中每个对象引用占用的字节数
+POINTER_SIZE = 8
+
+
+def estimate_size(listing):
+    """估算一个列举结果占用的内存（字节）"""
+    total = 0
+    for column in (listing.sizes, listing.mtimes, listing.flags, listing.type_ids):
+        total += column.buffer_info()[1] * column.itemsize
+    for name, name_key, natural_key in zip(listing.names, listing.name_keys, listing.natural_keys):
+        # 三个列表各一个引用；排序键与名称相同时共享对象，不重复计算
+        total += 3 * POINTER_SIZE + sys.getsizeof(name)
+        if name_key is not name:
+            total += sys.getsizeof(name_key)
+        if natural_key is not name_key:
+            total += sys.getsizeof(natural_key)
+    return total
+
+
+class ListingCache:
+    """按路径缓存目录列举结果"""
+
+    def __init__(self, max_entries=64, max_bytes=128 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._items = OrderedDict()  # 键 -> (mtime_ns, ino, listing, size)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def get(self, path, stats):
+        """stats 为目录当前的 os.stat 结果；命中且未过期时返回缓存的 Listing，否则返回 None"""
+        key = self._key(path)
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] == stats.st_mtime_ns and item[1] == stats.st_ino:
+                self._items.move_to_end(key)
+                self.hits += 1
+                metrics.count("listing_cache.hit")
+                return item[2]
+            if item is not None:
+                # 目录已变化，丢弃旧结果
+                self._remove(key)
+            self.misses += 1
+            metrics.count("listing_cache.miss")
+            return None
+
+    def put(self, path, stats, listing):
+        """缓存列举结果；stats 应在列举开始前获取，避免遗漏列举期间的变化"""
+        key = self._key(path)
+        size = estimate_size(listing)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            self._items[key] = (stats.st_mtime_ns, stats.st_ino, listing, size)
+            self.total_bytes += size
+            # 按 LRU 淘汰，直到满足数量和内存限制
+            while len(self._items) > self.max_entries or self.total_bytes > self.max_bytes:
+                oldest = next(iter(self._items))
+                self._remove(oldest)
+
+    def peek(self, path):
+        """不校验是否过期，返回缓存的 Listing（没有时返回 None），不计入命中统计"""
+        with self._lock:
+            item = self._items.get(self._key(path))
+            return item[2] if item is not None else None
+
+    def invalidate(self, path):
+        """使指定目录的缓存失效"""
+        with self._lock:
+            self._remove(self._key(path))
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.total_bytes = 0
+
+    def _remove(self, key):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.total_bytes -= item[3]
+
+    def __len__(self):
+        return len(self._items)
+
+
+def list_directory_cached(cache, path, index=None, batch_size=1000, token=None, emit=None):
+    """带缓存的后台列举任务，返回 (Listing, 来源)，来源为 "cache" / "index" / "disk"
+
+    1. 内存缓存或持久化索引（index）中有旧结果时，先通过 emit 交付 (listing, 项数, True)，
+       界面可以在访问目录之前就显示出来
+    2. stat 目录：内存缓存未过期时直接返回
+    3. 索引中的结果与目录一致时放入内存缓存并返回
+    4. 否则在工作线程中构建 Listing（包括排序键），每批追加后通过 emit 交付
+       (listing, 已完成项数, False) 供界面实时显示，最后写入缓存和索引。
+       界面只读取已完成的前若干项，不会与工作线程冲突。
+    交付的旧结果和返回的 Listing 都是副本，调用者可以原地修改，缓存和索引中的不受影响。
+    """
+    snapshot = cache.peek(path)
+    indexed = None
+    if snapshot is None and index is not None:
+        try:
+            indexed = index.load_listing(path)
+        except Exception as e:
+            print(f"读取索引失败: {str(e)}")
+        if indexed is not None:
+            snapshot = indexed[0]
+    if snapshot is not None:
+        emit((snapshot.copy(), len(snapshot), True))
+
+    stats = os.stat(path)
+    listing = cache.get(path, stats)
+    if listing is not None:
+        return listing.copy(), "cache"
+    if indexed is not None and indexed[1] == stats.st_mtime_ns and indexed[2] == stats.st_ino:
+        cache.put(path, stats, indexed[0])
+        return indexed[0].copy(), "index"
+
+    listing = Listing(path)
+
+    def collect(batch):
+        listing.extend(batch)
+        emit((listing, len(listing), False))
+
+    list_directory_task(path, batch_size=batch_size, token=token, emit=collect)
+    if token is None or not token.cancelled:
+        cache.put(path, stats, listing)
+        if index is not None:
+            try:
+                index.save_listing(path, stats, listing)
+            except Exception as e:
+                print(f"写入索引失败: {str(e)}")
+        return listing.copy(), "disk"
+    return listing, "disk"
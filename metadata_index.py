@@ -0,0 +1,170 @@
+import os
+import threading
+import time
+
+try:
+    import sqlite3
+except ImportError:  # 精简的 Python 发行版可能没有 sqlite3
+    sqlite3 = None
+
+from fs_listing import FLAG_DIR, Listing, get_type_name, list_directory_task, scan_directory
+
+"""
+持久化元数据索引
+- 用本地 SQLite 文件记录访问过的目录和收藏夹目录树的列举结果（名称、类型、大小、修改时间）
+- 以目录自身的 mtime/inode 判断是否需要重新列举，增量更新
+- 启动后可以先用索引中的结果显示，再在后台校验
+- 每个线程使用独立的连接（WAL 模式），读取不会被后台写入阻塞
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    dir_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    flags INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_dir ON entries (dir_id);
+"""
+
+
+class MetadataIndex:
+    """目录列举结果的 SQLite 索引"""
+
+    def __init__(self, db_path, max_dirs=20000):
+        if sqlite3 is None:
+            raise RuntimeError("当前 Python 不支持 sqlite3")
+        self.db_path = db_path
+        self.max_dirs = max_dirs
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def load_listing(self, path):
+        """读取索引中的列举结果，返回 (Listing, mtime_ns, ino)；没有记录时返回 None"""
+        conn = self._conn()
+        row = conn.execute("SELECT id, mtime_ns, ino FROM dirs WHERE path = ?", (self._key(path),)).fetchone()
+        if row is None:
+            return None
+        dir_id, mtime_ns, ino = row
+        listing = Listing(path)
+        for name, flags, size, mtime in conn.execute(
+                "SELECT name, flags, size, mtime FROM entries WHERE dir_id = ? ORDER BY rowid", (dir_id,)):
+            is_dir = bool(flags & FLAG_DIR)
+            listing.append(name, is_dir, "文件夹" if is_dir else get_type_name(name), None if is_dir else size, mtime)
+        return listing, mtime_ns, ino
+
+    def subdir_names(self, path):
+        """返回索引中记录的子目录名称；没有记录时返回 None"""
+        conn = self._conn()
+        row = conn.execute("SELECT id FROM dirs WHERE path = ?", (self._key(path),)).fetchone()
+        if row is None:
+            return None
+        return [name for (name,) in conn.execute(
+            "SELECT name FROM entries WHERE dir_id = ? AND flags & ? ORDER BY rowid", (row[0], FLAG_DIR))]
+
+    def is_fresh(self, path, stats):
+        """索引中的记录与目录当前的 mtime/inode 一致时返回 True"""
+        row = self._conn().execute("SELECT mtime_ns, ino FROM dirs WHERE path = ?", (self._key(path),)).fetchone()
+        return row is not None and row[0] == stats.st_mtime_ns and row[1] == stats.st_ino
+
+    def save_listing(self, path, stats, listing):
+        """写入（替换）一个目录的列举结果；stats 应在列举开始前获取"""
+        conn = self._conn()
+        key = self._key(path)
+        with conn:
+            conn.execute(
+                "INSERT INTO dirs (path, mtime_ns, ino, indexed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET mtime_ns = excluded.mtime_ns, ino = excluded.ino, "
+                "indexed_at = excluded.indexed_at",
+                (key, stats.st_mtime_ns, stats.st_ino, time.time()))
+            dir_id = conn.execute("SELECT id FROM dirs WHERE path = ?", (key,)).fetchone()[0]
+            conn.execute("DELETE FROM entries WHERE dir_id = ?", (dir_id,))
+            # 文件夹大小计算的结果不写入索引，只记录是否为目录
+            conn.executemany(
+                "INSERT INTO entries (dir_id, name, flags, size, mtime) VALUES (?, ?, ?, ?, ?)",
+                ((dir_id, name, flags & FLAG_DIR, size, mtime) for name, flags, size, mtime in
+                 zip(listing.names, listing.flags, listing.sizes, listing.mtimes)))
+        self._prune()
+
+    def _prune(self):
+        """目录数超过上限时删除最早写入的记录"""
+        conn = self._conn()
+        count = conn.execute("SELECT COUNT(*) FROM dirs").fetchone()[0]
+        if count <= self.max_dirs:
+            return
+        with conn:
+            old_ids = [row[0] for row in conn.execute(
+                "SELECT id FROM dirs ORDER BY indexed_at LIMIT ?", (count - self.max_dirs,))]
+            conn.executemany("DELETE FROM entries WHERE dir_id = ?", ((i,) for i in old_ids))
+            conn.executemany("DELETE FROM dirs WHERE id = ?", ((i,) for i in old_ids))
+
+    def reconcile(self, roots, max_depth=2, token=None, emit=None):
+        """后台校验任务：逐层比较 roots 下各目录的 mtime，只重新列举有变化的目录
+
+        返回 (检查的目录数, 重新列举的目录数)。
+        """
+        checked = 0
+        rescanned = 0
+        level = [(root, 0) for root in roots]
+        while level:
+            next_level = []
+            for path, depth in level:
+                if token is not None and token.cancelled:
+                    return checked, rescanned
+                try:
+                    stats = os.stat(path)
+                    checked += 1
+                    if self.is_fresh(path, stats):
+                        subdirs = self.subdir_names(path) or []
+                    else:
+                        listing = Listing(path, scan_directory(path))
+                        self.save_listing(path, stats, listing)
+                        rescanned += 1
+                        subdirs = [listing.names[i] for i in range(len(listing)) if listing.is_dir(i)]
+                except OSError:
+                    continue  # 无法访问的目录跳过
+                if depth < max_depth:
+                    next_level.extend((os.path.join(path, name), depth + 1) for name in subdirs)
+            level = next_level
+        return checked, rescanned
+
+
+def list_subdirs_task(path, index=None, token=None, emit=None):
+    """导航树展开节点的后台任务：先交付索引中的子目录 ("index", 名称列表)，
+    再逐批交付列举结果 ("disk", Entry 列表)，返回子目录数
+
+    索引查询也在工作线程中进行，冷启动或被锁住的数据库不会阻塞界面。
+    """
+    if index is not None:
+        try:
+            indexed_names = index.subdir_names(path)
+        except Exception as e:
+            print(f"读取索引失败: {str(e)}")
+        else:
+            if indexed_names is not None:
+                emit(("index", indexed_names))
+    # 导航树只需要子目录，不需要 stat 数据
+    return list_directory_task(path, True, False, token=token, emit=lambda batch: emit(("disk", batch)))
@@ -0,0 +1,133 @@
+import os
+import time
+import threading
+from collections import deque
+
+"""
+性能指标
+- 按阶段累计耗时（enumerate、stat、classify、sort、render 等）和计数（系统调用、缓存命中、插入的行数等）
+- 运行时开关：关闭时 phase 返回共享的空上下文管理器，count/record/log 第一句就返回，几乎没有开销；
+  逐项循环中的计时只在开始时读取一次 enabled
+- 调试日志取代界面热路径中的 print：保存在内存中的滚动缓冲区，可以同时写入滚动日志文件
+- 环境变量 EXPLORER_METRICS=1 时启动即开启
+"""
+
+# 内存中保留的日志行数
+LOG_LINES = 500
+# 滚动日志文件：单个文件的大小上限和保留的旧文件数
+LOG_FILE = os.path.join(os.path.expanduser("~"), ".resource_explorer_metrics.log")
+LOG_FILE_BYTES = 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+
+class _NullPhase:
+    """关闭时使用的空上下文管理器"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """阶段耗时和计数器；各方法可以在任意线程中调用"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = {}  # 名称 -> [次数, 总秒数, 最近一次, 最大值]
+        self.counters = {}  # 名称 -> 计数
+        self.lines = deque(maxlen=LOG_LINES)
+        self._logger = None
+        self._lock = threading.Lock()
+
+    def phase(self, name):
+        """计时上下文：with metrics.phase("sort"): ..."""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def record(self, name, seconds, count=1):
+        """记录一段已经测得的耗时（count 为这段时间内完成的次数）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            phase = self.phases.get(name)
+            if phase is None:
+                phase = self.phases[name] = [0, 0.0, 0.0, 0.0]
+            phase[0] += count
+            phase[1] += seconds
+            phase[2] = seconds
+            phase[3] = max(phase[3], seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def log(self, message):
+        """记录一行调试信息（关闭时丢弃）"""
+        if not self.enabled:
+            return
+        line = f"{time.strftime('%H:%M:%S')} {message}"
+        with self._lock:
+            self.lines.append(line)
+            logger = self._logger
+        if logger is not None:
+            logger.info(line)
+
+    def snapshot(self):
+        """返回 (阶段 {名称: (次数, 总秒数, 最近一次, 最大值)}, 计数器, 日志行) 的副本"""
+        with self._lock:
+            return ({name: tuple(values) for name, values in self.phases.items()},
+                    dict(self.counters), list(self.lines))
+
+    def reset(self):
+        with self._lock:
+            self.phases.clear()
+            self.counters.clear()
+            self.lines.clear()
+
+    def set_log_file(self, path=LOG_FILE):
+        """把调试日志同时写入滚动日志文件；path 为 None 时停止写入"""
+        with self._lock:
+            old = self._logger
+            self._logger = None
+        if old is not None:
+            for handler in list(old.handlers):
+                old.removeHandler(handler)
+                handler.close()
+        if path is None:
+            return
+        import logging.handlers  # 只在写入日志文件时才需要，不拖慢启动
+        logger = logging.getLogger("resource_explorer.metrics")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=LOG_FILE_BYTES,
+                                                       backupCount=LOG_FILE_BACKUPS, encoding="utf-8")
+        logger.addHandler(handler)
+        with self._lock:
+            self._logger = logger
+
+
+# 全局实例：各模块直接导入使用
+metrics = Metrics(enabled=os.environ.get("EXPLORER_METRICS") == "1")
@@ -1,32 +1,79 @@
 import os
 import sys
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from tkinter import ttk, messagebox
 from tkinter.scrolledtext import ScrolledText
-import webbrowser
-import subprocess
-from pathlib import Path
-import mimetypes
 import time
 import json
-import os
+import re
+
+from file_search import Matcher, SearchIndexCache, search_files
+from explorer_core import format_size, format_time, sort_order
+from file_delete import DeleteJob
+from file_preview import PreviewCache, THUMBNAIL_SIZE, load_preview
+from file_transfer import TransferJob, format_duration
+from file_types import classify, load_file_types
+from fs_listing import Listing, ListingView, stat_entry
+from fs_watcher import DirectoryWatcher
+from folder_size import FolderSizeCalculator
+from metadata_index import MetadataIndex, list_subdirs_task
+from metrics import LOG_FILE, metrics
+from listing_cache import ListingCache, list_directory_cached
+from task_runner import TaskRunner
+from virtual_view import VirtualTreeview
+from volumes import VolumeCache
 
 # 定义一些简单的图标字符
 FOLDER_ICON = "📁"
-FILE_ICON = "📄"
 DRIVE_ICON = "💾"
-# 特定文件类型的图标
-DOC_ICON = "📝"
-IMAGE_ICON = "🖼️"
-AUDIO_ICON = "🔊"
-VIDEO_ICON = "🎬"
-EXE_ICON = "⚙️"
+# 文件的图标由分类表决定（见 file_types）
 # 收藏夹图标
 FAVORITES_ICON = "⭐"
 
+# 目录列举缓存上限：缓存的目录数和估算内存
+LISTING_CACHE_MAX_DIRS = 64
+LISTING_CACHE_MAX_MB = 128
+
+# 导航树中尚未加载的子目录占位文本
+NAV_PLACEHOLDER_TEXT = "加载中..."
+
+# 是否启用持久化元数据索引，以及启动时校验收藏夹目录树的深度
+METADATA_INDEX_ENABLED = True
+FAVORITES_INDEX_DEPTH = 2
+
+# 筛选框输入停止多久后才筛选（毫秒）
+FILTER_DEBOUNCE_MS = 150
+
+# 选中项停止变化多久后才加载预览（毫秒），快速滚动时不为每一项都读取文件
+PREVIEW_DEBOUNCE_MS = 100
+
+# 性能指标面板的刷新间隔（毫秒）
+METRICS_REFRESH_MS = 500
+
+# 启动到首次绘制的目标时间（毫秒），超过时在控制台提示
+STARTUP_TARGET_MS = 200
+
+# 文件名搜索模式及其显示名称
+SEARCH_MODES = [("substring", "包含"), ("glob", "通配符"), ("regex", "正则")]
+
+# 可排序的列及其标题
+SORT_COLUMNS = [("name", "名称"), ("type", "类型"), ("size", "大小"), ("modified", "修改日期")]
+
+
+def same_path(a, b):
+    """两个路径是否指向同一位置（忽略末尾的分隔符和 Windows 上的大小写）"""
+    return os.path.normcase(os.path.normpath(a)) == os.path.normcase(os.path.normpath(b))
+
+
 class ResourceExplorer:
-    def __init__(self, root):
-        """初始化资源管理器"""
+    def __init__(self, root, started=None, on_ready=None):
+        """初始化资源管理器
+
+        started 为启动计时的起点（time.perf_counter()，默认为此刻）；
+        on_ready(app) 在窗口首次绘制完成后调用。
+        """
+        self.started = started if started is not None else time.perf_counter()
+        self.on_ready = on_ready
         self.root = root
         self.root.title("资源管理器")
         self.root.geometry("1000x600")
@@ -55,19 +102,65 @@ class ResourceExplorer:
         self.content_frame = ttk.LabelFrame(self.paned_window, text="内容")
         self.paned_window.add(self.content_frame, weight=3)  # 初始宽度比例设为3
         
+        # 右侧预览面板：可以在工具栏中关闭
+        self.preview_frame = ttk.LabelFrame(self.paned_window, text="预览")
+        self.paned_window.add(self.preview_frame, weight=2)
+        
         # 状态栏
         self.status_var = tk.StringVar()
         self.status_var.set("就绪")
         self.status_bar = ttk.Label(root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
-        # 添加测试功能：启动时直接显示C盘根目录内容，用于验证路径处理
-        # 这将帮助诊断为什么点击驱动器时内容不显示
-        self.root.after(1000, self.test_drive_display)
+        # 复制任务进度条：有任务时显示在状态栏上方
+        self.transfer_bar = ttk.Frame(root)
+        self.transfer_var = tk.StringVar()
+        ttk.Label(self.transfer_bar, textvariable=self.transfer_var, anchor=tk.W).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.transfer_cancel_btn = ttk.Button(self.transfer_bar, text="取消", command=self.cancel_transfer)
+        self.transfer_cancel_btn.pack(side=tk.RIGHT, padx=2)
+        self.transfer_pause_btn = ttk.Button(self.transfer_bar, text="暂停", command=self.toggle_transfer_pause)
+        self.transfer_pause_btn.pack(side=tk.RIGHT, padx=2)
         
         # 当前路径
         self.current_path = None
         
+        # 后台任务：目录列举等耗时操作在线程池中执行（其中一个线程常驻用于监视目录变化）
+        self.tasks = TaskRunner(max_workers=5)
+        self.listing_token = None  # 当前内容视图的列举任务
+        self.nav_tokens = {}  # 导航树节点 -> 子目录加载任务
+        
+        # 目录变化监视：当前目录和导航树中展开的目录有变化时按行更新，不再整体刷新
+        self.watcher = DirectoryWatcher()
+        self.watch_token = self.tasks.submit(self.watcher.run, on_batch=self.on_fs_changes)
+        
+        # 复制任务：单独的单线程队列，依次执行，不占用列举等任务的线程
+        self.transfers = TaskRunner(max_workers=1)
+        self.transfer_jobs = []  # [(TransferJob, CancelToken)]，第一个为正在执行的任务
+        self.pending_destinations = set()  # 排队中任务的目标路径，避免重名
+        
+        # 删除的清理阶段：单独的单线程队列，撤销期限内的等待不占用其他任务的线程
+        self.purges = TaskRunner(max_workers=1)
+        self.delete_jobs = []  # [(DeleteJob, CancelToken)]，尚未清理完的删除
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # 卷信息缓存：容量等按 TTL 缓存，导航时只读缓存
+        self.volumes = VolumeCache()
+        
+        # 目录列举缓存：目录未变化（mtime/inode 相同）时直接使用上次的结果
+        self.listing_cache = ListingCache(LISTING_CACHE_MAX_DIRS, LISTING_CACHE_MAX_MB * 1024 * 1024)
+        
+        # 持久化元数据索引：窗口显示后再打开（见 finish_startup）
+        self.metadata_index = None
+        
+        # 文件夹大小计算：按目录记忆结果，重新进入父目录时复用子目录的统计
+        self.folder_sizes = FolderSizeCalculator()
+        self.folder_size_token = None
+        self.folder_size_progress = {}  # 目录路径 -> 计算中的部分大小
+        
+        # 文件名搜索：遍历时建立的三元组索引按根目录保留一段时间，重复搜索不再遍历
+        self.search_index = SearchIndexCache()
+        self.root.after(30, self.poll_tasks)
+        
         # 收藏夹相关
         self.favorites = []
         self.favorites_file = os.path.join(os.path.expanduser("~"), ".resource_explorer_favorites.json")
@@ -76,14 +169,77 @@ class ResourceExplorer:
         # 加载收藏夹
         self.load_favorites()
         
+        # 建立文件类型分类表（内置表 + 用户配置文件）
+        load_file_types()
+        
         # 创建导航树
         self.create_navigation_tree()
         
         # 创建内容视图
         self.create_content_view()
         
+        # 创建预览面板
+        self.create_preview_pane()
+        
         # 初始化驱动器列表和收藏夹
         self.init_drives()
+        
+        # 首次绘制完成后再做不影响窗口显示的初始化
+        self.startup_time = None  # 启动到首次绘制的秒数
+        self.root.bind("<Map>", self.on_first_map, add="+")
+    
+    def on_first_map(self, event):
+        """窗口第一次映射：等待本轮绘制完成后记录首次绘制时间"""
+        if event.widget is not self.root or self.startup_time is not None:
+            return
+        self.startup_time = 0.0
+        self.root.after_idle(self.finish_startup)
+    
+    def finish_startup(self):
+        """首次绘制之后：报告启动耗时，打开元数据索引并在后台校验收藏夹"""
+        self.startup_time = time.perf_counter() - self.started
+        elapsed_ms = self.startup_time * 1000
+        metrics.record("first_paint", self.startup_time)
+        if metrics.enabled:
+            metrics.log(f"首次绘制: {elapsed_ms:.0f}ms（目标 {STARTUP_TARGET_MS}ms）")
+        self.status_var.set(f"就绪（启动 {elapsed_ms:.0f}ms）")
+        if elapsed_ms > STARTUP_TARGET_MS:
+            print(f"启动较慢: 首次绘制用时 {elapsed_ms:.0f}ms，目标 {STARTUP_TARGET_MS}ms")
+        
+        # 持久化元数据索引：保存在收藏夹文件旁边，启动后先用索引显示，再在后台校验
+        if METADATA_INDEX_ENABLED:
+            try:
+                index_file = os.path.join(os.path.expanduser("~"), ".resource_explorer_index.db")
+                self.metadata_index = MetadataIndex(index_file)
+            except Exception as e:
+                print(f"无法打开元数据索引: {str(e)}")
+        
+        # 在后台按目录 mtime 增量校验收藏夹目录树的索引
+        if self.metadata_index and self.favorites:
+            self.tasks.submit(
+                self.metadata_index.reconcile, list(self.favorites), FAVORITES_INDEX_DEPTH,
+                on_done=self.on_index_reconciled
+            )
+        
+        # 以 EXPLORER_METRICS=1 启动时已在记录：同时打开指标面板，与工具栏开关的状态一致
+        if self.metrics_var.get() and self.metrics_window is None:
+            self.toggle_metrics()
+        
+        if self.on_ready is not None:
+            self.on_ready(self)
+    
+    def on_index_reconciled(self, result):
+        """收藏夹索引校验完成"""
+        checked, rescanned = result
+        if metrics.enabled:
+            metrics.log(f"索引校验完成: 检查 {checked} 个目录，重新列举 {rescanned} 个")
+    
+    def poll_tasks(self):
+        """定时把后台任务的结果分发到 UI 线程"""
+        self.tasks.process_pending()
+        self.transfers.process_pending()
+        self.purges.process_pending()
+        self.root.after(30, self.poll_tasks)
     
     def create_navigation_tree(self):
         """创建导航树视图"""
@@ -98,6 +254,8 @@ class ResourceExplorer:
         
         # 绑定事件
         self.nav_tree.bind("<Double-1>", self.on_nav_item_double_click)
+        self.nav_tree.bind("<<TreeviewOpen>>", self.on_nav_item_open)
+        self.nav_tree.bind("<<TreeviewClose>>", self.on_nav_item_close)
         self.nav_tree.bind("<Button-1>", self.on_nav_item_click)
         # 绑定右键菜单事件
         self.nav_tree.bind("<Button-3>", self.show_nav_context_menu)
@@ -117,10 +275,32 @@ class ResourceExplorer:
         self.path_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         self.path_entry.bind("<Return>", self.navigate_to_path)
         
+        # 筛选框：按名称即时筛选当前列表，不重新列举目录
+        self.filter_var = tk.StringVar()
+        self.filter_after_id = None
+        self.filter_cache = None  # (显示顺序, 列举结果, 折叠后的条件, 筛选结果)
+        ttk.Label(self.toolbar_frame, text="筛选:").pack(side=tk.LEFT)
+        self.filter_entry = ttk.Entry(self.toolbar_frame, textvariable=self.filter_var, width=20)
+        self.filter_entry.pack(side=tk.LEFT, padx=5)
+        self.filter_entry.bind("<Escape>", lambda e: self.filter_var.set(""))
+        self.filter_var.trace_add("write", self.on_filter_changed)
+        
         # 刷新按钮
         self.refresh_btn = ttk.Button(self.toolbar_frame, text="刷新", command=self.refresh_content)
         self.refresh_btn.pack(side=tk.LEFT, padx=5)
         
+        # 自然排序开关（名称列中的数字按数值比较）
+        self.natural_sort_var = tk.BooleanVar(value=True)
+        self.natural_sort_btn = ttk.Checkbutton(self.toolbar_frame, text="自然排序", variable=self.natural_sort_var,
+                                                command=lambda: self.sort_by_column(self.sort_column, force=True))
+        self.natural_sort_btn.pack(side=tk.LEFT, padx=5)
+        
+        # 文件夹大小计算开关
+        self.folder_size_var = tk.BooleanVar(value=False)
+        self.folder_size_btn = ttk.Checkbutton(self.toolbar_frame, text="计算文件夹大小", variable=self.folder_size_var,
+                                               command=self.toggle_folder_sizes)
+        self.folder_size_btn.pack(side=tk.LEFT, padx=5)
+        
         # 视图切换按钮
         self.view_var = tk.StringVar(value="list")
         self.list_view_btn = ttk.Radiobutton(self.toolbar_frame, text="列表", variable=self.view_var, value="list", command=self.switch_view)
@@ -128,6 +308,33 @@ class ResourceExplorer:
         self.details_view_btn = ttk.Radiobutton(self.toolbar_frame, text="详情", variable=self.view_var, value="details", command=self.switch_view)
         self.details_view_btn.pack(side=tk.LEFT, padx=5)
         
+        # 预览面板开关
+        self.preview_var = tk.BooleanVar(value=True)
+        self.preview_btn = ttk.Checkbutton(self.toolbar_frame, text="预览", variable=self.preview_var,
+                                           command=self.toggle_preview)
+        self.preview_btn.pack(side=tk.LEFT, padx=5)
+        
+        # 性能指标面板开关（关闭面板时停止记录）
+        self.metrics_var = tk.BooleanVar(value=metrics.enabled)
+        self.metrics_btn = ttk.Checkbutton(self.toolbar_frame, text="指标", variable=self.metrics_var,
+                                           command=self.toggle_metrics)
+        self.metrics_btn.pack(side=tk.LEFT, padx=5)
+        self.metrics_window = None
+        
+        # 搜索栏：在当前目录树中按文件名搜索
+        self.search_frame = ttk.Frame(self.content_frame)
+        self.search_frame.pack(side=tk.TOP, fill=tk.X, padx=5)
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(self.search_frame, textvariable=self.search_var, width=40)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.search_entry.bind("<Return>", self.run_search)
+        self.search_mode_var = tk.StringVar(value=SEARCH_MODES[0][1])
+        self.search_mode_box = ttk.Combobox(self.search_frame, textvariable=self.search_mode_var, width=8,
+                                            values=[label for _, label in SEARCH_MODES], state="readonly")
+        self.search_mode_box.pack(side=tk.LEFT, padx=5)
+        self.search_btn = ttk.Button(self.search_frame, text="搜索", command=self.run_search)
+        self.search_btn.pack(side=tk.LEFT, padx=5)
+        
         # 创建内容表格，添加图标列
         columns = ("icon", "name", "type", "size", "modified")
         self.content_tree = ttk.Treeview(self.content_frame, columns=columns, show="headings")
@@ -148,13 +355,18 @@ class ResourceExplorer:
         
         # 排序状态变量
         self.sort_column = "name"  # 默认按名称排序
-        self.sort_order = "ascending"  # 默认升序
-        self.items_data = []  # 存储项目数据，用于排序
+        self.sort_order = False  # 默认升序（True 表示降序）
+        self.items_data = Listing()  # 当前目录的列举结果（含预先计算的排序键）
+        self.display_order = []  # 当前显示顺序（items_data 的下标，只读）
+        self.listing_complete = True  # items_data 是否为完整的列举结果（加载中为 False）
+        self.showing_search = False  # items_data 是否为搜索结果（名称为相对搜索根目录的路径）
         
         # 添加滚动条
-        yscrollbar = ttk.Scrollbar(self.content_frame, orient="vertical", command=self.content_tree.yview)
-        self.content_tree.configure(yscrollcommand=yscrollbar.set)
+        # 纵向滚动由虚拟列表接管：表格中只保留可见范围内的行
+        yscrollbar = ttk.Scrollbar(self.content_frame, orient="vertical")
         yscrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.content_view = VirtualTreeview(self.content_tree, yscrollbar, self.content_row_values)
+        self.content_view.on_select = self.schedule_preview
         
         xscrollbar = ttk.Scrollbar(self.content_frame, orient="horizontal", command=self.content_tree.xview)
         self.content_tree.configure(xscrollcommand=xscrollbar.set)
@@ -163,6 +375,7 @@ class ResourceExplorer:
         # 绑定事件
         self.content_tree.bind("<Double-1>", self.on_content_item_double_click)
         self.content_tree.bind("<Button-3>", self.show_context_menu)
+        self.content_tree.bind("<Control-z>", self.undo_delete)
         
         self.content_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
@@ -184,31 +397,12 @@ class ResourceExplorer:
         self.context_menu.add_command(label="删除", command=self.delete_item)
         
         # 剪贴板操作变量
-        self.copied_item = None
+        self.copied_items = []  # 复制或剪切的路径
         self.is_cut = False
         
         # 创建导航树右键菜单
         self.nav_context_menu = tk.Menu(self.root, tearoff=0)
     
-    def get_file_icon(self, file_path):
-        """根据文件类型返回对应的图标"""
-        # 首先获取文件扩展名
-        _, ext = os.path.splitext(file_path.lower())
-        
-        # 根据扩展名返回对应的图标
-        if ext in ['.txt', '.doc', '.docx', '.pdf', '.md', '.rtf']:
-            return DOC_ICON
-        elif ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg']:
-            return IMAGE_ICON
-        elif ext in ['.mp3', '.wav', '.flac', '.aac', '.ogg']:
-            return AUDIO_ICON
-        elif ext in ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv']:
-            return VIDEO_ICON
-        elif ext in ['.exe', '.bat', '.cmd', '.msi']:
-            return EXE_ICON
-        else:
-            return FILE_ICON
-    
     def load_favorites(self):
         """加载收藏夹列表"""
         try:
@@ -227,23 +421,23 @@ class ResourceExplorer:
         except Exception as e:
             messagebox.showerror("错误", f"保存收藏夹失败: {str(e)}")
     
-    def add_to_favorites(self, path):
-        """添加目录到收藏夹"""
-        if path not in self.favorites:
-            self.favorites.append(path)
+    def add_to_favorites(self, *paths):
+        """添加目录到收藏夹，返回新添加的数量（全部添加后只保存一次）"""
+        added = [path for path in dict.fromkeys(paths) if path not in self.favorites]
+        if added:
+            self.favorites.extend(added)
             self.save_favorites()
             self.update_favorites_view()
-            return True
-        return False
+        return len(added)
     
-    def remove_from_favorites(self, path):
-        """从收藏夹移除目录"""
-        if path in self.favorites:
-            self.favorites.remove(path)
+    def remove_from_favorites(self, *paths):
+        """从收藏夹移除目录，返回移除的数量"""
+        removed = [path for path in dict.fromkeys(paths) if path in self.favorites]
+        if removed:
+            self.favorites = [path for path in self.favorites if path not in removed]
             self.save_favorites()
             self.update_favorites_view()
-            return True
-        return False
+        return len(removed)
     
     def update_favorites_view(self):
         """更新收藏夹视图"""
@@ -256,7 +450,7 @@ class ResourceExplorer:
             # 添加收藏夹项目
             for path in self.favorites:
                 folder_name = os.path.basename(path)
-                self.nav_tree.insert(self.favorites_id, tk.END, text=FOLDER_ICON + " " + folder_name, values=(path,))
+                self.add_nav_folder(self.favorites_id, folder_name, path)
     
     def init_drives(self):
         """初始化系统驱动器和收藏夹"""
@@ -271,38 +465,53 @@ class ResourceExplorer:
         self.nav_tree.insert("", tk.END, text="------------------------------------------", tags=("separator",))
         self.nav_tree.tag_configure("separator", foreground="gray", font=("Arial", 8))
         
-        # 获取Windows系统驱动器
-        if sys.platform == 'win32':
-            drives = []
-            for drive_letter in range(ord('A'), ord('Z') + 1):
-                drive = f"{chr(drive_letter)}:/"
-                if os.path.exists(drive):
-                    try:
-                        # 尝试获取驱动器类型
-                        subprocess_result = subprocess.run(
-                            ["fsutil", "fsinfo", "drivetype", drive],
-                            capture_output=True, text=True, shell=True
-                        )
-                        drive_type = subprocess_result.stdout.strip().split(":")[-1].strip()
-                        drives.append((drive, drive_type))
-                    except:
-                        drives.append((drive, "本地磁盘"))
-        else:
-            # 非Windows系统
-            drives = [("/", "根目录")]
+        # 卷探测放到后台线程，窗口先显示，驱动器随后补上；各卷并发探测，无响应的卷不拖慢其他卷
+        self.drive_nodes = {}  # 挂载点 -> 导航树节点
+        self.volume_token = None
+        self.refresh_volumes(force=True)
+    
+    def refresh_volumes(self, force=False):
+        """在后台重新探测卷（缓存未过期且不强制时直接使用缓存）"""
+        if self.volume_token is not None:
+            return  # 上一次探测尚未完成
         
-        # 添加驱动器到导航树
-        for drive, drive_type in drives:
-            drive_id = self.nav_tree.insert("", tk.END, text=DRIVE_ICON + " " + f"{drive} ({drive_type})")
-            # 预加载一级目录
-            try:
-                for item in os.listdir(drive):
-                    item_path = os.path.join(drive, item)
-                    if os.path.isdir(item_path):
-                        # 添加文件夹图标
-                        self.nav_tree.insert(drive_id, tk.END, text=FOLDER_ICON + " " + item, values=(item_path,))
-            except PermissionError:
-                pass
+        def on_done(volumes):
+            self.volume_token = None
+            self.add_drives(volumes)
+        
+        def on_error(e):
+            self.volume_token = None
+            print(f"探测驱动器失败: {str(e)}")
+        
+        self.volume_token = self.tasks.submit(self.volumes.discover, force, on_done=on_done, on_error=on_error)
+    
+    def volume_text(self, volume):
+        """导航树中卷的显示文本：挂载点、卷标、类型和可用空间"""
+        name = f"{volume.path} {volume.label}" if volume.label else volume.path
+        if volume.status == "timeout":
+            return f"{name} ({volume.kind}，无响应)"
+        if volume.total is None:
+            return f"{name} ({volume.kind})"
+        return f"{name} ({volume.kind}，{format_size(volume.free)} 可用，共 {format_size(volume.total)})"
+    
+    def add_drives(self, volumes):
+        """添加或更新导航树中的驱动器（已有节点只更新文本，不影响展开状态）"""
+        current = set()
+        for volume in volumes:
+            current.add(volume.path)
+            node = self.drive_nodes.get(volume.path)
+            if node is not None and self.nav_tree.exists(node):
+                self.nav_tree.item(node, text=DRIVE_ICON + " " + self.volume_text(volume))
+            else:
+                # 不再预加载一级目录，展开时才列举
+                self.drive_nodes[volume.path] = self.add_nav_folder("", self.volume_text(volume), volume.path,
+                                                                    icon=DRIVE_ICON)
+        # 已卸载的卷
+        for path in list(self.drive_nodes):
+            if path not in current:
+                node = self.drive_nodes.pop(path)
+                if self.nav_tree.exists(node):
+                    self.nav_tree.delete(node)
     
     def on_nav_item_double_click(self, event):
         """导航树双击事件处理"""
@@ -311,8 +520,8 @@ class ResourceExplorer:
             item_text = self.nav_tree.item(item, "text")
             item_values = self.nav_tree.item(item, "values")
             
-            # 处理分隔线
-            if "------------------------------------------" in item_text:
+            # 处理分隔线和占位子项
+            if "------------------------------------------" in item_text or self.is_nav_placeholder(item):
                 return
             
             # 处理收藏夹节点
@@ -349,8 +558,7 @@ class ResourceExplorer:
                 folder_name = item_text.split(" ")[-1]
                 path = os.path.join(parent_path, folder_name)
             
-            # 加载子目录
-            self.load_directory(path, item)
+            # 子目录由双击触发的展开事件（<<TreeviewOpen>>）按需加载
             
             # 显示目录内容
             self.show_directory_content(path)
@@ -363,35 +571,43 @@ class ResourceExplorer:
         try:
             # 获取点击位置的项目ID
             clicked_item = self.nav_tree.identify_row(event.y)
-            print(f"点击位置的项目ID: {clicked_item}")
+            if metrics.enabled:
+                metrics.log(f"点击位置的项目ID: {clicked_item}")
             
             if clicked_item:
                 # 选中点击的项目
                 self.nav_tree.selection_set(clicked_item)
-                print(f"已选中项目: {clicked_item}")
+                if metrics.enabled:
+                    metrics.log(f"已选中项目: {clicked_item}")
                 
                 # 使用已选中的项目进行后续处理
                 selected_items = self.nav_tree.selection()
                 if selected_items:
                     item = selected_items[0]
-                    print(f"最终使用的项目ID: {item}")
+                    if metrics.enabled:
+                        metrics.log(f"最终使用的项目ID: {item}")
                     
                     # 获取项目文本和值
                     item_text = self.nav_tree.item(item, "text")
                     item_values = self.nav_tree.item(item, "values")
                     
                     # 添加详细调试信息
-                    print(f"导航树点击事件: item_text = {item_text}")
-                    print(f"item_values = {item_values}")
+                    if metrics.enabled:
+                        metrics.log(f"导航树点击事件: item_text = {item_text}")
+                        metrics.log(f"item_values = {item_values}")
                     
                     # 处理分隔线
                     if "------------------------------------------" in item_text:
-                        print("跳过分隔线项目")
+                        metrics.log("跳过分隔线项目")
+                        return
+                    
+                    # 处理尚未加载的占位子项
+                    if self.is_nav_placeholder(item):
                         return
                     
                     # 处理收藏夹节点
                     if item == self.favorites_id:
-                        print("跳过收藏夹根节点")
+                        metrics.log("跳过收藏夹根节点")
                         return
                     
                     # 获取路径
@@ -400,13 +616,15 @@ class ResourceExplorer:
                     # 1. 首先检查是否有直接存储的路径值
                     if item_values and len(item_values) > 0:
                         path = item_values[0]
-                        print(f"从item_values获取路径: {path}")
+                        if metrics.enabled:
+                            metrics.log(f"从item_values获取路径: {path}")
                     # 2. 然后检查是否是驱动器项 - 优化的驱动器路径提取方法
                     elif len(item_text) >= 3 and item_text[1] == ":" and (item_text[2] == "/" or item_text[2] == "\\"):
                         # 提取驱动器路径，例如从 "💾 C:/ (本地磁盘)" 提取 "C:/"
                         drive_letter = item_text[1]  # 获取驱动器字母
                         path = f"{drive_letter}:\\"  # 使用Windows标准路径格式
-                        print(f"处理驱动器: 提取路径 = {path}")
+                        if metrics.enabled:
+                            metrics.log(f"处理驱动器: 提取路径 = {path}")
                     # 3. 检查是否包含驱动器字母和冒号（更通用的驱动器格式检测）
                     elif any(char + ":" in item_text for char in "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"):
                         # 查找驱动器字母和冒号组合
@@ -414,24 +632,27 @@ class ResourceExplorer:
                             if item_text[i].isalpha() and item_text[i+1] == ":":
                                 drive_letter = item_text[i].upper()
                                 path = f"{drive_letter}:\\"
-                                print(f"处理驱动器（通用格式）: 提取路径 = {path}")
+                                if metrics.enabled:
+                                    metrics.log(f"处理驱动器（通用格式）: 提取路径 = {path}")
                                 break
                     # 4. 最后尝试通过父节点构建路径
                     else:
                         # 尝试获取父节点路径
                         parent = self.nav_tree.parent(item)
                         if not parent:
-                            print("没有父节点，但尝试作为根目录处理")
+                            metrics.log("没有父节点，但尝试作为根目录处理")
                             # 尝试将当前项作为根目录处理（可能是特殊节点）
                             # 从item_text中提取名称
                             folder_name = item_text.split(" ")[-1]
                             # 尝试直接使用名称作为路径（针对特殊情况）
                             path = folder_name
-                            print(f"尝试作为根目录处理: 路径 = {path}")
+                            if metrics.enabled:
+                                metrics.log(f"尝试作为根目录处理: 路径 = {path}")
                         else:
                             parent_text = self.nav_tree.item(parent, "text")
                             parent_values = self.nav_tree.item(parent, "values")
-                            print(f"父节点文本: {parent_text}, 父节点值: {parent_values}")
+                            if metrics.enabled:
+                                metrics.log(f"父节点文本: {parent_text}, 父节点值: {parent_values}")
                              
                             parent_path = None
                             if parent_values and len(parent_values) > 0:
@@ -444,151 +665,413 @@ class ResourceExplorer:
                                 # 从item_text中提取文件夹名称（去除图标）
                                 folder_name = item_text.split(" ")[-1]
                                 path = os.path.join(parent_path, folder_name)
-                                print(f"处理文件夹: 构建路径 = {path}")
+                                if metrics.enabled:
+                                    metrics.log(f"处理文件夹: 构建路径 = {path}")
                             else:
-                                print("无法获取父节点路径")
+                                metrics.log("无法获取父节点路径")
                     
                     # 检查路径是否存在
                     if path:
-                        print(f"准备显示目录内容: {path}")
-                        print(f"路径存在: {os.path.exists(path)}")
-                        print(f"是目录: {os.path.isdir(path) if os.path.exists(path) else False}")
+                        if metrics.enabled:
+                            metrics.log(f"准备显示目录内容: {path}")
                         self.show_directory_content(path)
                 else:
-                    print("没有选中的项目")
+                    metrics.log("没有选中的项目")
             else:
-                print("未识别到点击的项目")
+                metrics.log("未识别到点击的项目")
         except Exception as e:
             print(f"导航树单击事件处理错误: {str(e)}")
             # 打印完整的错误堆栈
             import traceback
             traceback.print_exc()
     
+    def add_nav_folder(self, parent, name, path, icon=FOLDER_ICON):
+        """在导航树中添加文件夹节点，子目录在展开时才加载"""
+        node = self.nav_tree.insert(parent, tk.END, text=icon + " " + name, values=(path,))
+        # 占位子项让节点显示展开标记；是否真的有子目录等展开时一次 scandir 决定
+        self.nav_tree.insert(node, tk.END, text=NAV_PLACEHOLDER_TEXT, tags=("placeholder",))
+        return node
+    
+    def is_nav_placeholder(self, tree_item):
+        """判断导航树节点是否为占位子项"""
+        return "placeholder" in self.nav_tree.item(tree_item, "tags")
+    
+    def on_nav_item_open(self, event):
+        """导航树节点展开事件：首次展开时在后台加载子目录"""
+        item = self.nav_tree.focus()
+        if not item or item in self.nav_tokens:
+            return
+        children = self.nav_tree.get_children(item)
+        if len(children) == 1 and self.is_nav_placeholder(children[0]):
+            item_values = self.nav_tree.item(item, "values")
+            if item_values:
+                self.load_directory(item_values[0], item)
+        # 事件在节点展开之前产生，等展开后再更新监视的目录
+        self.root.after_idle(self.update_watched_paths)
+    
+    def on_nav_item_close(self, event):
+        """导航树节点折叠事件：不再监视该节点，下次展开时重新加载子目录"""
+        item = self.nav_tree.focus()
+        if item and self.nav_tree.item(item, "values"):
+            token = self.nav_tokens.pop(item, None)
+            if token:
+                token.cancel()
+            self.nav_tree.delete(*self.nav_tree.get_children(item))
+            self.nav_tree.insert(item, tk.END, text=NAV_PLACEHOLDER_TEXT, tags=("placeholder",))
+        self.root.after_idle(self.update_watched_paths)
+    
+    def open_nav_items(self):
+        """返回导航树中已展开的目录节点"""
+        items = []
+        stack = list(self.nav_tree.get_children(""))
+        while stack:
+            item = stack.pop()
+            if not self.nav_tree.item(item, "open"):
+                continue
+            if self.nav_tree.item(item, "values"):
+                items.append(item)
+            stack.extend(self.nav_tree.get_children(item))
+        return items
+    
+    def update_watched_paths(self):
+        """监视当前目录和导航树中已展开的目录"""
+        paths = {self.nav_tree.item(item, "values")[0] for item in self.open_nav_items()}
+        if self.current_path:
+            paths.add(self.current_path)
+        self.watcher.set_paths(paths)
+    
+    def on_fs_changes(self, changes):
+        """目录变化监视交付的变化：{目录: {名称: Entry 或 None（已删除）} 或 None（需要完整刷新）}"""
+        for directory, names in changes.items():
+            self.apply_content_changes(directory, names)
+            self.apply_nav_changes(directory, names)
+    
+    def apply_content_changes(self, directory, names):
+        """把一个目录的变化按行应用到内容视图"""
+        listing = self.items_data
+        if not self.listing_complete or not listing.directory:
+            return
+        if self.showing_search:
+            # 搜索结果：只更新或移除已显示的项
+            rel_dir = os.path.relpath(directory, listing.directory)
+            # 不在搜索根目录之下的变化忽略（名为 "..foo" 的子目录仍在根目录之下）
+            if names is None or rel_dir == os.pardir or rel_dir.startswith(os.pardir + os.sep):
+                return
+            changes = {}
+            for name, entry in names.items():
+                rel_path = name if rel_dir == os.curdir else os.path.join(rel_dir, name)
+                changes[rel_path] = entry._replace(name=rel_path) if entry else None
+        else:
+            if not same_path(directory, listing.directory):
+                return
+            if names is None:
+                self.refresh_content()
+                return
+            changes = names
+        # apply_changes 原地修改名称列和排序结果，当前视图随之失效：先按名称记下选中项
+        keys = self.content_view.selection_keys()
+        counts = listing.apply_changes(changes, allow_add=not self.showing_search)
+        if any(counts):
+            # 排序结果已增量调整，重新应用排序方向和筛选条件
+            self.filter_cache = None
+            self.display_order = sort_order(listing, self.sort_column, self.sort_order,
+                                            self.natural_sort_var.get())
+            self.update_content_items(keys)
+    
+    def apply_nav_changes(self, directory, names):
+        """把一个目录的变化应用到导航树中对应的已展开节点"""
+        for item in self.open_nav_items():
+            if item in self.nav_tokens:
+                continue  # 仍在加载，加载结果已包含变化
+            if not same_path(self.nav_tree.item(item, "values")[0], directory):
+                continue
+            if names is None:
+                self.load_directory(directory, item)
+                continue
+            children = {}
+            for child in self.nav_tree.get_children(item):
+                child_values = self.nav_tree.item(child, "values")
+                if child_values:
+                    children[os.path.basename(child_values[0])] = child
+            for name, entry in names.items():
+                if entry is not None and entry.is_dir:
+                    if name not in children:
+                        self.add_nav_folder(item, name, entry.path)
+                elif name in children:
+                    self.nav_tree.delete(children[name])
+    
     def load_directory(self, path, tree_item):
-        """加载目录内容到导航树"""
-        # 清除现有子项
-        children = self.nav_tree.get_children(tree_item)
-        for child in children:
-            self.nav_tree.delete(child)
+        """加载目录内容到导航树（在后台线程中列举子目录）"""
+        # 取消该节点上一次尚未完成的加载
+        token = self.nav_tokens.pop(tree_item, None)
+        if token:
+            token.cancel()
         
-        # 添加新子项
-        try:
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                if os.path.isdir(item_path):
-                    try:
-                        # 检查是否有权限访问
-                        os.scandir(item_path)
-                        # 添加文件夹图标
-                        self.nav_tree.insert(tree_item, tk.END, text=FOLDER_ICON + " " + item, values=(item_path,))
-                    except PermissionError:
-                        pass  # 无权限访问的目录跳过
-        except PermissionError:
-            messagebox.showerror("错误", f"无法访问 {path}: 权限被拒绝")
-        except Exception as e:
-            messagebox.showerror("错误", f"加载目录时出错: {str(e)}")
-    
-    def test_drive_display(self):
-        """测试方法：直接显示C盘根目录内容，用于验证路径处理是否正确"""
-        test_path = "C:\\"
-        print(f"测试显示驱动器内容: path = {test_path}")
-        print(f"测试路径存在: {os.path.exists(test_path)}")
-        print(f"测试路径是目录: {os.path.isdir(test_path)}")
+        # 清除现有子项，加载完成前保留一个占位子项
+        self.nav_tree.delete(*self.nav_tree.get_children(tree_item))
+        placeholder = self.nav_tree.insert(tree_item, tk.END, text=NAV_PLACEHOLDER_TEXT, tags=("placeholder",))
+        
+        # 索引中有记录时先显示索引中的子目录，列举完成后只在有变化时更新
+        indexed_names = None
+        listed = []
+        
+        def on_batch(progress):
+            nonlocal indexed_names
+            if not self.nav_tree.exists(tree_item):
+                return
+            source, entries = progress
+            if source == "index":
+                indexed_names = entries
+                if self.nav_tree.exists(placeholder):
+                    self.nav_tree.delete(placeholder)
+                for name in indexed_names:
+                    self.add_nav_folder(tree_item, name, os.path.join(path, name))
+                return
+            if indexed_names is not None:
+                listed.extend(entry.name for entry in entries)
+                return
+            for entry in entries:
+                # 子目录由 DirEntry 的类型信息确定，不再逐个 isdir/scandir 探测
+                self.add_nav_folder(tree_item, entry.name, entry.path)
+        
+        def finish():
+            self.nav_tokens.pop(tree_item, None)
+            if self.nav_tree.exists(placeholder):
+                self.nav_tree.delete(placeholder)
         
-        # 直接调用显示目录内容的方法
-        self.show_directory_content(test_path)
+        def on_done(count):
+            finish()
+            if indexed_names is not None and listed != indexed_names and self.nav_tree.exists(tree_item):
+                self.nav_tree.delete(*self.nav_tree.get_children(tree_item))
+                for name in listed:
+                    self.add_nav_folder(tree_item, name, os.path.join(path, name))
+        
+        def on_error(e):
+            finish()
+            if isinstance(e, PermissionError):
+                self.status_var.set(f"无法访问 {path}: 权限被拒绝")
+            else:
+                self.status_var.set(f"加载目录时出错: {str(e)}")
+        
+        self.nav_tokens[tree_item] = self.tasks.submit(
+            list_subdirs_task, path, self.metadata_index,
+            on_batch=on_batch, on_done=on_done, on_error=on_error
+        )
     
     def show_directory_content(self, path):
-        """显示目录内容"""
-        print(f"显示目录内容: path = {path}")
-        print(f"路径存在: {os.path.exists(path)}")
-        print(f"路径是目录: {os.path.isdir(path)}")
+        """显示目录内容（在后台线程中列举，分批显示）"""
+        if metrics.enabled:
+            metrics.log(f"显示目录内容: path = {path}")
+        
+        # 地址栏中输入的路径可能带有末尾的分隔符：统一规范化，与监视和操作得到的目录一致
+        path = os.path.normpath(path)
+        
+        # 取消上一个尚未完成的列举和文件夹大小计算
+        if self.listing_token:
+            self.listing_token.cancel()
+        self.cancel_folder_sizes()
+        if path != self.current_path:
+            self.clear_filter()  # 刷新当前目录时保留筛选条件
+            self.show_preview_message("")
         
         start_time = time.time()  # 开始计时
         
         # 保存当前路径
         self.current_path = path
+        self.showing_search = False
+        self.update_watched_paths()
         
         # 更新路径输入框
         self.path_var.set(path)
         
         # 清除现有内容
-        for item in self.content_tree.get_children():
-            self.content_tree.delete(item)
+        self.items_data = Listing()
+        self.display_order = []
+        self.listing_complete = False
+        # 加载过程中按到达顺序显示工作线程已完成的前 count 项
+        loading_view = ListingView(self.items_data, range(0))
+        self.content_view.set_items(loading_view)
+        self.status_var.set("正在加载...")
         
-        # 获取目录内容并显示
-        try:
-            items = []
-            # 先添加目录
-            for item in os.listdir(path):
-                # 跳过$RECYCLE.BIN目录
-                if item.upper() == "$RECYCLE.BIN":
-                    continue
-                
-                item_path = os.path.join(path, item)
-                if os.path.isdir(item_path):
-                    try:
-                        stats = os.stat(item_path)
-                        modified_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.st_mtime))
-                        # 存储原始大小用于排序
-                        items.append((item, "文件夹", "", modified_time, item_path, True, stats.st_mtime))
-                    except:
-                        pass  # 跳过无法访问的项目
-            
-            # 再添加文件
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                if os.path.isfile(item_path):
-                    try:
-                        stats = os.stat(item_path)
-                        file_size = self.format_size(stats.st_size)
-                        modified_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.st_mtime))
-                        
-                        # 获取文件类型
-                        mime_type, _ = mimetypes.guess_type(item_path)
-                        if mime_type:
-                            file_type = mime_type.split('/')[1].upper() + "文件"
-                        else:
-                            _, ext = os.path.splitext(item_path)
-                            if ext:
-                                file_type = ext[1:].upper() + "文件"
-                            else:
-                                file_type = "文件"
-                        
-                        # 存储原始大小和时间戳用于排序
-                        items.append((item, file_type, file_size, modified_time, item_path, False, stats.st_size, stats.st_mtime))
-                    except:
-                        pass  # 跳过无法访问的项目
-            
-            # 保存数据用于排序
-            self.items_data = items
-            
-            # 首次显示时按默认方式排序
-            self.sort_by_column(self.sort_column, force=True)
-            
-
+        def on_batch(progress):
+            listing, count, is_snapshot = progress
+            if is_snapshot:
+                # 缓存/索引中的旧结果：立即完整显示，后台继续校验
+                self.show_listing(listing)
+                self.status_var.set(f"显示 {count:,} 个项目（正在校验...）")
+            elif self.listing_complete:
+                # 已显示旧结果：重新列举完成前不替换
+                self.status_var.set(f"正在校验 {count:,} / ? 个项目")
+            else:
+                # 先按到达顺序显示，加载完成后再统一排序
+                loading_view.listing = listing
+                loading_view.order = range(count)
+                self.content_view.refresh()
+                self.status_var.set(f"正在加载 {count:,} / ? 个项目")
+        
+        def on_done(result):
+            self.listing_token = None
+            listing, source = result
+            if listing is not self.items_data or not self.listing_complete:
+                self.show_listing(listing)
             
             # 更新状态栏
             elapsed_time = time.time() - start_time
-            self.status_var.set(f"显示 {len(items)} 个项目 ({elapsed_time:.2f}s)")
+            cache = self.listing_cache
+            source_text = {"cache": "缓存", "index": "索引", "disk": "读取"}[source]
+            metrics.record("open_directory", elapsed_time)
+            if metrics.enabled:
+                metrics.log(f"打开目录 {path}: {len(self.items_data):,} 项, {elapsed_time * 1000:.1f}ms ({source_text})")
+            status = (
+                f"显示 {len(self.items_data):,} 个项目 ({elapsed_time:.2f}s, {source_text}) | "
+                f"缓存命中 {cache.hits} / 未命中 {cache.misses}"
+            )
+            # 可用空间取自卷缓存，不访问文件系统
+            volume = self.volumes.volume_for(path)
+            if volume is not None and volume.free is not None:
+                status += f" | 可用 {format_size(volume.free)}"
+            self.status_var.set(status)
             
-        except PermissionError:
-            messagebox.showerror("错误", f"无法访问 {path}: 权限被拒绝")
-            self.status_var.set("无法访问目录")
-        except Exception as e:
-            messagebox.showerror("错误", f"显示目录内容时出错: {str(e)}")
-            self.status_var.set("显示目录内容时出错")
-    
-    def format_size(self, size_bytes):
-        """格式化文件大小"""
-        if size_bytes < 1024:
-            return f"{size_bytes} B"
-        elif size_bytes < 1024 * 1024:
-            return f"{size_bytes / 1024:.2f} KB"
-        elif size_bytes < 1024 * 1024 * 1024:
-            return f"{size_bytes / (1024 * 1024):.2f} MB"
+            if self.folder_size_var.get():
+                self.start_folder_sizes()
+        
+        def on_error(e):
+            self.listing_token = None
+            if isinstance(e, PermissionError):
+                messagebox.showerror("错误", f"无法访问 {path}: 权限被拒绝")
+                self.status_var.set("无法访问目录")
+            else:
+                messagebox.showerror("错误", f"显示目录内容时出错: {str(e)}")
+                self.status_var.set("显示目录内容时出错")
+        
+        self.listing_token = self.tasks.submit(
+            list_directory_cached, self.listing_cache, path, self.metadata_index,
+            on_batch=on_batch, on_done=on_done, on_error=on_error
+        )
+    
+    def show_listing(self, listing):
+        """显示完整的列举或搜索结果，按当前排序方式排序"""
+        # 排序键已在工作线程中随结果一起计算好
+        self.items_data = listing
+        self.listing_complete = True
+        self.sort_by_column(self.sort_column, force=True)
+    
+    def run_search(self, event=None):
+        """在当前目录树中按文件名搜索，匹配项边找边显示"""
+        if not self.current_path:
+            return
+        query = self.search_var.get()
+        if not query:
+            # 清空搜索条件：回到目录列表
+            self.show_directory_content(self.current_path)
+            return
+        mode = dict((label, mode) for mode, label in SEARCH_MODES)[self.search_mode_var.get()]
+        try:
+            matcher = Matcher(query, mode)
+        except re.error as e:
+            messagebox.showerror("错误", f"无效的正则表达式: {str(e)}")
+            return
+        
+        # 搜索结果替换内容视图：取消正在进行的列举、搜索和文件夹大小计算
+        if self.listing_token:
+            self.listing_token.cancel()
+        self.cancel_folder_sizes()
+        self.clear_filter()
+        
+        start_time = time.time()
+        search_root = self.current_path
+        self.showing_search = True
+        self.items_data = Listing(search_root)
+        self.display_order = []
+        self.listing_complete = False
+        loading_view = ListingView(self.items_data, range(0))
+        self.content_view.set_items(loading_view)
+        self.status_var.set(f"正在搜索 \"{query}\"...")
+        
+        def on_batch(progress):
+            listing, count = progress
+            loading_view.listing = listing
+            loading_view.order = range(count)
+            self.content_view.refresh()
+            self.status_var.set(f"正在搜索 \"{query}\": 已找到 {count:,} 个")
+        
+        def on_done(result):
+            self.listing_token = None
+            listing, from_index = result
+            self.show_listing(listing)
+            elapsed_time = time.time() - start_time
+            source_text = "索引" if from_index else "遍历"
+            metrics.record("search", elapsed_time)
+            if metrics.enabled:
+                metrics.log(f"搜索 \"{query}\": {len(listing):,} 个匹配项, {elapsed_time * 1000:.1f}ms ({source_text})")
+            self.status_var.set(
+                f"在 {search_root} 中找到 {len(listing):,} 个匹配项 ({elapsed_time:.2f}s, {source_text})"
+            )
+        
+        def on_error(e):
+            self.listing_token = None
+            messagebox.showerror("错误", f"搜索时出错: {str(e)}")
+            self.status_var.set("搜索时出错")
+        
+        self.listing_token = self.tasks.submit(
+            search_files, search_root, matcher, self.search_index,
+            on_batch=on_batch, on_done=on_done, on_error=on_error
+        )
+    
+    def toggle_folder_sizes(self):
+        """切换文件夹大小计算模式"""
+        if self.folder_size_var.get():
+            if not self.listing_token:
+                self.start_folder_sizes()
         else:
-            return f"{size_bytes / (1024 * 1024 * 1024):.2f} GB"
+            self.cancel_folder_sizes()
+            self.content_view.refresh()
+    
+    def cancel_folder_sizes(self):
+        """取消正在进行的文件夹大小计算"""
+        if self.folder_size_token:
+            self.folder_size_token.cancel()
+            self.folder_size_token = None
+        self.folder_size_progress = {}
+    
+    def start_folder_sizes(self):
+        """在后台计算当前目录中各子文件夹的大小，部分结果实时显示"""
+        self.cancel_folder_sizes()
+        listing = self.items_data
+        roots = {}  # 目录路径 -> 名称（计算期间目录变化会使下标移动，结果按名称对应到行）
+        for index in range(len(listing)):
+            if listing.is_dir(index):
+                name = listing.names[index]
+                roots[os.path.join(listing.directory, name)] = name
+        if not roots:
+            return
+        
+        def on_batch(results):
+            done = 0
+            for path, (total, finished) in results.items():
+                if finished:
+                    index = listing.index_of(roots[path])
+                    if index is not None:  # 计算期间被删除的目录不再显示
+                        listing.set_dir_size(index, total)
+                    self.folder_size_progress.pop(path, None)
+                    done += 1
+                else:
+                    self.folder_size_progress[path] = total
+            self.content_view.refresh()
+            self.status_var.set(f"正在计算文件夹大小 {done:,} / {len(roots):,}")
+        
+        def on_done(results):
+            self.folder_size_token = None
+            on_batch(results)
+            # 按大小排序时用最终结果重新排序
+            if self.sort_column == "size":
+                self.sort_by_column(self.sort_column, force=True)
+            self.status_var.set(f"已计算 {len(roots):,} 个文件夹的大小")
+        
+        self.folder_size_token = self.tasks.submit(
+            self.folder_sizes.calculate, list(roots),
+            on_batch=on_batch, on_done=on_done
+        )
     
     def on_content_item_double_click(self, event):
         """内容项双击事件处理"""
@@ -597,15 +1080,12 @@ class ResourceExplorer:
     def open_selected_item(self):
         """打开选中的项目"""
         try:
-            selected_item = self.content_tree.selection()[0]
-            # 注意：现在第一列是图标，文件名在索引1的位置
-            item_name = self.content_tree.item(selected_item, "values")[1]
-            item_type = self.content_tree.item(selected_item, "values")[2]
+            entry = self.get_selected_entry()
             
             if self.current_path:
-                item_path = os.path.join(self.current_path, item_name)
+                item_path = entry.path
                 
-                if os.path.isdir(item_path):
+                if entry.is_dir:
                     # 打开目录
                     self.show_directory_content(item_path)
                     # 更新导航树选择
@@ -616,7 +1096,8 @@ class ResourceExplorer:
                         if sys.platform == 'win32':
                             os.startfile(item_path)
                         else:
-                            subprocess.run(['xdg-open', item_path])
+                            import subprocess  # 只在打开文件时才需要
+                            subprocess.Popen(['xdg-open', item_path])
                     except Exception as e:
                         messagebox.showerror("错误", f"无法打开文件: {str(e)}")
         except IndexError:
@@ -632,68 +1113,308 @@ class ResourceExplorer:
         
     def sort_by_column(self, col, force=False):
         """按指定列对内容进行排序"""
-        # 切换排序顺序（除非强制使用当前顺序）
-        if not force and col == self.sort_column:
+        if not self.listing_complete:
+            # 仍在加载：只记录排序方式，加载完成后统一排序；force（如切换自然排序）时不改变方向
+            if col == self.sort_column:
+                if not force:
+                    self.sort_order = not self.sort_order
+            else:
+                self.sort_column = col
+                self.sort_order = False
+        elif not force and col == self.sort_column:
+            # 只切换方向：直接反转当前顺序，不重新排序
             self.sort_order = not self.sort_order
+            self.display_order = self.display_order[::-1]
         else:
-            self.sort_column = col
-            self.sort_order = False  # 默认为升序
-        
-        # 定义排序键函数
-        def get_sort_key(item):
-            if col == 0:  # 名称列
-                return item[0].lower()
-            elif col == 1:  # 类型列
-                return item[1].lower()
-            elif col == 2:  # 大小列
-                if item[5]:  # 目录
-                    return 0  # 目录大小为0
-                else:
-                    return item[6]  # 文件大小
-            elif col == 3:  # 修改日期列
-                if item[5]:  # 目录
-                    return item[6]  # 目录时间戳
+            if col != self.sort_column:
+                self.sort_column = col
+                self.sort_order = False  # 默认为升序
+            # 使用预先计算的排序键，升序结果按列缓存；自然排序时 file2 排在 file10 前面
+            self.display_order = sort_order(self.items_data, self.sort_column, self.sort_order,
+                                            self.natural_sort_var.get())
+        
+        # 只重新绑定可见行，保留选中项
+        if self.listing_complete:
+            self.update_content_items()
+        
+        # 更新表头指示排序方向
+        for c, title in SORT_COLUMNS:
+            if c == self.sort_column:
+                symbol = "↑" if not self.sort_order else "↓"
+                header = f"{title}{symbol}"
+            else:
+                header = title
+            self.content_tree.heading(c, text=header, command=lambda _col=c: self.sort_by_column(_col))
+    
+    def create_preview_pane(self):
+        """创建预览面板：上方为文件信息，下方为图片或文本"""
+        self.preview_token = None  # 当前预览的加载任务
+        self.preview_after_id = None
+        self.preview_photo = None  # 保持 PhotoImage 的引用，否则图片会被回收
+        self.preview_cache = PreviewCache()
+        
+        self.preview_info_var = tk.StringVar()
+        ttk.Label(self.preview_frame, textvariable=self.preview_info_var, anchor=tk.W,
+                  wraplength=THUMBNAIL_SIZE[0]).pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
+        self.preview_image = ttk.Label(self.preview_frame, anchor=tk.CENTER)
+        self.preview_text = ScrolledText(self.preview_frame, wrap=tk.WORD, width=40, state=tk.DISABLED)
+    
+    def toggle_preview(self):
+        """显示或隐藏预览面板"""
+        if self.preview_var.get():
+            self.paned_window.add(self.preview_frame, weight=2)
+            self.update_preview()
+        else:
+            self.paned_window.forget(self.preview_frame)
+            self.show_preview_message("")
+    
+    def schedule_preview(self):
+        """选中项变化：停顿 PREVIEW_DEBOUNCE_MS 后再加载预览"""
+        if self.preview_after_id:
+            self.root.after_cancel(self.preview_after_id)
+        self.preview_after_id = self.root.after(PREVIEW_DEBOUNCE_MS, self.update_preview)
+    
+    def update_preview(self):
+        """在后台加载选中文件的预览（缓存中有同一版本文件的结果时不重新读取或解码）"""
+        self.preview_after_id = None
+        if self.preview_token:
+            self.preview_token.cancel()
+            self.preview_token = None
+        if not self.preview_var.get():
+            return
+        entries = self.get_selected_entries()
+        if len(entries) != 1:
+            self.show_preview_message(f"已选择 {len(entries):,} 个项目" if entries else "")
+            return
+        entry = entries[0]
+        if entry.is_dir:
+            self.show_preview_message(f"{entry.name}\n文件夹")
+            return
+        
+        def on_error(e):
+            self.show_preview_message(f"{entry.name}\n无法预览: {str(e)}")
+        
+        self.preview_token = self.tasks.submit(
+            load_preview, entry.path, self.preview_cache,
+            on_done=lambda preview: self.show_preview(entry, preview), on_error=on_error
+        )
+    
+    def show_preview_message(self, text):
+        """预览面板只显示一段说明文字"""
+        self.preview_info_var.set(text)
+        self.preview_image.pack_forget()
+        self.preview_text.pack_forget()
+        self.preview_photo = None
+    
+    def show_preview(self, entry, preview):
+        """显示后台加载的预览结果"""
+        info = f"{entry.name}\n{entry.type_name}，{format_size(entry.size)}"
+        if preview.kind == "text":
+            self.show_preview_message(info + ("\n（只显示开头部分）" if preview.truncated else ""))
+            self.preview_text.configure(state=tk.NORMAL)
+            self.preview_text.delete("1.0", tk.END)
+            self.preview_text.insert("1.0", preview.text)
+            self.preview_text.configure(state=tk.DISABLED)
+            self.preview_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        elif preview.kind == "image":
+            try:
+                photo = tk.PhotoImage(data=preview.data)
+                if not preview.scaled:
+                    # 没有 Pillow：Tk 解码原图后按整数倍缩小到缩略图尺寸以内
+                    width, height = photo.width(), photo.height()
+                    factor = max(-(-width // THUMBNAIL_SIZE[0]), -(-height // THUMBNAIL_SIZE[1]), 1)
+                    if factor > 1:
+                        photo = photo.subsample(factor)
+                    info += f"，{width} × {height}"
                 else:
-                    return item[7]  # 文件时间戳
-            return ''
+                    info += f"，{preview.width} × {preview.height}"
+            except tk.TclError as e:
+                self.show_preview_message(f"{info}\n无法显示图片: {str(e)}")
+                return
+            self.show_preview_message(info)
+            self.preview_photo = photo
+            self.preview_image.configure(image=photo)
+            self.preview_image.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        else:
+            self.show_preview_message(f"{info}\n{preview.message}")
+    
+    def toggle_metrics(self):
+        """打开或关闭性能指标面板；面板打开期间记录各阶段耗时和计数"""
+        if not self.metrics_var.get():
+            if self.metrics_window is not None:
+                self.metrics_window.destroy()
+            return
+        metrics.enabled = True
+        window = tk.Toplevel(self.root)
+        window.title("性能指标")
+        window.geometry("560x520")
+        window.protocol("WM_DELETE_WINDOW", lambda: (self.metrics_var.set(False), self.toggle_metrics()))
+        window.bind("<Destroy>", self.on_metrics_window_destroy)
         
-        # 对数据进行排序
-        sorted_items = sorted(self.items_data, key=get_sort_key, reverse=self.sort_order)
+        button_frame = ttk.Frame(window)
+        button_frame.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
+        ttk.Button(button_frame, text="重置", command=lambda: (metrics.reset(), self.refresh_metrics(False))).pack(side=tk.LEFT)
+        self.metrics_log_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame, text="写入日志文件", variable=self.metrics_log_var,
+                        command=self.toggle_metrics_log).pack(side=tk.LEFT, padx=10)
         
-        # 先清除当前显示的内容
-        for item in self.content_tree.get_children():
-            self.content_tree.delete(item)
+        columns = ("count", "total", "last", "max")
+        self.metrics_tree = ttk.Treeview(window, columns=columns, height=12)
+        self.metrics_tree.heading("#0", text="阶段 / 计数器")
+        for column, text in zip(columns, ("次数", "总计ms", "最近ms", "最大ms")):
+            self.metrics_tree.heading(column, text=text)
+            self.metrics_tree.column(column, width=80, anchor=tk.E)
+        self.metrics_tree.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5)
         
-        # 添加排序后的内容
-        for item in sorted_items:
-            if item[5]:  # 如果是目录
-                self.content_tree.insert("", tk.END, values=(FOLDER_ICON, item[0], item[1], item[2], item[3]))
-            else:  # 如果是文件
-                icon = self.get_file_icon(item[4])
-                self.content_tree.insert("", tk.END, values=(icon, item[0], item[1], item[2], item[3]))
+        self.metrics_log_text = ScrolledText(window, height=10, wrap=tk.NONE)
+        self.metrics_log_text.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.metrics_log_shown = None
+        self.metrics_window = window
+        self.refresh_metrics()
+    
+    def on_metrics_window_destroy(self, event):
+        """指标面板关闭：停止记录，开销回到几乎为零"""
+        if event.widget is not self.metrics_window:
+            return
+        self.metrics_window = None
+        metrics.enabled = False
+        metrics.set_log_file(None)
+        self.metrics_var.set(False)
+    
+    def toggle_metrics_log(self):
+        """开始或停止把调试日志写入滚动日志文件"""
+        try:
+            metrics.set_log_file(LOG_FILE if self.metrics_log_var.get() else None)
+        except OSError as e:
+            self.metrics_log_var.set(False)
+            messagebox.showerror("错误", f"无法写入日志文件: {str(e)}")
+    
+    def refresh_metrics(self, schedule=True):
+        """用当前指标刷新面板（打开期间每 METRICS_REFRESH_MS 毫秒一次）"""
+        if self.metrics_window is None:
+            return
+        phases, counters, lines = metrics.snapshot()
+        self.metrics_tree.delete(*self.metrics_tree.get_children())
+        for name, (count, total, last, longest) in sorted(phases.items()):
+            self.metrics_tree.insert("", tk.END, text=name, values=(
+                f"{count:,}", f"{total * 1000:.1f}", f"{last * 1000:.1f}", f"{longest * 1000:.1f}"
+            ))
+        for name, value in sorted(counters.items()):
+            self.metrics_tree.insert("", tk.END, text=name, values=(f"{value:,}", "", "", ""))
         
-        # 更新表头指示排序方向
-        for c in range(4):
-            if c == col:
-                symbol = "↑" if not self.sort_order else "↓"
-                header = f"{['名称', '类型', '大小', '修改日期'][c]}{symbol}"
+        # 日志只在有新行时重写，不打断查看
+        shown = (len(lines), lines[-1] if lines else None)
+        if shown != self.metrics_log_shown:
+            self.metrics_log_shown = shown
+            at_end = self.metrics_log_text.yview()[1] >= 1.0
+            self.metrics_log_text.delete("1.0", tk.END)
+            self.metrics_log_text.insert("1.0", "\n".join(lines))
+            if at_end:
+                self.metrics_log_text.see(tk.END)
+        if schedule:
+            self.metrics_window.after(METRICS_REFRESH_MS, self.refresh_metrics)
+    
+    def on_filter_changed(self, *args):
+        """筛选框内容变化：输入停顿后再筛选，连续输入只筛选一次"""
+        if self.filter_after_id:
+            self.root.after_cancel(self.filter_after_id)
+        self.filter_after_id = self.root.after(FILTER_DEBOUNCE_MS, self.apply_filter)
+    
+    def apply_filter(self):
+        """按筛选框的内容更新显示（加载中不筛选，加载完成后排序时一并处理）"""
+        self.filter_after_id = None
+        if not self.listing_complete:
+            return
+        shown = self.update_content_items()
+        if self.filter_var.get():
+            self.status_var.set(f"筛选: 显示 {shown:,} / {len(self.items_data):,} 个项目")
+        else:
+            self.status_var.set(f"显示 {len(self.items_data):,} 个项目")
+    
+    def clear_filter(self):
+        """清空筛选框（切换目录或开始搜索时）"""
+        self.filter_var.set("")
+        if self.filter_after_id:
+            self.root.after_cancel(self.filter_after_id)
+            self.filter_after_id = None
+        self.filter_cache = None
+    
+    def filtered_order(self):
+        """返回经筛选框过滤后的显示顺序"""
+        query = self.filter_var.get().casefold()
+        if not query:
+            self.filter_cache = None
+            return self.display_order
+        candidates = self.display_order
+        cache = self.filter_cache
+        if cache and cache[0] is self.display_order and cache[1] is self.items_data and query.startswith(cache[2]):
+            if query == cache[2]:
+                return cache[3]
+            # 条件只是变长：在上次的结果中继续筛选
+            candidates = cache[3]
+        result = self.items_data.filter_indices(query, candidates)
+        self.filter_cache = (self.display_order, self.items_data, query, result)
+        return result
+    
+    def update_content_items(self, keys=None):
+        """按当前排序和筛选条件更新内容视图（保留选中项），返回显示的项目数
+
+        keys 为数据被原地修改之前由 selection_keys 记下的选中项。
+        """
+        order = self.filtered_order()
+        self.content_view.set_items(ListingView(self.items_data, order), reset=False, keys=keys)
+        return len(order)
+    
+    def content_row_values(self, entry):
+        """返回内容表格中一行的显示值（只对可见行调用）"""
+        if entry.is_dir:  # 如果是目录
+            if entry.size is not None:
+                size_text = format_size(entry.size)
+            elif entry.path in self.folder_size_progress:
+                # 计算中：显示目前累计的大小
+                size_text = format_size(self.folder_size_progress[entry.path]) + "…"
             else:
-                header = ['名称', '类型', '大小', '修改日期'][c]
-            self.content_tree.heading(c+1, text=header, command=lambda _col=c: self.sort_by_column(_col))
+                size_text = ""
+            return (FOLDER_ICON, entry.name, entry.type_name, size_text, format_time(entry.mtime))
+        # 如果是文件
+        icon = classify(entry.name).icon
+        return (icon, entry.name, entry.type_name, format_size(entry.size), format_time(entry.mtime))
+    
+    def get_selected_entry(self):
+        """返回内容视图中第一个选中项对应的 Entry，未选中时抛出 IndexError"""
+        return self.content_view.selected_items()[0]
+    
+    def get_selected_entries(self):
+        """按显示顺序返回内容视图中全部选中项对应的 Entry"""
+        return self.content_view.selected_items()
+    
+    def describe_items(self, names):
+        """一个项目时返回它的名称，多个时返回数量"""
+        if len(names) == 1:
+            return f"'{os.path.basename(names[0])}'"
+        return f"{len(names):,} 个项目"
+    
+    def path_changes(self, paths, deleted=False, changes=None):
+        """把路径列表转换成 on_fs_changes 的格式：删除的项为 None，其余重新 stat"""
+        changes = {} if changes is None else changes
+        for path in paths:
+            directory, name = os.path.split(os.path.normpath(path))
+            changes.setdefault(directory, {})[name] = None if deleted else stat_entry(directory, name)
+            self.listing_cache.invalidate(directory)
+        return changes
     
     def show_context_menu(self, event):
         """显示右键菜单"""
         try:
-            # 选中右键点击的项目
-            item = self.content_tree.identify_row(event.y)
-            if item:
-                self.content_tree.selection_set(item)
-                self.content_tree.focus(item)
+            # 右键点击未选中的项目时只选中它；点击已选中的项目时保留多选
+            index = self.content_view.index_at_y(event.y)
+            if index is not None:
+                if index not in self.content_view.selected:
+                    self.content_view.select_index(index)
                 
                 # 获取选中项目的信息
-                selected_item = self.content_tree.selection()[0]
-                item_name = self.content_tree.item(selected_item, "values")[1]
-                item_path = os.path.join(self.current_path, item_name) if self.current_path else ""
+                entries = self.get_selected_entries()
+                dir_paths = [entry.path for entry in entries if entry.is_dir]
                 
                 # 重新创建菜单，确保菜单选项正确
                 self.context_menu.delete(0, tk.END)  # 清空现有菜单
@@ -701,12 +1422,11 @@ class ResourceExplorer:
                 self.context_menu.add_command(label="属性", command=self.show_item_properties)
                 self.context_menu.add_separator()
                 
-                # 根据项目类型添加收藏夹相关选项
-                if item_path and os.path.isdir(item_path):
-                    if item_path in self.favorites:
-                        self.context_menu.add_command(label="从收藏夹移除", command=self.remove_selected_from_favorites)
-                    else:
-                        self.context_menu.add_command(label="添加到收藏夹", command=self.add_selected_to_favorites)
+                # 根据选中的目录是否已在收藏夹中添加相应选项
+                if any(path not in self.favorites for path in dir_paths):
+                    self.context_menu.add_command(label="添加到收藏夹", command=self.add_selected_to_favorites)
+                if any(path in self.favorites for path in dir_paths):
+                    self.context_menu.add_command(label="从收藏夹移除", command=self.remove_selected_from_favorites)
                 
                 self.context_menu.add_separator()
                 self.context_menu.add_command(label="复制", command=self.copy_item)
@@ -714,6 +1434,8 @@ class ResourceExplorer:
                 self.context_menu.add_command(label="粘贴", command=self.paste_item)
                 self.context_menu.add_separator()
                 self.context_menu.add_command(label="删除", command=self.delete_item)
+                if any(job.can_undo for job, _ in self.delete_jobs):
+                    self.context_menu.add_command(label="撤销删除", command=self.undo_delete)
                 
                 # 显示菜单
                 self.context_menu.post(event.x_root, event.y_root)
@@ -725,44 +1447,37 @@ class ResourceExplorer:
     def add_selected_to_favorites(self):
         """将选中的目录添加到收藏夹"""
         try:
-            selected_item = self.content_tree.selection()[0]
-            item_name = self.content_tree.item(selected_item, "values")[1]
-            
-            if self.current_path:
-                item_path = os.path.join(self.current_path, item_name)
-                if os.path.isdir(item_path):
-                    if self.add_to_favorites(item_path):
-                        messagebox.showinfo("成功", f"已将 '{item_name}' 添加到收藏夹")
-                    else:
-                        messagebox.showinfo("提示", f"'{item_name}' 已在收藏夹中")
-        except IndexError:
-            pass
+            paths = [entry.path for entry in self.get_selected_entries() if entry.is_dir]
+            if self.current_path and paths:
+                if self.add_to_favorites(*paths):
+                    messagebox.showinfo("成功", f"已将 {self.describe_items(paths)} 添加到收藏夹")
+                else:
+                    messagebox.showinfo("提示", f"{self.describe_items(paths)} 已在收藏夹中")
         except Exception as e:
             messagebox.showerror("错误", f"添加到收藏夹时出错: {str(e)}")
     
     def remove_selected_from_favorites(self):
         """从收藏夹移除选中的目录"""
         try:
-            selected_item = self.content_tree.selection()[0]
-            item_name = self.content_tree.item(selected_item, "values")[1]
-            
-            if self.current_path:
-                item_path = os.path.join(self.current_path, item_name)
-                if self.remove_from_favorites(item_path):
-                    messagebox.showinfo("成功", f"已从收藏夹移除 '{item_name}'")
-        except IndexError:
-            pass
+            paths = [entry.path for entry in self.get_selected_entries() if entry.path in self.favorites]
+            if self.current_path and paths:
+                if self.remove_from_favorites(*paths):
+                    messagebox.showinfo("成功", f"已从收藏夹移除 {self.describe_items(paths)}")
         except Exception as e:
             messagebox.showerror("错误", f"从收藏夹移除时出错: {str(e)}")
     
     def show_item_properties(self):
-        """显示项目属性"""
+        """显示项目属性（选中多个项目时显示汇总信息）"""
         try:
-            selected_item = self.content_tree.selection()[0]
-            item_name = self.content_tree.item(selected_item, "values")[0]
+            entries = self.get_selected_entries()
+            if len(entries) > 1:
+                self.show_selection_properties(entries)
+                return
+            entry = entries[0]
+            item_name = entry.name
             
             if self.current_path:
-                item_path = os.path.join(self.current_path, item_name)
+                item_path = entry.path
                 
                 # 创建属性窗口
                 prop_window = tk.Toplevel(self.root)
@@ -779,19 +1494,24 @@ class ResourceExplorer:
                 ttk.Label(props_frame, text=f"位置: {self.current_path}").pack(anchor=tk.W, pady=2)
                 ttk.Label(props_frame, text=f"路径: {item_path}").pack(anchor=tk.W, pady=2)
                 
+                # 类型、大小和修改时间直接来自列举结果
+                if entry.is_dir:
+                    ttk.Label(props_frame, text=f"类型: 文件夹").pack(anchor=tk.W, pady=2)
+                    size_label = ttk.Label(props_frame, text="大小: 计算中...")
+                    size_label.pack(anchor=tk.W, pady=2)
+                    self.show_folder_size([item_path], size_label)
+                else:
+                    size = entry.size
+                    formatted_size = format_size(size)
+                    ttk.Label(props_frame, text=f"类型: {entry.type_name}").pack(anchor=tk.W, pady=2)
+                    ttk.Label(props_frame, text=f"大小: {formatted_size} ({size} 字节)").pack(anchor=tk.W, pady=2)
+                
                 try:
+                    # 列举结果不保存创建/访问时间，只对这一项单独 stat
                     stats = os.stat(item_path)
-                    if os.path.isdir(item_path):
-                        ttk.Label(props_frame, text=f"类型: 文件夹").pack(anchor=tk.W, pady=2)
-                    else:
-                        size = stats.st_size
-                        formatted_size = self.format_size(size)
-                        ttk.Label(props_frame, text=f"类型: 文件").pack(anchor=tk.W, pady=2)
-                        ttk.Label(props_frame, text=f"大小: {formatted_size} ({size} 字节)").pack(anchor=tk.W, pady=2)
-                    
-                    created_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.st_ctime))
-                    modified_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.st_mtime))
-                    accessed_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.st_atime))
+                    created_time = format_time(stats.st_ctime)
+                    modified_time = format_time(entry.mtime)
+                    accessed_time = format_time(stats.st_atime)
                     
                     ttk.Label(props_frame, text=f"创建时间: {created_time}").pack(anchor=tk.W, pady=2)
                     ttk.Label(props_frame, text=f"修改时间: {modified_time}").pack(anchor=tk.W, pady=2)
@@ -806,112 +1526,255 @@ class ResourceExplorer:
         except Exception as e:
             messagebox.showerror("错误", f"显示属性时出错: {str(e)}")
     
+    def show_selection_properties(self, entries):
+        """显示多个选中项目的汇总属性：数量和总大小（文件夹大小在后台计算）"""
+        dir_paths = [entry.path for entry in entries if entry.is_dir]
+        file_bytes = sum(entry.size for entry in entries if not entry.is_dir)
+        
+        prop_window = tk.Toplevel(self.root)
+        prop_window.title("属性")
+        prop_window.geometry("400x200")
+        prop_window.resizable(False, False)
+        
+        props_frame = ttk.Frame(prop_window)
+        props_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        ttk.Label(props_frame, text=f"已选择: {len(entries):,} 个项目（{len(dir_paths):,} 个文件夹，"
+                                    f"{len(entries) - len(dir_paths):,} 个文件）").pack(anchor=tk.W, pady=2)
+        ttk.Label(props_frame, text=f"位置: {self.current_path}").pack(anchor=tk.W, pady=2)
+        size_label = ttk.Label(props_frame, text=f"大小: {format_size(file_bytes)} ({file_bytes:,} 字节)")
+        size_label.pack(anchor=tk.W, pady=2)
+        if dir_paths:
+            self.show_folder_size(dir_paths, size_label, file_bytes)
+        
+        ttk.Button(prop_window, text="确定", command=prop_window.destroy).pack(pady=10)
+    
+    def show_folder_size(self, paths, label, extra_bytes=0):
+        """在后台计算文件夹的总大小（加上 extra_bytes）并更新属性窗口中的标签；窗口关闭后停止计算"""
+        def update(results, finished=False):
+            if not label.winfo_exists():
+                token.cancel()
+                return
+            total = extra_bytes + sum(size for size, _ in results.values())
+            suffix = "" if finished else " (计算中...)"
+            label.configure(text=f"大小: {format_size(total)} ({total:,} 字节){suffix}")
+        
+        token = self.tasks.submit(
+            self.folder_sizes.calculate, list(paths),
+            on_batch=update, on_done=lambda results: update(results, finished=True)
+        )
+    
     def copy_item(self):
         """复制选中的项目"""
-        try:
-            selected_item = self.content_tree.selection()[0]
-            item_name = self.content_tree.item(selected_item, "values")[0]
-            
-            if self.current_path:
-                self.copied_item = os.path.join(self.current_path, item_name)
-                self.is_cut = False
-                self.status_var.set(f"已复制: {item_name}")
-        except IndexError:
-            pass
-        except Exception as e:
-            messagebox.showerror("错误", f"复制项目时出错: {str(e)}")
+        self.set_clipboard(is_cut=False)
     
     def cut_item(self):
         """剪切选中的项目"""
+        self.set_clipboard(is_cut=True)
+    
+    def set_clipboard(self, is_cut):
+        """把全部选中的项目放入剪贴板"""
         try:
-            selected_item = self.content_tree.selection()[0]
-            item_name = self.content_tree.item(selected_item, "values")[0]
-            
-            if self.current_path:
-                self.copied_item = os.path.join(self.current_path, item_name)
-                self.is_cut = True
-                self.status_var.set(f"已剪切: {item_name}")
-        except IndexError:
-            pass
+            paths = [entry.path for entry in self.get_selected_entries()]
+            if self.current_path and paths:
+                self.copied_items = paths
+                self.is_cut = is_cut
+                action = "剪切" if is_cut else "复制"
+                self.status_var.set(f"已{action}: {self.describe_items(paths)}")
         except Exception as e:
-            messagebox.showerror("错误", f"剪切项目时出错: {str(e)}")
+            messagebox.showerror("错误", f"复制项目时出错: {str(e)}")
     
     def paste_item(self):
-        """粘贴项目"""
+        """粘贴项目（全部项目作为一个任务在后台排队执行）"""
         try:
-            if self.copied_item and self.current_path:
-                # 获取目标路径
-                dest_name = os.path.basename(self.copied_item)
-                dest_path = os.path.join(self.current_path, dest_name)
+            if self.copied_items and self.current_path:
+                items = []
+                taken = set(self.pending_destinations)
+                for source in self.copied_items:
+                    # 获取目标路径；如果目标已存在（或已被其他任务占用），添加数字后缀
+                    dest_name = os.path.basename(source)
+                    dest_path = os.path.join(self.current_path, dest_name)
+                    counter = 1
+                    while os.path.exists(dest_path) or dest_path in taken:
+                        name, ext = os.path.splitext(dest_name)
+                        dest_path = os.path.join(self.current_path, f"{name}({counter}){ext}")
+                        counter += 1
+                    taken.add(dest_path)
+                    items.append((source, dest_path))
                 
-                # 如果目标已存在，添加数字后缀
-                counter = 1
-                while os.path.exists(dest_path):
-                    name, ext = os.path.splitext(dest_name)
-                    dest_path = os.path.join(self.current_path, f"{name}({counter}){ext}")
-                    counter += 1
-                
-                # 复制或移动文件
-                if os.path.isdir(self.copied_item):
-                    # 复制目录
-                    import shutil
-                    shutil.copytree(self.copied_item, dest_path)
-                    
-                    # 如果是剪切操作，删除原文件
-                    if self.is_cut:
-                        shutil.rmtree(self.copied_item)
-                else:
-                    # 复制文件
-                    with open(self.copied_item, 'rb') as src, open(dest_path, 'wb') as dst:
-                        # 使用缓冲区提高大文件复制速度
-                        buffer_size = 1024 * 1024  # 1MB
-                        while True:
-                            buffer = src.read(buffer_size)
-                            if not buffer:
-                                break
-                            dst.write(buffer)
-                    
-                    # 如果是剪切操作，删除原文件
-                    if self.is_cut:
-                        os.remove(self.copied_item)
-                
-                # 刷新当前目录
-                self.refresh_content()
+                self.start_transfer(items, self.is_cut)
                 
                 # 清除剪贴板（如果是剪切操作）
                 if self.is_cut:
-                    self.copied_item = None
+                    self.copied_items = []
                     self.is_cut = False
-                
-                self.status_var.set(f"已粘贴到: {self.current_path}")
         except Exception as e:
             messagebox.showerror("错误", f"粘贴项目时出错: {str(e)}")
     
+    def start_transfer(self, items, move=False):
+        """把一批复制（或移动）作为一个任务加入后台队列"""
+        job = TransferJob(items, move)
+        sources = [source for source, _ in items]
+        label = self.describe_items(sources)
+        dest_dir = os.path.dirname(items[0][1])
+        self.pending_destinations.update(job.destinations)
+        
+        def on_batch(progress):
+            self.update_transfer_bar()
+        
+        def on_done(progress):
+            self.finish_transfer(job)
+            # 整个任务结束后按行更新一次内容视图和导航树
+            changes = self.path_changes(job.destinations)
+            if move:
+                self.path_changes(sources, deleted=True, changes=changes)
+            self.on_fs_changes(changes)
+            elapsed_time = time.monotonic() - started
+            if move and len(job.renamed) == len(items):
+                self.status_var.set(f"已移动 {label} 到: {dest_dir}（同一分区，直接重命名）")
+            else:
+                self.status_var.set(f"已粘贴 {label} 到: {dest_dir} ({format_size(progress.done)}, {format_duration(elapsed_time)})")
+            if job.errors:
+                self.show_errors("部分项目未能复制", job.errors)
+        
+        def on_error(e):
+            self.finish_transfer(job)
+            # 移动失败时已重命名的项目仍然有效
+            if job.renamed:
+                renamed_sources = [source for source, _ in job.renamed]
+                changes = self.path_changes([destination for _, destination in job.renamed])
+                self.on_fs_changes(self.path_changes(renamed_sources, deleted=True, changes=changes))
+            messagebox.showerror("错误", f"粘贴 {label} 时出错: {str(e)}")
+            self.status_var.set("粘贴失败")
+        
+        started = time.monotonic()
+        token = self.transfers.submit(job.run, on_batch=on_batch, on_done=on_done, on_error=on_error)
+        self.transfer_jobs.append((job, token))
+        self.update_transfer_bar()
+    
+    def show_errors(self, title, errors, limit=10):
+        """汇总显示批量操作中失败的项目（最多列出 limit 个）"""
+        lines = [f"{path}: {message}" for path, message in errors[:limit]]
+        if len(errors) > limit:
+            lines.append(f"……另有 {len(errors) - limit:,} 个")
+        messagebox.showwarning(title, f"{len(errors):,} 个项目失败:\n" + "\n".join(lines))
+    
+    def finish_transfer(self, job):
+        """从队列中移除已结束的任务"""
+        self.transfer_jobs = [(j, t) for j, t in self.transfer_jobs if j is not job]
+        self.pending_destinations.difference_update(job.destinations)
+        self.update_transfer_bar()
+    
+    def update_transfer_bar(self):
+        """显示当前复制任务的进度、速度和剩余时间；没有任务时隐藏"""
+        if not self.transfer_jobs:
+            self.transfer_bar.pack_forget()
+            return
+        if not self.transfer_bar.winfo_ismapped():
+            self.transfer_bar.pack(side=tk.BOTTOM, fill=tk.X, before=self.status_bar)
+        job, _ = self.transfer_jobs[0]
+        progress = job.progress()
+        queued = f" (另有 {len(self.transfer_jobs) - 1} 个任务排队)" if len(self.transfer_jobs) > 1 else ""
+        percent = progress.done * 100 // progress.total if progress.total else 0
+        text = (f"正在复制 {self.describe_items([source for source, _ in job.items])}: {percent}% "
+                f"{format_size(progress.done)} / {format_size(progress.total)}")
+        if progress.files_total > 1:
+            text += f" ({progress.files_done:,} / {progress.files_total:,} 个文件)"
+        if progress.errors:
+            text += f"，{progress.errors:,} 个失败"
+        if job.paused:
+            text += "，已暂停"
+        elif progress.rate:
+            text += f"，{format_size(int(progress.rate))}/s"
+            if progress.eta is not None:
+                text += f"，剩余 {format_duration(progress.eta)}"
+        self.transfer_var.set(text + queued)
+        self.transfer_pause_btn.configure(text="继续" if job.paused else "暂停")
+    
+    def toggle_transfer_pause(self):
+        """暂停或继续当前复制任务"""
+        if self.transfer_jobs:
+            job, _ = self.transfer_jobs[0]
+            if job.paused:
+                job.resume()
+            else:
+                job.pause()
+            self.update_transfer_bar()
+    
+    def cancel_transfer(self):
+        """取消当前复制任务（已复制的部分在工作线程中删除）"""
+        if self.transfer_jobs:
+            job, token = self.transfer_jobs[0]
+            token.cancel()
+            job.resume()  # 暂停中的任务需要醒来才能结束
+            self.finish_transfer(job)
+            self.status_var.set(f"已取消复制: {self.describe_items([source for source, _ in job.items])}")
+    
+    def on_close(self):
+        """关闭窗口：有复制任务时先确认，然后取消全部任务"""
+        if self.transfer_jobs and not messagebox.askyesno("确认退出", "还有未完成的复制任务，确定要退出吗？\n未完成的复制将被取消。"):
+            return
+        for job, token in self.transfer_jobs:
+            token.cancel()
+            job.resume()
+        # 已删除的项目不再等待撤销期限，窗口关闭后进程清理完暂存目录再退出
+        for job, _ in self.delete_jobs:
+            job.purge_now()
+        self.root.destroy()
+    
     def delete_item(self):
-        """删除选中的项目"""
+        """删除全部选中的项目：一次确认后立即移到暂存目录并更新视图，在后台清理，清理开始前可以撤销"""
         try:
-            selected_item = self.content_tree.selection()[0]
-            item_name = self.content_tree.item(selected_item, "values")[0]
+            paths = [entry.path for entry in self.get_selected_entries()]
+            if not self.current_path or not paths:
+                return
+            label = self.describe_items(paths)
+            if not messagebox.askyesno("确认删除", f"确定要删除 {label} 吗？\n删除后可以按 Ctrl+Z 撤销，直到后台清理开始。"):
+                return
             
-            if self.current_path:
-                item_path = os.path.join(self.current_path, item_name)
-                
-                # 确认删除
-                if messagebox.askyesno("确认删除", f"确定要删除 '{item_name}' 吗？\n此操作无法撤销。"):
-                    if os.path.isdir(item_path):
-                        import shutil
-                        shutil.rmtree(item_path)
-                    else:
-                        os.remove(item_path)
-                    
-                    # 刷新当前目录
-                    self.refresh_content()
-                    self.status_var.set(f"已删除: {item_name}")
-        except IndexError:
-            pass
+            # 第一阶段：重命名到暂存目录，界面立即按行更新
+            job = DeleteJob(paths)
+            staged = job.stage()
+            if staged:
+                self.on_fs_changes(self.path_changes(staged, deleted=True))
+                self.status_var.set(f"已删除 {self.describe_items(staged)}，按 Ctrl+Z 撤销")
+            
+            # 第二阶段：撤销期限过后在后台并行删除
+            def on_batch(progress):
+                self.status_var.set(f"正在清理已删除的项目: {progress.items_done:,} / {progress.items_total:,}，"
+                                    f"已删除 {progress.removed:,} 个文件和文件夹")
+            
+            def on_done(deleted):
+                self.delete_jobs = [(j, t) for j, t in self.delete_jobs if j is not job]
+                if deleted:
+                    self.on_fs_changes(self.path_changes(deleted, deleted=True))
+                if not job.undone:
+                    self.status_var.set(f"已删除: {label}")
+                if job.errors:
+                    self.show_errors("部分项目未能删除",
+                                     [(job.original_path(path), message) for path, message in job.errors])
+            
+            def on_error(e):
+                self.delete_jobs = [(j, t) for j, t in self.delete_jobs if j is not job]
+                messagebox.showerror("错误", f"删除项目时出错: {str(e)}")
+            
+            token = self.purges.submit(job.run, on_batch=on_batch, on_done=on_done, on_error=on_error)
+            self.delete_jobs.append((job, token))
         except Exception as e:
             messagebox.showerror("错误", f"删除项目时出错: {str(e)}")
     
+    def undo_delete(self, event=None):
+        """撤销最近一次还未开始清理的删除"""
+        for job, _ in reversed(self.delete_jobs):
+            if job.can_undo:
+                restored = job.undo()
+                self.on_fs_changes(self.path_changes([target for _, target in restored]))
+                self.status_var.set(f"已撤销删除: {self.describe_items([path for path, _ in restored])}"
+                                    if restored else "撤销删除失败")
+                if job.errors:
+                    self.show_errors("部分项目未能恢复", job.errors)
+                return
+        self.status_var.set("没有可以撤销的删除")
+    
     def navigate_to_path(self, event=None):
         """导航到指定路径"""
         path = self.path_var.get()
@@ -921,7 +1784,9 @@ class ResourceExplorer:
             messagebox.showerror("错误", f"无效的路径: {path}")
     
     def refresh_content(self):
-        """刷新当前目录内容"""
+        """刷新当前目录内容（目录未变化时直接使用缓存）；卷信息过期时一并重新探测"""
+        if not self.volumes.is_fresh():
+            self.refresh_volumes()
         if self.current_path:
             self.show_directory_content(self.current_path)
     
@@ -977,16 +1842,26 @@ class ResourceExplorer:
             # 显示成功消息
             messagebox.showinfo("成功", f"已从收藏夹移除 '{os.path.basename(path)}'")
 
-def main():
-    """主函数"""
-    # 设置中文字体支持
+def main(started=None, on_ready=None):
+    """主函数
+
+    started 为启动计时的起点（默认为调用 main 的时刻），on_ready(app) 在窗口首次绘制后调用。
+    """
+    if started is None:
+        started = time.perf_counter()
     root = tk.Tk()
     
     # 创建应用实例
-    app = ResourceExplorer(root)
+    app = ResourceExplorer(root, started, on_ready)
     
     # 启动主循环
     root.mainloop()
+    
+    # 窗口关闭后不再等待后台任务
+    app.watch_token.cancel()
+    app.tasks.shutdown()
+    app.transfers.shutdown()
+    # 删除的清理任务不取消，进程在它们完成后退出（否则暂存的项目要等下次删除时才清理）
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,17 +1,22 @@
 import os
-import sys
-import winsound
-import subprocess
 import time
+import threading
+
+try:
+    import winsound
+except ImportError:  # 非 Windows 系统没有 winsound，不播放提示音
+    winsound = None
 
 """
 资源管理器启动脚本
-- 运行主程序
-- 播放声音提示
+- 在本进程中运行主程序（不再另起解释器、固定等待 1 秒）
+- 窗口首次绘制完成后在后台线程播放声音提示，并显示启动耗时
 """
 
 def play_sound():
     """播放声音提示"""
+    if winsound is None:
+        return
     try:
         # 播放简单的提示音
         winsound.Beep(1000, 300)  # 1000Hz，持续300毫秒
@@ -21,8 +26,16 @@ def play_sound():
         # 如果无法播放声音，静默忽略
         pass
 
+def on_ready(app):
+    """窗口首次绘制完成：报告启动耗时并播放声音提示（不阻塞界面）"""
+    print(f"资源管理器已启动（{app.startup_time * 1000:.0f}ms），请查看窗口。")
+    print("主人运行完毕，过来看看！")
+    threading.Thread(target=play_sound, daemon=True).start()
+
 def main():
     """主函数"""
+    started = time.perf_counter()
+    
     # 获取当前脚本所在目录
     script_dir = os.path.dirname(os.path.abspath(__file__))
     
@@ -30,22 +43,10 @@ def main():
     os.chdir(script_dir)
     
     try:
-        # 运行资源管理器程序
+        # 运行资源管理器程序：导入推迟到计时开始之后，启动耗时包含导入主程序的时间
         print("正在启动资源管理器...")
-        
-        # 使用subprocess启动主程序，这样可以在程序运行后播放声音
-        process = subprocess.Popen([sys.executable, "resource_explorer.py"])
-        
-        # 等待一小段时间确保程序已经启动
-        time.sleep(1)
-        
-        # 播放声音提示
-        play_sound()
-        print("资源管理器已启动，请查看窗口。")
-        print("主人运行完毕，过来看看！")
-        
-        # 保持脚本运行直到主程序结束
-        process.wait()
+        import resource_explorer
+        resource_explorer.main(started, on_ready)
         
     except Exception as e:
         print(f"启动资源管理器时出错: {str(e)}")
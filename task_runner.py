@@ -0,0 +1,80 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+后台任务执行器
+- 在线程池中运行耗时的文件系统操作
+- 工作线程只往队列里放结果，回调统一由 UI 线程调用 process_pending 分发
+- 不依赖 tkinter，UI 侧负责定时（root.after）调用 process_pending
+"""
+
+
+class CancelToken:
+    """任务取消标记，工作线程应定期检查 cancelled"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """请求取消任务"""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class TaskRunner:
+    """线程池 + 结果队列"""
+
+    def __init__(self, max_workers=4):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="explorer-worker")
+        self.results = queue.Queue()
+
+    def submit(self, func, *args, on_batch=None, on_done=None, on_error=None, token=None):
+        """提交任务，返回 CancelToken
+
+        func 以 func(*args, token=token, emit=emit) 方式调用：
+        - emit(data) 把中间结果交给 on_batch
+        - 返回值交给 on_done，异常交给 on_error
+        任务取消后，尚未分发的结果会被丢弃。
+        """
+        if token is None:
+            token = CancelToken()
+
+        def emit(data):
+            self.results.put((token, on_batch, data))
+
+        def run():
+            if token.cancelled:
+                return
+            try:
+                result = func(*args, token=token, emit=emit)
+            except Exception as e:
+                self.results.put((token, on_error, e))
+            else:
+                self.results.put((token, on_done, result))
+
+        self.executor.submit(run)
+        return token
+
+    def process_pending(self, time_budget=0.02):
+        """在 UI 线程中分发队列里的结果，单次最多占用 time_budget 秒"""
+        deadline = time.perf_counter() + time_budget
+        while time.perf_counter() < deadline:
+            try:
+                token, callback, data = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if token.cancelled or callback is None:
+                continue
+            try:
+                callback(data)
+            except Exception as e:
+                print(f"后台任务回调出错: {str(e)}")
+
+    def shutdown(self):
+        """停止接收新任务，不等待正在运行的任务"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,9 @@
+import os
+import sys
+
+"""
+测试配置
+- 模块都在仓库根目录下（没有包），把根目录加入 sys.path
+"""
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+
+import file_delete
+from explorer_cli import main
+
+"""
+命令行：各子命令的输出和退出码
+"""
+
+
+def run(capsys, *argv):
+    status = main(list(argv))
+    out, err = capsys.readouterr()
+    return status, out, err
+
+
+def records(out):
+    return [json.loads(line) for line in out.splitlines()]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    (root / "sub").mkdir(parents=True)
+    (root / "file2.txt").write_text("ab")
+    (root / "file10.txt").write_text("abcdefghij")
+    (root / "sub" / "inner.log").write_text("x" * 100)
+    return root
+
+
+def test_ls_natural_sort(capsys, tree):
+    status, out, _ = run(capsys, "ls", str(tree))
+    assert status == 0
+    assert [record["name"] for record in records(out)] == ["file2.txt", "file10.txt", "sub"]
+
+
+def test_ls_sort_by_size_tsv(capsys, tree):
+    status, out, _ = run(capsys, "--format", "tsv", "ls", str(tree), "--sort", "size", "-r")
+    lines = out.splitlines()
+    assert status == 0
+    assert lines[0].split("\t") == ["name", "path", "type", "is_dir", "size", "modified"]
+    assert [line.split("\t")[0] for line in lines[1:3]] == ["file10.txt", "file2.txt"]
+
+
+def test_ls_missing_directory(capsys, tmp_path):
+    status, out, err = run(capsys, "ls", str(tmp_path / "missing"))
+    assert status == 1
+    assert out == ""
+    assert "missing" in err
+
+
+def test_du(capsys, tree):
+    status, out, _ = run(capsys, "du", str(tree))
+    assert status == 0
+    assert records(out) == [{"path": str(tree), "size": 112, "complete": True}]
+
+
+def test_find_modes(capsys, tree):
+    status, out, _ = run(capsys, "find", str(tree), "*.log", "--mode", "glob")
+    assert status == 0
+    assert [record["name"] for record in records(out)] == [os.path.join("sub", "inner.log")]
+    status, _, err = run(capsys, "find", str(tree), "([", "--mode", "regex")
+    assert status == 2
+    assert err
+
+
+def test_cp_into_directory_and_move(capsys, tree, tmp_path):
+    target = tmp_path / "target"
+    target.mkdir()
+    status, out, _ = run(capsys, "cp", str(tree / "file2.txt"), str(tree / "sub"), str(target))
+    assert status == 0
+    assert [record["status"] for record in records(out)] == ["copied", "copied"]
+    assert (target / "sub" / "inner.log").read_text() == "x" * 100
+
+    status, out, _ = run(capsys, "cp", "--move", str(tree / "file10.txt"), str(tmp_path / "moved.txt"))
+    assert status == 0
+    assert records(out)[0]["status"] == "renamed"
+    assert not (tree / "file10.txt").exists()
+
+
+def test_cp_multiple_sources_need_directory(capsys, tree, tmp_path):
+    status, _, err = run(capsys, "cp", str(tree / "file2.txt"), str(tree / "file10.txt"), str(tmp_path / "nope"))
+    assert status == 2
+    assert err
+
+
+def test_rm(capsys, tree, monkeypatch):
+    monkeypatch.setattr(file_delete, "_mount_point", lambda path: path)
+    status, out, err = run(capsys, "rm", str(tree / "sub"), str(tree / "missing"))
+    assert status == 1  # 有不存在的路径
+    assert records(out) == [{"path": str(tree / "sub"), "status": "deleted"}]
+    assert "missing" in err
+    assert sorted(os.listdir(tree)) == ["file10.txt", "file2.txt"]
+
+
+def test_rm_reports_purge_failures_by_original_path(capsys, tree, monkeypatch):
+    monkeypatch.setattr(file_delete, "_mount_point", lambda path: path)
+    real_unlink = file_delete._unlink
+
+    def unlink(path):
+        if os.path.basename(path) == "inner.log":
+            raise PermissionError("拒绝访问")
+        real_unlink(path)
+
+    monkeypatch.setattr(file_delete, "_unlink", unlink)
+    status, out, err = run(capsys, "rm", str(tree / "sub"), str(tree / "file2.txt"))
+    assert status == 1
+    assert records(out) == [{"path": str(tree / "sub"), "status": "failed"},
+                            {"path": str(tree / "file2.txt"), "status": "deleted"}]
+    assert f"{tree / 'sub' / 'inner.log'}: 拒绝访问" in err  # 报告原路径，而不是暂存路径
@@ -0,0 +1,138 @@
+import os
+
+import pytest
+
+import file_delete
+from file_delete import DeleteJob
+
+"""
+DeleteJob：暂存、撤销和并行清理
+"""
+
+
+@pytest.fixture
+def staging_in_parent(monkeypatch):
+    """把暂存目录放在被删除项目所在的目录，而不是分区根目录（测试不应写到根目录）"""
+    monkeypatch.setattr(file_delete, "_mount_point", lambda path: path)
+
+
+def make_tree(root, depth=3, files=5):
+    directory = root
+    for level in range(depth):
+        os.makedirs(directory)
+        for i in range(files):
+            with open(os.path.join(directory, f"f{i}.txt"), "w") as f:
+                f.write("x" * i)
+        directory = os.path.join(directory, f"level{level}")
+
+
+def trash_dir(tmp_path):
+    return tmp_path / file_delete.TRASH_DIR_NAME
+
+
+def test_stage_and_purge(tmp_path, staging_in_parent):
+    tree = str(tmp_path / "tree")
+    single = str(tmp_path / "single.txt")
+    make_tree(tree)
+    open(single, "w").close()
+    job = DeleteJob([tree, single], undo_window=0)
+    assert sorted(job.stage()) == sorted([tree, single])
+    assert not os.path.exists(tree) and not os.path.exists(single)
+    assert job.can_undo
+
+    progress = []
+    job.run(emit=progress.append)
+    assert not job.errors
+    assert job.removed == 3 * 5 + 3 + 1  # 文件、目录和单个文件
+    assert progress[-1].items_done == progress[-1].items_total == 2
+    assert not trash_dir(tmp_path).exists()
+    assert os.listdir(tmp_path) == []
+
+
+def test_undo_restores_and_removes_staging_dir(tmp_path, staging_in_parent):
+    tree = str(tmp_path / "tree")
+    make_tree(tree)
+    before = sorted(os.path.relpath(os.path.join(d, n), tree) for d, _, names in os.walk(tree) for n in names)
+    job = DeleteJob([tree])
+    job.stage()
+    assert job.undo() == [(tree, tree)]
+    after = sorted(os.path.relpath(os.path.join(d, n), tree) for d, _, names in os.walk(tree) for n in names)
+    assert after == before
+    assert not trash_dir(tmp_path).exists()
+    assert not job.can_undo
+    assert job.run() == []  # 已撤销：不再删除
+    assert os.path.isdir(tree)
+
+
+def test_undo_when_original_name_is_taken(tmp_path, staging_in_parent):
+    path = str(tmp_path / "a.txt")
+    open(path, "w").close()
+    job = DeleteJob([path])
+    job.stage()
+    open(path, "w").close()  # 撤销期限内又创建了同名文件
+    assert job.undo() == [(path, str(tmp_path / "a(1).txt"))]
+
+
+def test_undo_after_purge_does_nothing(tmp_path, staging_in_parent):
+    path = str(tmp_path / "a.txt")
+    open(path, "w").close()
+    job = DeleteJob([path], undo_window=0)
+    job.stage()
+    job.run()
+    assert job.undo() == []
+    assert not os.path.exists(path)
+
+
+def test_junction_is_not_followed(tmp_path, staging_in_parent, monkeypatch):
+    # Linux 上没有目录联接：用一个名为 "junction" 的普通目录代替，只检查清理不会进入它
+    victim = tmp_path / "victim"
+    victim.mkdir()
+    (victim / "keep.txt").write_text("data")
+    tree = tmp_path / "tree"
+    (tree / "junction").mkdir(parents=True)
+    (tree / "junction" / "inside.txt").write_text("data")
+    monkeypatch.setattr(file_delete, "_is_junction_entry", lambda entry: entry.name == "junction")
+    job = DeleteJob([str(tree)], undo_window=0)
+    job.stage()
+    job.run()
+    # 非空的 "联接" 只能 rmdir，删除失败而不是删除其中的内容
+    assert any("junction" in path for path, _ in job.errors)
+    staged = [os.path.join(d, n) for d, _, names in os.walk(trash_dir(tmp_path)) for n in names]
+    assert [os.path.basename(path) for path in staged] == ["inside.txt"]
+    assert (victim / "keep.txt").exists()
+
+
+def test_stale_staging_dirs_are_purged(tmp_path, staging_in_parent):
+    trash = trash_dir(tmp_path)
+    stale = trash / f"1-{os.getpid() + 1}-0"
+    (stale / "0").mkdir(parents=True)
+    (stale / "0" / "old.txt").write_text("old")
+    path = str(tmp_path / "a.txt")
+    open(path, "w").close()
+    job = DeleteJob([path], undo_window=0)
+    job.stage()
+    job.run()
+    assert not trash.exists()
+
+
+def test_stale_purge_errors_are_not_job_errors(tmp_path, staging_in_parent, monkeypatch, capsys):
+    stale = trash_dir(tmp_path) / f"1-{os.getpid() + 1}-0"
+    stale.mkdir(parents=True)
+    (stale / "locked.txt").write_text("old")
+    real_unlink = file_delete._unlink
+
+    def unlink(path):
+        if os.path.basename(path) == "locked.txt":
+            raise PermissionError("被其他程序占用")
+        real_unlink(path)
+
+    monkeypatch.setattr(file_delete, "_unlink", unlink)
+    path = str(tmp_path / "a.txt")
+    open(path, "w").close()
+    job = DeleteJob([path], undo_window=0)
+    job.stage()
+    job.run()
+    assert job.errors == []  # 残留目录与本次删除的项目无关
+    assert not os.path.exists(path)
+    assert (stale / "locked.txt").exists()
+    assert "locked.txt" in capsys.readouterr().out
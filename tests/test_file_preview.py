@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+import file_preview
+from file_preview import PREVIEW_TEXT_BYTES, PreviewCache, load_preview
+
+"""
+文件预览：文本解码、特殊文件和按版本缓存
+"""
+
+
+def test_text_preview_is_truncated(tmp_path):
+    path = tmp_path / "big.txt"
+    path.write_text("中文" * PREVIEW_TEXT_BYTES, encoding="utf-8")
+    preview = load_preview(str(path))
+    assert preview.kind == "text"
+    assert preview.truncated
+    assert preview.text.startswith("中文中文")
+    assert len(preview.text.encode("utf-8")) <= PREVIEW_TEXT_BYTES  # 截断处不产生替换字符
+
+
+def test_encodings_binary_and_empty(tmp_path):
+    (tmp_path / "gbk.txt").write_bytes("你好".encode("gb18030"))
+    (tmp_path / "utf16.txt").write_bytes("hello".encode("utf-16"))
+    (tmp_path / "data.bin").write_bytes(b"\x00\x01\x02")
+    (tmp_path / "empty.txt").write_bytes(b"")
+    assert load_preview(str(tmp_path / "gbk.txt")).text == "你好"
+    assert load_preview(str(tmp_path / "utf16.txt")).text == "hello"
+    assert load_preview(str(tmp_path / "data.bin")).kind == "binary"
+    assert load_preview(str(tmp_path / "empty.txt")).text == ""
+    assert load_preview(str(tmp_path)).kind == "none"
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="需要 os.mkfifo")
+def test_fifo_is_not_opened(tmp_path):
+    fifo = str(tmp_path / "pipe")
+    os.mkfifo(fifo)
+    assert load_preview(fifo).kind == "none"
+
+
+def test_cache_is_keyed_by_version(tmp_path, monkeypatch):
+    path = tmp_path / "a.txt"
+    path.write_text("one")
+    cache = PreviewCache()
+    assert load_preview(str(path), cache).text == "one"
+    reads = []
+    real_read = file_preview._read_text
+    monkeypatch.setattr(file_preview, "_read_text", lambda *args: reads.append(args) or real_read(*args))
+    assert load_preview(str(path), cache).text == "one"
+    assert reads == [] and cache.hits == 1  # 文件未变化：不再读取
+
+    path.write_text("two!")
+    assert load_preview(str(path), cache).text == "two!"
+    assert len(reads) == 1
+
+
+def test_cache_evicts_to_byte_limit():
+    preview = file_preview._preview("text", text="x" * 1000)
+    size = file_preview._estimate_size(preview)
+    cache = PreviewCache(max_bytes=2 * size)
+    for key in ("a", "b", "c"):
+        cache.put(key, preview)
+    assert cache.get("a") is None
+    assert cache.get("c") is preview
+    assert len(cache) == 2 and cache.total_bytes == 2 * size
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from file_search import Matcher, SearchIndex, SearchIndexCache, search_files
+
+"""
+文件名搜索：各查询模式、并行遍历和三元组索引
+"""
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    (root / "src" / "lib").mkdir(parents=True)
+    (root / "..foo").mkdir()
+    (root / ".explorer-trash").mkdir()
+    for rel_path in ("Report.TXT", "notes.md", os.path.join("src", "report_old.txt"),
+                     os.path.join("src", "lib", "main.py"), os.path.join("..foo", "report.py"),
+                     os.path.join(".explorer-trash", "report.txt")):
+        (root / rel_path).write_text("x")
+    return root
+
+
+def found(root, query, mode="substring", index_cache=None):
+    listing, used_index = search_files(str(root), Matcher(query, mode), index_cache=index_cache,
+                                       report_interval=0.01)
+    return sorted(listing.names), used_index
+
+
+def test_modes(tree):
+    assert found(tree, "report") == ([os.path.join("..foo", "report.py"), "Report.TXT",
+                                      os.path.join("src", "report_old.txt")], False)
+    assert found(tree, "*.py", "glob")[0] == [os.path.join("..foo", "report.py"), os.path.join("src", "lib", "main.py")]
+    assert found(tree, r"^notes\.", "regex")[0] == ["notes.md"]
+    assert found(tree, "lib")[0] == [os.path.join("src", "lib")]  # 目录也会匹配
+
+
+def test_invalid_mode_and_regex():
+    with pytest.raises(ValueError):
+        Matcher("x", "fuzzy")
+    with pytest.raises(Exception):
+        Matcher("([", "regex")
+
+
+def test_repeated_query_uses_index(tree):
+    cache = SearchIndexCache()
+    first = found(tree, "report", index_cache=cache)
+    assert first[1] is False
+    second = found(tree, "report", index_cache=cache)
+    assert second == (first[0], True)
+    assert found(tree, "*old*", "glob", cache) == ([os.path.join("src", "report_old.txt")], True)
+    assert found(tree, "zzz", index_cache=cache) == ([], True)
+
+    cache.ttl = -1  # 索引过期后重新遍历
+    assert found(tree, "report", index_cache=cache)[1] is False
+
+
+def test_trigram_candidates():
+    index = SearchIndex("/r")
+    for rel_path in ("alpha.txt", "beta.txt", "gamma.py"):
+        index.add(rel_path, rel_path, False)
+    assert [index.rel_paths[i] for i in index.candidates(Matcher("ALPHA"))] == ["alpha.txt"]
+    assert [index.rel_paths[i] for i in index.candidates(Matcher("*.txt", "glob"))] == ["alpha.txt", "beta.txt"]
+    assert list(index.candidates(Matcher("a"))) == [0, 1, 2]  # 字面量太短：全部候选
+    assert list(index.candidates(Matcher("xyz"))) == []
@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+
+import pytest
+
+import file_transfer
+from file_transfer import SPECIAL_FILE_ERROR, TransferCancelled, TransferJob
+from task_runner import CancelToken
+
+"""
+TransferJob：复制、移动、暂停/继续、取消和特殊文件
+"""
+
+
+def make_tree(root, files=20, size=4096):
+    os.makedirs(os.path.join(root, "sub"))
+    for i in range(files):
+        directory = root if i % 2 else os.path.join(root, "sub")
+        with open(os.path.join(directory, f"f{i}.bin"), "wb") as f:
+            f.write(os.urandom(size))
+
+
+def tree_contents(root):
+    contents = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path):
+                continue  # 管道等特殊文件：打开会阻塞
+            with open(path, "rb") as f:
+                contents[os.path.relpath(path, root)] = f.read()
+    return contents
+
+
+def start(job, token=None):
+    result = {}
+
+    def run():
+        try:
+            result["progress"] = job.run(token=token)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, result
+
+
+def test_copy_tree(tmp_path):
+    source = str(tmp_path / "src")
+    make_tree(source)
+    job = TransferJob([(source, str(tmp_path / "dst"))])
+    progress = job.run()
+    assert tree_contents(str(tmp_path / "dst")) == tree_contents(source)
+    assert progress.done == progress.total == 20 * 4096
+    assert progress.files_done == progress.files_total == 20
+    assert not job.errors
+
+
+def test_existing_destination_is_rejected(tmp_path):
+    source = str(tmp_path / "src")
+    make_tree(source)
+    (tmp_path / "dst").mkdir()
+    with pytest.raises(FileExistsError):
+        TransferJob([(source, str(tmp_path / "dst"))]).run()
+    assert os.listdir(tmp_path / "dst") == []
+
+
+def test_cancel_while_paused_removes_destination(tmp_path):
+    source = str(tmp_path / "src")
+    make_tree(source)
+    destination = str(tmp_path / "dst")
+    token = CancelToken()
+    job = TransferJob([(source, destination)])
+    job.pause()
+    thread, result = start(job, token)
+    time.sleep(0.3)
+    token.cancel()
+    thread.join(10)
+    assert isinstance(result.get("error"), TransferCancelled)
+    assert not os.path.exists(destination)
+    assert os.path.exists(source)
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="需要 os.mkfifo")
+def test_special_files_are_skipped(tmp_path):
+    source = str(tmp_path / "src")
+    make_tree(source, files=2)
+    os.mkfifo(os.path.join(source, "sub", "pipe"))
+    job = TransferJob([(source, str(tmp_path / "dst"))])
+    thread, result = start(job)
+    thread.join(10)
+    assert not thread.is_alive()  # 打开管道会一直阻塞：不应复制它
+    assert "error" not in result
+    assert job.errors == [(os.path.join(source, "sub", "pipe"), SPECIAL_FILE_ERROR)]
+    assert tree_contents(str(tmp_path / "dst")) == tree_contents(source)
+
+    fifo = str(tmp_path / "top-pipe")
+    os.mkfifo(fifo)
+    job = TransferJob([(fifo, str(tmp_path / "copied-pipe"))])
+    job.run()
+    assert job.errors == [(fifo, SPECIAL_FILE_ERROR)]
+    assert not os.path.lexists(tmp_path / "copied-pipe")
+
+
+def test_move_within_device_renames(tmp_path):
+    source = str(tmp_path / "src")
+    make_tree(source)
+    expected = tree_contents(source)
+    destination = str(tmp_path / "moved")
+    job = TransferJob([(source, destination)], move=True)
+    job.run()
+    assert job.renamed == [(source, destination)]
+    assert job.progress().files_total == 0  # 没有复制数据
+    assert not os.path.exists(source)
+    assert tree_contents(destination) == expected
+
+
+def test_move_across_devices_copies_then_removes_source(tmp_path, monkeypatch):
+    monkeypatch.setattr(TransferJob, "_same_device", staticmethod(lambda source, destination: False))
+    source = str(tmp_path / "src")
+    make_tree(source)
+    expected = tree_contents(source)
+    destination = str(tmp_path / "moved")
+    job = TransferJob([(source, destination)], move=True)
+    job.run()
+    assert job.renamed == []
+    assert job.progress().files_done == 20
+    assert not os.path.exists(source)
+    assert tree_contents(destination) == expected
+
+
+def test_pause_and_resume(tmp_path):
+    source = str(tmp_path / "src")
+    make_tree(source)
+    job = TransferJob([(source, str(tmp_path / "dst"))])
+    job.pause()  # 开始前暂停：任务在第一个检查点等待
+    thread, result = start(job)
+    time.sleep(0.5)
+    assert job.paused
+    assert thread.is_alive()
+    assert job.progress().files_done == 0
+    paused_elapsed = job.elapsed()
+    time.sleep(0.2)
+    assert job.elapsed() == paused_elapsed  # 暂停期间不计时
+
+    job.resume()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert "error" not in result
+    assert tree_contents(str(tmp_path / "dst")) == tree_contents(source)
+    # 暂停时间只记一次，耗时不会变成负数；结束后不再增长
+    elapsed = job.elapsed()
+    assert 0 <= elapsed < 0.5
+    assert job.progress().rate > 0
+    time.sleep(0.1)
+    assert job.elapsed() == elapsed
+
+
+def test_parallel_copy_of_many_small_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_transfer, "IN_FLIGHT_BYTES", 64 * 1024)  # 额度小于文件总大小：分批进行
+    source = str(tmp_path / "src")
+    make_tree(source, files=200, size=1024)
+    job = TransferJob([(source, str(tmp_path / "dst"))])
+    progress = job.run()
+    assert progress.files_done == 200 and not job.errors
+    assert tree_contents(str(tmp_path / "dst")) == tree_contents(source)
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+import file_types
+from file_types import UNKNOWN_TYPES_CACHE, classify, load_file_types
+
+"""
+文件类型分类：内置表、配置文件和有上限的未知扩展名缓存
+"""
+
+
+@pytest.fixture(autouse=True)
+def builtin_types():
+    load_file_types(None)
+    yield
+    load_file_types(None)
+
+
+def test_builtin_and_unknown_labels_share_format():
+    assert classify("photo.JPG").label == "JPEG 图像"
+    assert classify("song.mp3") == ("🔊", "MP3 音频", "audio")
+    assert classify("data.xyz").label == "XYZ 文件"  # 与 "MP3 音频" 同样带空格
+    assert classify("README").label == "文件"
+    assert classify("archive.tar.gz").category == "archive"
+
+
+def test_config_overrides(tmp_path):
+    config = tmp_path / "types.json"
+    config.write_text(json.dumps({
+        "categories": {"other": {"label": "其他"}},
+        "extensions": {"xyz": {"category": "code"}, ".md": {"label": "说明"}},
+    }), encoding="utf-8")
+    classify("data.abc")  # 已缓存的未知扩展名在重新加载后按新的配置
+    load_file_types(str(config))
+    assert classify("data.xyz") == ("📜", "XYZ 源文件", "code")
+    assert classify("notes.md").label == "说明"
+    assert classify("data.abc").label == "ABC 其他"
+
+
+def test_unknown_extension_cache_is_bounded():
+    for i in range(UNKNOWN_TYPES_CACHE + 100):
+        classify(f"file.h{i:x}")
+    info = file_types._unknown_type.cache_info()
+    assert info.currsize == UNKNOWN_TYPES_CACHE
+    assert info.maxsize == UNKNOWN_TYPES_CACHE
+    misses = info.misses
+    classify(f"file.h{UNKNOWN_TYPES_CACHE + 99:x}")  # 最近使用的仍在缓存中
+    classify("file.h0")  # 最早的已被淘汰
+    assert file_types._unknown_type.cache_info().misses == misses + 1
@@ -0,0 +1,56 @@
+import os
+
+import folder_size
+from folder_size import DirSizeMemo, FolderSizeCalculator, calculate_folder_size
+from fs_listing import Entry, Listing
+
+"""
+文件夹大小：并行计算、按目录记忆和按名称应用结果
+"""
+
+
+def make_tree(root):
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "top.bin").write_bytes(b"x" * 10)
+    (root / "a" / "one.bin").write_bytes(b"x" * 100)
+    (root / "a" / "b" / "two.bin").write_bytes(b"x" * 1000)
+
+
+def test_calculate_totals(tmp_path):
+    make_tree(tmp_path)
+    os.symlink(tmp_path / "a", tmp_path / "link")  # 符号链接不跟随，不重复计算
+    results = FolderSizeCalculator().calculate([str(tmp_path), str(tmp_path / "a")])
+    assert results == {str(tmp_path): (1110, True), str(tmp_path / "a"): (1100, True)}
+
+
+def test_memo_skips_unchanged_directories(tmp_path, monkeypatch):
+    make_tree(tmp_path)
+    memo = DirSizeMemo()
+    assert calculate_folder_size(str(tmp_path), memo) == 1110
+
+    scanned = []
+    real_scandir = os.scandir
+
+    def scandir(path):
+        scanned.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(folder_size.os, "scandir", scandir)
+    assert calculate_folder_size(str(tmp_path), memo) == 1110
+    assert scanned == []  # 未变化的目录只 stat，不再列举
+
+    (tmp_path / "a" / "new.bin").write_bytes(b"x" * 5)
+    stats = os.stat(tmp_path / "a")
+    os.utime(tmp_path / "a", ns=(stats.st_atime_ns, stats.st_mtime_ns + 10 ** 9))
+    assert calculate_folder_size(str(tmp_path), memo) == 1115
+    assert scanned == [str(tmp_path / "a")]
+
+
+def test_index_of_after_rows_change():
+    # 计算期间列表被增量修改：结果按名称而不是计算开始时的下标应用
+    listing = Listing("/d", [Entry(name, "/d/" + name, True, "文件夹", None, 0.0) for name in ("a", "b", "c")])
+    listing.apply_changes({"a": None})
+    index = listing.index_of("c")
+    listing.set_dir_size(index, 42)
+    assert listing[index].name == "c" and listing[index].size == 42
+    assert listing.index_of("a") is None
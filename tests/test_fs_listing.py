@@ -0,0 +1,136 @@
+import random
+
+from explorer_core import sort_order
+from fs_listing import Entry, Listing, natural_sort_key
+
+"""
+Listing：自然排序、按列缓存的排序结果、筛选和按行应用变化
+"""
+
+COLUMNS = ("name", "natural", "type", "size", "modified")
+EXTENSIONS = [".txt", ".py", ".jpg", ".zip", ""]
+
+
+def file_entry(name, size=1, mtime=0.0, type_name="文件"):
+    return Entry(name, "/d/" + name, False, type_name, size, mtime)
+
+
+def dir_entry(name):
+    return Entry(name, "/d/" + name, True, "文件夹", None, 0.0)
+
+
+def names_in(listing, order):
+    return [listing.names[index] for index in order]
+
+
+def test_natural_sort_key():
+    names = ["file10.txt", "File2.txt", "file1.txt", "file01.txt", "ｆｉｌｅ3.txt", "a"]
+    assert sorted(names, key=natural_sort_key) == ["a", "file1.txt", "file01.txt", "File2.txt", "ｆｉｌｅ3.txt",
+                                                   "file10.txt"]
+    assert natural_sort_key("readme") == "readme"  # 没有数字时与折叠后的名称相同
+
+
+def test_sort_order_columns_and_direction():
+    listing = Listing("/d", [file_entry("b10", size=3), file_entry("b9", size=1), file_entry("A", size=2)])
+    assert names_in(listing, sort_order(listing, "name", natural=False)) == ["A", "b10", "b9"]
+    assert names_in(listing, sort_order(listing, "name")) == ["A", "b9", "b10"]
+    assert names_in(listing, sort_order(listing, "size")) == ["b9", "A", "b10"]
+    assert names_in(listing, sort_order(listing, "size", descending=True)) == ["b10", "A", "b9"]
+
+
+def test_sorted_indices_are_cached_and_invalidated():
+    listing = Listing("/d", [dir_entry("sub"), file_entry("a", size=5)])
+    order = listing.sorted_indices("size")
+    assert listing.sorted_indices("size") is order  # 第二次直接使用缓存
+
+    listing.set_dir_size(0, 10)  # 文件夹大小变化：size 列重新排序，其他列保留
+    name_order = listing.sorted_indices("name")
+    assert names_in(listing, listing.sorted_indices("size")) == ["a", "sub"]
+    assert listing.sorted_indices("name") is name_order
+
+    listing.extend([file_entry("0")])  # 追加项目：所有列重新排序
+    assert listing.sorted_indices("name") is not name_order
+    assert names_in(listing, listing.sorted_indices("name")) == ["0", "a", "sub"]
+
+    cached = listing.sorted_indices("name")
+    listing.invalidate_orders()
+    assert listing.sorted_indices("name") is not cached
+
+
+def test_filter_indices_keeps_order():
+    listing = Listing("/d", [file_entry(name) for name in ("Alpha.txt", "beta.TXT", "gamma.py")])
+    order = sort_order(listing, "name", descending=True)
+    assert names_in(listing, listing.filter_indices("TXT", order)) == ["beta.TXT", "Alpha.txt"]
+    assert list(listing.filter_indices("zzz", order)) == []
+
+
+def test_copy_is_independent():
+    listing = Listing("/d", [file_entry(name) for name in "abc"])
+    order = list(listing.sorted_indices("name"))
+    copy = listing.copy()
+    copy.apply_changes({"a": None})
+    copy.set_dir_size(0, 99)
+    assert listing.names == ["a", "b", "c"]
+    assert list(listing.sizes) == [1, 1, 1]
+    assert list(listing.sorted_indices("name")) == order
+
+
+def random_entry(rng, name):
+    is_dir = rng.random() < 0.2
+    type_name = "文件夹" if is_dir else EXTENSIONS[rng.randrange(len(EXTENSIONS))] or "文件"
+    return Entry(name, "/d/" + name, is_dir, type_name, None if is_dir else rng.randrange(10000),
+                 rng.uniform(0, 1e9))
+
+
+def fresh_orders(listing):
+    copy = listing.copy()
+    copy.invalidate_orders()
+    return {column: list(copy.sorted_indices(column)) for column in COLUMNS}
+
+
+def keys_in_order(listing, column, order):
+    """排序键的序列（键相同的项之间的先后不作要求）"""
+    key = listing._sort_key(column)
+    return [key(index) for index in order]
+
+
+def test_apply_changes_keeps_sort_orders_consistent():
+    rng = random.Random(1)
+    listing = Listing("/d", [random_entry(rng, f"file{i}{EXTENSIONS[i % 5]}") for i in range(200)])
+    for column in COLUMNS:
+        listing.sorted_indices(column)  # 缓存各列的排序结果，之后只做增量调整
+    next_name = 200
+    for _ in range(20):
+        changes = {}
+        for name in rng.sample(listing.names, 10):
+            changes[name] = None if rng.random() < 0.5 else random_entry(rng, name)
+        for _ in range(5):
+            name = f"new{next_name}"
+            next_name += 1
+            changes[name] = random_entry(rng, name)
+        listing.apply_changes(changes)
+        expected = fresh_orders(listing)
+        for column in COLUMNS:
+            order = list(listing.sorted_indices(column))
+            assert sorted(order) == list(range(len(listing))), column
+            assert keys_in_order(listing, column, order) == keys_in_order(listing, column, expected[column]), column
+
+
+def test_apply_changes_counts_and_lookup():
+    listing = Listing("/d", [file_entry(name) for name in "abc"])
+    counts = listing.apply_changes({
+        "a": None,
+        "b": file_entry("b", size=5, mtime=1.0),
+        "d": file_entry("d", size=2),
+    })
+    assert counts == (1, 1, 1)
+    assert listing.index_of("a") is None
+    assert listing[listing.index_of("b")].size == 5
+    assert sorted(listing.names) == ["b", "c", "d"]
+
+
+def test_apply_changes_without_add():
+    listing = Listing("/d", [file_entry("a")])
+    counts = listing.apply_changes({"x": file_entry("x")}, allow_add=False)
+    assert counts == (0, 0, 0)
+    assert listing.names == ["a"]
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+
+import fs_watcher
+from fs_watcher import DirectoryWatcher, _PollingBackend
+from task_runner import CancelToken
+
+"""
+目录监视：轮询后端
+"""
+
+
+def set_mtime_later(path):
+    """保证目录的 mtime 变化（有的文件系统时间精度较粗）"""
+    stats = os.stat(path)
+    os.utime(path, ns=(stats.st_atime_ns, stats.st_mtime_ns + 10 ** 9))
+
+
+def poll(backend):
+    backend.last_poll = 0.0  # 不等待轮询间隔
+    return backend.wait(0)
+
+
+def test_polling_backend_reports_changed_names(tmp_path):
+    (tmp_path / "keep.txt").write_text("a")
+    (tmp_path / "gone.txt").write_text("b")
+    backend = _PollingBackend()
+    backend.set_paths({str(tmp_path)})
+    assert poll(backend) == []
+
+    (tmp_path / "gone.txt").unlink()
+    (tmp_path / "new.txt").write_text("c")
+    set_mtime_later(str(tmp_path))
+    assert sorted(name for _, name in poll(backend)) == ["gone.txt", "new.txt"]
+    assert poll(backend) == []
+
+
+def test_polling_backend_reports_removed_directory(tmp_path):
+    watched = tmp_path / "watched"
+    watched.mkdir()
+    backend = _PollingBackend()
+    backend.set_paths({str(watched)})
+    watched.rmdir()
+    assert poll(backend) == [(str(watched), None)]
+    assert poll(backend) == []
+
+
+def test_polling_backend_set_paths_drops_old(tmp_path):
+    a = tmp_path / "a"
+    b = tmp_path / "b"
+    a.mkdir()
+    b.mkdir()
+    backend = _PollingBackend()
+    backend.set_paths({str(a), str(b)})
+    backend.set_paths({str(b)})
+    assert set(backend.snapshots) == {str(b)}
+
+
+def test_watcher_emits_resolved_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(fs_watcher, "POLL_INTERVAL", 0.05)
+    watcher = DirectoryWatcher(use_inotify=False)
+    watcher.set_paths([str(tmp_path)])
+    batches = []
+    token = CancelToken()
+    thread = threading.Thread(target=watcher.run, kwargs={"token": token, "emit": batches.append})
+    thread.start()
+    try:
+        time.sleep(0.2)
+        (tmp_path / "new.txt").write_text("hello")
+        set_mtime_later(str(tmp_path))
+        deadline = time.monotonic() + 5
+        while not batches and time.monotonic() < deadline:
+            watcher.check_now()
+            time.sleep(0.05)
+    finally:
+        token.cancel()
+        thread.join(5)
+    assert watcher.backend_name == "polling"
+    changes = batches[0][str(tmp_path)]
+    assert changes["new.txt"].size == 5
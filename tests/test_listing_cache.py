@@ -0,0 +1,80 @@
+import os
+from types import SimpleNamespace
+
+from fs_listing import Entry, Listing
+from listing_cache import ListingCache, list_directory_cached
+
+"""
+目录列举缓存：mtime_ns / inode 校验、LRU 淘汰和带缓存的列举任务
+"""
+
+
+def make_listing(directory, names="abc"):
+    return Listing(directory, [Entry(name, os.path.join(directory, name), False, "文件", 1, 0.0) for name in names])
+
+
+def fake_stats(mtime_ns=1, ino=1):
+    return SimpleNamespace(st_mtime_ns=mtime_ns, st_ino=ino)
+
+
+def test_get_revalidates_mtime_and_inode():
+    cache = ListingCache()
+    listing = make_listing("/d")
+    cache.put("/d", fake_stats(), listing)
+    assert cache.get("/d", fake_stats()) is listing
+    assert cache.get("/d", fake_stats(ino=2)) is None  # 目录被替换（inode 不同）
+    assert len(cache) == 0  # 过期的结果被丢弃
+
+    cache.put("/d", fake_stats(), listing)
+    assert cache.get("/d", fake_stats(mtime_ns=2)) is None  # 目录内容有变化
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_lru_eviction_by_count_and_bytes():
+    cache = ListingCache(max_entries=2)
+    for path in ("/a", "/b"):
+        cache.put(path, fake_stats(), make_listing(path))
+    cache.get("/a", fake_stats())  # /a 最近使用过，淘汰 /b
+    cache.put("/c", fake_stats(), make_listing("/c"))
+    assert cache.peek("/a") is not None
+    assert cache.peek("/b") is None
+    assert cache.peek("/c") is not None
+
+    small = ListingCache(max_bytes=1)
+    small.put("/a", fake_stats(), make_listing("/a"))  # 超过内存上限的结果不缓存
+    assert len(small) == 0 and small.total_bytes == 0
+
+
+def test_list_directory_cached_sources(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    cache = ListingCache()
+    batches = []
+    listing, source = list_directory_cached(cache, str(tmp_path), emit=batches.append)
+    assert source == "disk"
+    assert listing.names == ["a.txt"]
+    assert batches[-1][2] is False
+
+    batches.clear()
+    listing, source = list_directory_cached(cache, str(tmp_path), emit=batches.append)
+    assert source == "cache"
+    assert batches[0][2] is True  # 先交付缓存中的旧结果
+
+    (tmp_path / "b.txt").write_text("b")
+    stats = os.stat(tmp_path)
+    os.utime(tmp_path, ns=(stats.st_atime_ns, stats.st_mtime_ns + 10 ** 9))  # 保证 mtime 变化
+    listing, source = list_directory_cached(cache, str(tmp_path), emit=batches.append)
+    assert source == "disk"
+    assert sorted(listing.names) == ["a.txt", "b.txt"]
+
+
+def test_cached_listing_is_not_handed_out(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    cache = ListingCache()
+    snapshots = []
+    first, _ = list_directory_cached(cache, str(tmp_path), emit=snapshots.append)
+    first.apply_changes({"a.txt": None})  # 界面原地修改自己的副本
+    second, source = list_directory_cached(cache, str(tmp_path), emit=snapshots.append)
+    assert source == "cache"
+    assert second.names == ["a.txt"]
+    assert snapshots[-1][0] is not cache.peek(str(tmp_path))
+    assert second is not cache.peek(str(tmp_path))
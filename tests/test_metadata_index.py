@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from listing_cache import ListingCache, list_directory_cached
+from metadata_index import MetadataIndex, list_subdirs_task
+
+"""
+持久化元数据索引：读写、校验和导航树的子目录任务
+"""
+
+
+@pytest.fixture
+def index(tmp_path):
+    try:
+        return MetadataIndex(str(tmp_path / "index.db"))
+    except RuntimeError:
+        pytest.skip("当前 Python 不支持 sqlite3")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    (root / "sub" / "deep").mkdir(parents=True)
+    (root / "other").mkdir()
+    (root / "a.txt").write_text("abc")
+    return root
+
+
+def touch_dir(path):
+    """保证目录的 mtime 变化"""
+    stats = os.stat(path)
+    os.utime(path, ns=(stats.st_atime_ns, stats.st_mtime_ns + 10 ** 9))
+
+
+def test_save_and_load(index, tree):
+    cache = ListingCache()
+    listing, source = list_directory_cached(cache, str(tree), index=index, emit=lambda progress: None)
+    assert source == "disk"
+    loaded, mtime_ns, ino = index.load_listing(str(tree))
+    assert sorted(loaded.names) == ["a.txt", "other", "sub"]
+    assert loaded[loaded.index_of("a.txt")].size == 3
+    assert loaded[loaded.index_of("sub")].size is None  # 目录只记录是否为目录
+    assert index.is_fresh(str(tree), os.stat(tree))
+    assert sorted(index.subdir_names(str(tree))) == ["other", "sub"]
+    assert index.load_listing(str(tree / "missing")) is None
+
+    # 内存缓存为空（例如重新启动后）：先交付索引中的结果，目录未变化时直接使用
+    snapshots = []
+    listing, source = list_directory_cached(ListingCache(), str(tree), index=index, emit=snapshots.append)
+    assert source == "index"
+    assert snapshots[0][2] is True
+    assert sorted(listing.names) == ["a.txt", "other", "sub"]
+
+
+def test_reconcile_rescans_only_changed_dirs(index, tree):
+    assert index.reconcile([str(tree)]) == (4, 4)
+    assert index.reconcile([str(tree)]) == (4, 0)
+    (tree / "sub" / "new.txt").write_text("x")
+    touch_dir(tree / "sub")
+    assert index.reconcile([str(tree)]) == (4, 1)
+    assert not index.is_fresh(str(tree / "missing"), os.stat(tree))
+
+
+def test_list_subdirs_task_emits_index_then_disk(index, tree):
+    index.reconcile([str(tree)])
+    (tree / "added").mkdir()
+    batches = []
+    count = list_subdirs_task(str(tree), index, emit=batches.append)
+    assert count == 3
+    assert batches[0][0] == "index"
+    assert sorted(batches[0][1]) == ["other", "sub"]
+    assert [kind for kind, _ in batches[1:]] == ["disk"]
+    assert sorted(entry.name for entry in batches[1][1]) == ["added", "other", "sub"]
+
+    batches.clear()
+    list_subdirs_task(str(tree), None, emit=batches.append)  # 没有索引：只交付列举结果
+    assert [kind for kind, _ in batches] == ["disk"]
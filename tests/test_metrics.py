@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+import metrics as metrics_module
+from fs_listing import Listing, iter_entries
+from listing_cache import ListingCache
+from metrics import Metrics, metrics
+
+"""
+性能指标：开关、阶段耗时、计数器、日志缓冲区和各模块的埋点
+"""
+
+
+@pytest.fixture
+def enabled_metrics(monkeypatch):
+    """开启全局实例，测试结束后恢复"""
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.reset()
+    yield metrics
+    metrics.reset()
+
+
+def test_disabled_is_a_no_op():
+    recorder = Metrics(enabled=False)
+    with recorder.phase("sort"):
+        pass
+    recorder.record("render", 0.5)
+    recorder.count("rows.inserted", 3)
+    recorder.log("message")
+    assert recorder.snapshot() == ({}, {}, [])
+    assert recorder.phase("a") is recorder.phase("b")  # 共享的空上下文管理器
+
+
+def test_phases_counters_and_log(monkeypatch):
+    monkeypatch.setattr(metrics_module, "LOG_LINES", 3)
+    recorder = Metrics(enabled=True)
+    with recorder.phase("sort"):
+        pass
+    recorder.record("sort", 0.25)
+    recorder.record("stat", 1.0, count=10)
+    recorder.count("syscall.stat", 10)
+    recorder.count("syscall.stat")
+    for i in range(5):
+        recorder.log(f"line {i}")
+    phases, counters, lines = recorder.snapshot()
+    count, total, last, peak = phases["sort"]
+    assert count == 2 and last == 0.25 and peak == 0.25 and total >= 0.25
+    assert phases["stat"] == (10, 1.0, 1.0, 1.0)
+    assert counters == {"syscall.stat": 11}
+    assert [line.split(" ", 1)[1] for line in lines] == ["line 2", "line 3", "line 4"]  # 滚动缓冲区
+    recorder.reset()
+    assert recorder.snapshot() == ({}, {}, [])
+
+
+def test_log_file(tmp_path):
+    recorder = Metrics(enabled=True)
+    path = str(tmp_path / "metrics.log")
+    recorder.set_log_file(path)
+    recorder.log("written")
+    recorder.set_log_file(None)
+    recorder.log("not written")
+    with open(path, encoding="utf-8") as f:
+        assert [line.split(" ", 1)[1] for line in f.read().splitlines()] == ["written"]
+
+
+def test_listing_phases_and_cache_counters(tmp_path, enabled_metrics):
+    for name in ("a.txt", "b.py"):
+        (tmp_path / name).write_text("x")
+    (tmp_path / "sub").mkdir()
+    listing = Listing(str(tmp_path), iter_entries(str(tmp_path)))
+    listing.sorted_indices("name")
+    listing.sorted_indices("name")
+    cache = ListingCache()
+    stats = os.stat(tmp_path)
+    cache.get(str(tmp_path), stats)
+    cache.put(str(tmp_path), stats, listing)
+    cache.get(str(tmp_path), stats)
+
+    phases, counters, _ = enabled_metrics.snapshot()
+    assert {"enumerate", "stat", "classify", "build", "sort"} <= set(phases)
+    assert phases["stat"][0] == 3 and phases["classify"][0] == 3
+    assert counters["entries"] == 3
+    assert counters["syscall.scandir"] == 1
+    assert counters["sort.cached"] == 1
+    assert counters["listing_cache.hit"] == 1 and counters["listing_cache.miss"] == 1
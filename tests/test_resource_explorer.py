@@ -0,0 +1,29 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+from listing_cache import ListingCache
+from resource_explorer import ResourceExplorer, same_path
+
+"""
+界面中不需要显示器的部分：监视和文件操作得到的目录与当前目录的比较
+"""
+
+
+def test_same_path_ignores_trailing_separator():
+    assert same_path("/tmp/dir" + os.sep, "/tmp/dir")
+    assert same_path("/tmp/./dir", "/tmp/dir")
+    assert not same_path("/tmp/dir", "/tmp/dir2")
+
+
+def test_path_changes_use_normalized_directories(tmp_path):
+    (tmp_path / "a.txt").write_text("abc")
+    explorer = SimpleNamespace(listing_cache=ListingCache())
+    changes = ResourceExplorer.path_changes(explorer, [str(tmp_path / "a.txt"), str(tmp_path / "sub") + os.sep],
+                                            deleted=False)
+    assert list(changes) == [str(tmp_path)]
+    assert changes[str(tmp_path)]["a.txt"].size == 3
+    assert changes[str(tmp_path)]["sub"] is None  # 不存在的项
@@ -0,0 +1,90 @@
+import itertools
+
+from fs_listing import Entry, Listing, ListingView
+from virtual_view import VirtualTreeview
+
+"""
+虚拟列表：数据原地修改后保留选中项（不需要显示器，Treeview 用桩对象代替）
+"""
+
+
+class StubTree:
+    """只记录调用的 Treeview 替身"""
+
+    def __init__(self):
+        self._ids = itertools.count()
+
+    def bind(self, *args):
+        pass
+
+    def insert(self, parent, index):
+        return f"row{next(self._ids)}"
+
+    def delete(self, *rows):
+        pass
+
+    def item(self, row, **kwargs):
+        pass
+
+    def selection_set(self, rows):
+        pass
+
+    def focus(self, row):
+        pass
+
+    def yview_moveto(self, fraction):
+        pass
+
+
+class StubScrollbar:
+    def configure(self, **kwargs):
+        pass
+
+    def set(self, first, last):
+        pass
+
+
+def make_entry(name, size=0):
+    return Entry(name, "/d/" + name, False, "文本文档", size, 0.0)
+
+
+def make_view(names):
+    listing = Listing("/d")
+    listing.extend(make_entry(name) for name in names)
+    view = VirtualTreeview(StubTree(), StubScrollbar(), lambda entry: (entry.name,))
+    view.set_items(ListingView(listing, listing.sorted_indices("name")))
+    return listing, view
+
+
+def apply_and_refresh(listing, view, changes):
+    """与 ResourceExplorer.apply_content_changes 相同的顺序：先记下选中项，再修改"""
+    keys = view.selection_keys()
+    listing.apply_changes(changes)
+    view.set_items(ListingView(listing, listing.sorted_indices("name")), reset=False, keys=keys)
+
+
+def selected_names(view):
+    return [entry.name for entry in view.selected_items()]
+
+
+def test_remove_earlier_item_keeps_selection():
+    listing, view = make_view(["a", "b", "c", "d", "e"])
+    view.select_index(3)
+    apply_and_refresh(listing, view, {"a": None})
+    assert selected_names(view) == ["d"]
+    assert view.focus_index == 2
+
+
+def test_add_earlier_item_keeps_selection():
+    listing, view = make_view(["a", "b", "c"])
+    view.select_index(1)
+    apply_and_refresh(listing, view, {"0": make_entry("0")})
+    assert selected_names(view) == ["b"]
+
+
+def test_removed_selection_is_dropped():
+    listing, view = make_view(["a", "b", "c"])
+    view.select_index(1)
+    apply_and_refresh(listing, view, {"b": None})
+    assert selected_names(view) == []
+    assert view.focus_index is None
@@ -0,0 +1,71 @@
+import time
+
+import volumes
+from volumes import VolumeCache, VolumeProber, parse_mountinfo
+
+"""
+卷探测：mountinfo 解析、并发探测的超时和缓存
+"""
+
+MOUNTINFO = """\
+23 28 0:22 / /proc rw,relatime - proc proc rw
+25 28 0:6 / /dev rw,relatime - devtmpfs devtmpfs rw,size=3071872k
+26 25 0:24 / /dev/shm rw,relatime - tmpfs tmpfs rw
+28 1 254:0 / / rw,relatime shared:1 - ext4 /dev/vda rw
+32 24 0:28 / /sys/fs/cgroup rw,relatime - tmpfs tmpfs rw,mode=755
+40 28 8:17 / /mnt/my\\040disk rw,relatime shared:20 master:1 - ntfs3 /dev/sdb1 rw
+41 28 8:33 / /run/media/user/USB rw,nosuid - vfat /dev/sdc1 rw
+42 28 7:1 / /snap/core/1 ro - squashfs /dev/loop1 ro
+43 28 0:50 / /home rw - ext4 /dev/sda1 rw
+44 28 0:51 / /home rw - btrfs /dev/sda2 rw
+45 28 0:52 / /run/user/1000 rw - tmpfs tmpfs rw
+truncated line
+"""
+
+
+def test_parse_mountinfo():
+    mounts = parse_mountinfo(MOUNTINFO.splitlines())
+    assert mounts == [
+        ("/", "ext4", "/dev/vda"),
+        ("/home", "btrfs", "/dev/sda2"),  # 同一挂载点只保留最后一次挂载
+        ("/mnt/my disk", "ntfs3", "/dev/sdb1"),  # \040 转义为空格
+        ("/run/media/user/USB", "vfat", "/dev/sdc1"),
+    ]
+
+
+def test_hung_probe_times_out_and_is_not_restarted(monkeypatch):
+    real_probe = volumes.probe_volume
+    started = []
+
+    def probe(path):
+        started.append(path)
+        if path == "/hung":
+            time.sleep(2)
+            return "", "", 0, 0
+        return real_probe("/")
+
+    monkeypatch.setattr(volumes, "probe_volume", probe)
+    prober = VolumeProber(timeout=0.2)
+    mounts = [("/", "ext4", "/dev/vda"), ("/hung", "nfs", "server:/export")]
+    begin = time.monotonic()
+    first = prober.probe(mounts)
+    assert time.monotonic() - begin < 1.0
+    assert [volume.status for volume in first] == ["ok", "timeout"]
+    assert first[0].total > 0 and first[0].free is not None
+
+    second = prober.probe(mounts)
+    assert [volume.status for volume in second] == ["ok", "timeout"]
+    assert started.count("/hung") == 1
+
+
+def test_cache_ttl_and_lookup(monkeypatch):
+    monkeypatch.setattr(volumes, "list_mounts", lambda: [("/", "ext4", "/dev/vda"), ("/home", "ext4", "/dev/sda1")])
+    monkeypatch.setattr(volumes, "probe_volume", lambda path: ("", "", 100, 40))
+    cache = VolumeCache(ttl=60)
+    assert not cache.is_fresh()
+    first = cache.discover()
+    assert cache.is_fresh()
+    assert cache.discover() is first
+    assert cache.discover(force=True) is not first
+    assert cache.volume_for("/home/user/file").path == "/home"
+    assert cache.volume_for("/homework").path == "/"
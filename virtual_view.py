@@ -0,0 +1,274 @@
+import time
+import tkinter as tk
+
+from metrics import metrics
+
+"""
+虚拟列表视图
+- 完整数据保存在 Python 列表中，Treeview 里只保留可见窗口（加少量预留行）的行
+- 滚动时只重新绑定已有行的值，排序、刷新、导航的界面开销与可见行数成正比
+- 选中状态按数据下标保存，自行处理鼠标点击、滚轮和方向键
+"""
+
+# 可见区域之外额外保留的行数
+OVERSCAN = 5
+# 无法测量时使用的默认行高
+DEFAULT_ROW_HEIGHT = 20
+
+
+class VirtualTreeview:
+    """为 ttk.Treeview 提供虚拟滚动"""
+
+    def __init__(self, tree, scrollbar, row_values):
+        """row_values(item) 返回一行显示的 values 元组"""
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_values = row_values
+
+        self.items = []  # 按显示顺序排列的完整数据
+        self.offset = 0  # 第一行可见数据的下标
+        self.visible_count = 20  # 当前窗口高度能显示的行数
+        self.rows = []  # 复用的 Treeview 行ID
+        self.row_positions = {}  # 行ID -> 在 rows 中的位置
+
+        self.selected = set()  # 选中数据的下标
+        self.anchor = None  # Shift 范围选择的起点
+        self.focus_index = None  # 键盘焦点所在的数据下标
+        self.on_select = None  # 用户改变选择后调用（无参数）
+
+        self.scrollbar.configure(command=self.yview)
+
+        # 绑定事件：自行处理选择和滚动，避免 Treeview 按行ID记录的状态与数据错位
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<Button-1>", lambda e: self._on_click(e, "single"))
+        self.tree.bind("<Control-Button-1>", lambda e: self._on_click(e, "toggle"))
+        self.tree.bind("<Shift-Button-1>", lambda e: self._on_click(e, "range"))
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", self._on_wheel)
+        self.tree.bind("<Button-5>", self._on_wheel)
+        self.tree.bind("<Up>", lambda e: self._on_key(e, -1))
+        self.tree.bind("<Down>", lambda e: self._on_key(e, 1))
+        self.tree.bind("<Prior>", lambda e: self._on_key(e, -self.visible_count))
+        self.tree.bind("<Next>", lambda e: self._on_key(e, self.visible_count))
+        self.tree.bind("<Home>", lambda e: self._on_key(e, -len(self.items)))
+        self.tree.bind("<End>", lambda e: self._on_key(e, len(self.items)))
+
+    # ---- 数据 ----
+
+    def selection_keys(self):
+        """返回 (选中项的数据键集合, 焦点项的数据键)
+
+        数据将被原地修改时（例如按行应用目录变化），先记下选中项，修改后再传给 set_items。
+        """
+        key = self._key_func(self.items)
+        count = len(self.items)
+        selected_keys = {key(i) for i in self.selected if i < count}
+        focus_key = key(self.focus_index) if self.focus_index is not None and self.focus_index < count else None
+        return selected_keys, focus_key
+
+    def set_items(self, items, reset=True, keys=None):
+        """替换全部数据
+
+        reset=True 时回到顶部并清除选择；否则保留滚动位置，并保留选中项
+        （数据提供 item_key(index) 时按它定位，否则按对象身份）。
+        旧数据已被原地修改时，keys 传入修改前由 selection_keys 记下的选中项。
+        """
+        if reset:
+            self.offset = 0
+            self.selected = set()
+            self.anchor = None
+            self.focus_index = None
+        elif keys is not None or (items is not self.items and self.selected):
+            # 排序等操作改变了顺序：按数据键重新定位选中项
+            selected_keys, focus_key = keys if keys is not None else self.selection_keys()
+            new_key = self._key_func(items)
+            self.selected = set()
+            self.focus_index = None
+            for index in range(len(items)):
+                key = new_key(index)
+                if key in selected_keys:
+                    self.selected.add(index)
+                if key == focus_key:
+                    self.focus_index = index
+            self.anchor = self.focus_index
+        self.items = items
+        self.refresh()
+
+    @staticmethod
+    def _key_func(items):
+        """返回 下标 -> 数据键 的函数：数据提供 item_key 时使用它，否则按对象身份"""
+        item_key = getattr(items, "item_key", None)
+        if item_key is not None:
+            return item_key
+        return lambda index: id(items[index])
+
+    def refresh(self):
+        """重新绑定可见行（数据被原地修改或追加后调用）"""
+        count = len(self.items)
+        self.selected = {i for i in self.selected if i < count}
+        if self.focus_index is not None and self.focus_index >= count:
+            self.focus_index = None
+        self._render()
+
+    # ---- 选择 ----
+
+    def selected_items(self):
+        """按显示顺序返回选中的数据"""
+        return [self.items[i] for i in sorted(self.selected)]
+
+    def index_at_y(self, y):
+        """返回窗口纵坐标 y 处的数据下标，没有时返回 None"""
+        row = self.tree.identify_row(y)
+        if not row or row not in self.row_positions:
+            return None
+        index = self.offset + self.row_positions[row]
+        return index if index < len(self.items) else None
+
+    def select_index(self, index):
+        """只选中指定下标的数据并滚动到可见位置"""
+        self.selected = {index}
+        self.anchor = index
+        self.focus_index = index
+        self.see(index)
+        self._selection_changed()
+
+    def see(self, index):
+        """滚动使指定下标可见"""
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible_count:
+            self.offset = index - self.visible_count + 1
+        self._render()
+
+    # ---- 滚动 ----
+
+    def yview(self, *args):
+        """滚动条命令：moveto / scroll units / scroll pages"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.items))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self.visible_count
+            self.offset += step
+        self._render()
+
+    def _clamp_offset(self):
+        max_offset = max(0, len(self.items) - self.visible_count)
+        self.offset = max(0, min(self.offset, max_offset))
+
+    def _update_scrollbar(self):
+        count = len(self.items)
+        if count <= self.visible_count:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / count, min(1.0, (self.offset + self.visible_count) / count))
+
+    # ---- 渲染 ----
+
+    def _render(self):
+        """让 Treeview 行与 [offset, offset + visible_count + OVERSCAN) 范围的数据对应"""
+        started = time.perf_counter() if metrics.enabled else None
+        self._clamp_offset()
+        needed = max(0, min(self.visible_count + OVERSCAN, len(self.items) - self.offset))
+        inserted = max(0, needed - len(self.rows))
+
+        # 只在窗口大小或数据量变化时增删行，其余情况复用已有行
+        if len(self.rows) != needed:
+            while len(self.rows) < needed:
+                self.rows.append(self.tree.insert("", tk.END))
+            if len(self.rows) > needed:
+                self.tree.delete(*self.rows[needed:])
+                del self.rows[needed:]
+            self.row_positions = {row: pos for pos, row in enumerate(self.rows)}
+
+        for pos, row in enumerate(self.rows):
+            self.tree.item(row, values=self.row_values(self.items[self.offset + pos]))
+
+        # 同步选中状态到当前可见行
+        visible = [row for pos, row in enumerate(self.rows) if self.offset + pos in self.selected]
+        self.tree.selection_set(visible)
+        if self.focus_index is not None and 0 <= self.focus_index - self.offset < len(self.rows):
+            self.tree.focus(self.rows[self.focus_index - self.offset])
+
+        self.tree.yview_moveto(0)
+        self._update_scrollbar()
+        if started is not None:
+            metrics.record("render", time.perf_counter() - started)
+            metrics.count("rows.bound", len(self.rows))
+            metrics.count("rows.inserted", inserted)
+
+    # ---- 事件 ----
+
+    def _on_configure(self, event):
+        """窗口大小变化时重新计算可见行数"""
+        row_height = DEFAULT_ROW_HEIGHT
+        header_height = 0
+        if self.rows:
+            bbox = self.tree.bbox(self.rows[0])
+            if bbox:
+                header_height = bbox[1]
+                row_height = bbox[3] or DEFAULT_ROW_HEIGHT
+        visible_count = max(1, (event.height - header_height) // row_height)
+        if visible_count != self.visible_count:
+            self.visible_count = visible_count
+            self._render()
+
+    def _on_click(self, event, mode):
+        # 表头和列分隔线交给 Treeview 默认处理（排序、调整列宽）
+        if self.tree.identify_region(event.x, event.y) not in ("cell", "tree"):
+            return None
+        index = self.index_at_y(event.y)
+        self.tree.focus_set()
+        if index is None:
+            return "break"
+        if mode == "toggle":
+            self.selected ^= {index}
+            self.anchor = index
+        elif mode == "range" and self.anchor is not None:
+            low, high = sorted((self.anchor, index))
+            self.selected = set(range(low, high + 1))
+        else:
+            self.selected = {index}
+            self.anchor = index
+        self.focus_index = index
+        self._render()
+        self._selection_changed()
+        return "break"
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            step = -3
+        elif event.num == 5:
+            step = 3
+        elif event.delta:
+            # Windows 每格 120，macOS 为较小的整数
+            notches = event.delta // 120 if abs(event.delta) >= 120 else (1 if event.delta > 0 else -1)
+            step = -3 * notches
+        else:
+            return "break"
+        self.offset += step
+        self._render()
+        return "break"
+
+    def _on_key(self, event, delta):
+        if not self.items:
+            return "break"
+        current = self.focus_index if self.focus_index is not None else self.offset
+        index = max(0, min(current + delta, len(self.items) - 1))
+        if event.state & 0x0001 and self.anchor is not None:  # Shift
+            low, high = sorted((self.anchor, index))
+            self.selected = set(range(low, high + 1))
+        else:
+            self.selected = {index}
+            self.anchor = index
+        self.focus_index = index
+        self.see(index)
+        self._selection_changed()
+        return "break"
+
+    def _selection_changed(self):
+        if self.on_select is not None:
+            self.on_select()
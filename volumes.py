@@ -0,0 +1,225 @@
+import os
+import sys
+import time
+import shutil
+import threading
+from collections import namedtuple
+
+"""
+卷（挂载点/驱动器）探测
+- Linux 读取 /proc/self/mountinfo 得到挂载表，过滤 proc、sysfs、cgroup 等虚拟文件系统；
+  Windows 用 GetLogicalDrives/GetDriveTypeW 得到盘符，不访问驱动器本身
+- 容量（statvfs / GetDiskFreeSpaceEx）和卷标等需要访问卷的信息在各自的守护线程中并发探测，
+  每个卷有单独的超时：断开的网络驱动器或无响应的 NFS 挂载只会被标记为无响应，不拖慢其他卷
+- 仍未返回的探测不会重复启动，下次探测直接报告无响应；进程退出时不等待它们
+- VolumeCache 按 TTL 缓存探测结果，导航中查询卷信息只读缓存，不访问文件系统
+"""
+
+# 每个卷的探测超时（秒）和缓存有效期（秒）
+PROBE_TIMEOUT = 2.0
+VOLUME_TTL = 30.0
+MOUNTINFO_FILE = "/proc/self/mountinfo"
+
+# 不作为卷显示的虚拟文件系统
+PSEUDO_FILESYSTEMS = {
+    "autofs", "binfmt_misc", "bpf", "cgroup", "cgroup2", "configfs", "debugfs", "devpts", "devtmpfs",
+    "efivarfs", "fusectl", "hugetlbfs", "mqueue", "nsfs", "proc", "pstore", "rpc_pipefs", "securityfs",
+    "selinuxfs", "squashfs", "sysfs", "tracefs",
+}
+# 这些目录下的挂载点属于系统内部（/run/media 下是可移动磁盘，保留）
+SYSTEM_MOUNT_DIRS = ("/proc", "/sys", "/dev", "/run")
+USER_MOUNT_DIRS = ("/run/media",)
+
+# GetDriveTypeW 的返回值及其显示名称
+DRIVE_TYPE_NAMES = {2: "可移动磁盘", 3: "本地磁盘", 4: "网络驱动器", 5: "光盘驱动器", 6: "RAM 磁盘"}
+
+# path: 挂载点；kind: 驱动器类型或文件系统类型；total/free 为字节数（未知时为 None）；
+# status: "ok"、"timeout"（探测超时）或 "error"
+Volume = namedtuple("Volume", "path label kind device total free status")
+
+
+def _unescape(field):
+    """mountinfo 中的空格、制表符等写成 \\040 形式的八进制转义"""
+    if "\\" not in field:
+        return field
+    out = []
+    i = 0
+    while i < len(field):
+        if field[i] == "\\" and field[i + 1:i + 4].isdigit():
+            out.append(chr(int(field[i + 1:i + 4], 8)))
+            i += 4
+        else:
+            out.append(field[i])
+            i += 1
+    return "".join(out)
+
+
+def _is_user_mount(mount_point, fs_type):
+    if mount_point == "/":
+        return True
+    if fs_type in PSEUDO_FILESYSTEMS:
+        return False
+    for directory in USER_MOUNT_DIRS:
+        if mount_point == directory or mount_point.startswith(directory + "/"):
+            return True
+    for directory in SYSTEM_MOUNT_DIRS:
+        if mount_point == directory or mount_point.startswith(directory + "/"):
+            return False
+    return True
+
+
+def parse_mountinfo(lines):
+    """解析 mountinfo 的各行，返回 [(挂载点, 文件系统类型, 设备)]，同一挂载点只保留最后一次挂载
+
+    每行格式：ID 父ID 主:次 根 挂载点 选项 [可选字段...] - 类型 来源 超级块选项
+    """
+    mounts = {}
+    for line in lines:
+        fields = line.split()
+        try:
+            separator = fields.index("-", 6)
+            mount_point = _unescape(fields[4])
+            fs_type = fields[separator + 1]
+            device = _unescape(fields[separator + 2])
+        except (ValueError, IndexError):
+            continue  # 格式不完整的行
+        if _is_user_mount(mount_point, fs_type):
+            mounts.pop(mount_point, None)  # 重新挂载的排到最后
+            mounts[mount_point] = (mount_point, fs_type, device)
+    return sorted(mounts.values())
+
+
+def read_mount_table(path=MOUNTINFO_FILE):
+    """读取并解析 mountinfo 文件"""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return parse_mountinfo(f)
+
+
+def list_mounts():
+    """返回 [(挂载点, 类型, 设备)]，不访问卷本身（不会因无响应的卷阻塞）"""
+    if sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        mask = kernel32.GetLogicalDrives()
+        mounts = []
+        for index in range(26):
+            if mask & (1 << index):
+                drive = f"{chr(ord('A') + index)}:/"
+                mounts.append((drive, DRIVE_TYPE_NAMES.get(kernel32.GetDriveTypeW(drive), "本地磁盘"), drive))
+        return mounts
+    try:
+        return read_mount_table()
+    except OSError:  # 没有 /proc 的系统（如 macOS）
+        return [("/", "根目录", "")]
+
+
+def _volume_label(path):
+    """Windows 卷标和文件系统名称；其他平台返回 ("", "")"""
+    if sys.platform != "win32":
+        return "", ""
+    import ctypes
+    label = ctypes.create_unicode_buffer(261)
+    fs_name = ctypes.create_unicode_buffer(261)
+    if not ctypes.windll.kernel32.GetVolumeInformationW(path, label, len(label), None, None, None,
+                                                        fs_name, len(fs_name)):
+        return "", ""
+    return label.value, fs_name.value
+
+
+def probe_volume(path):
+    """读取卷的 (卷标, 文件系统, 总字节数, 可用字节数)；可能阻塞，只在探测线程中调用"""
+    label, fs_name = _volume_label(path)
+    if hasattr(os, "statvfs"):
+        stats = os.statvfs(path)
+        # f_bavail 为普通用户可用的块数（不含为 root 保留的部分）
+        return label, fs_name, stats.f_blocks * stats.f_frsize, stats.f_bavail * stats.f_frsize
+    usage = shutil.disk_usage(path)
+    return label, fs_name, usage.total, usage.free
+
+
+class VolumeProber:
+    """并发探测各卷；每个卷一个守护线程，超时后不再等待，也不为它启动新的探测"""
+
+    def __init__(self, timeout=PROBE_TIMEOUT):
+        self.timeout = timeout
+        self._pending = set()  # 仍在运行（可能已无响应）的探测
+        self._lock = threading.Lock()
+
+    def _run(self, path, results):
+        try:
+            results[path] = ("ok", probe_volume(path))
+        except OSError as e:
+            results[path] = ("error", e)
+        finally:
+            with self._lock:
+                self._pending.discard(path)
+
+    def probe(self, mounts, token=None):
+        """探测 [(挂载点, 类型, 设备)]，返回 Volume 列表（顺序不变）"""
+        results = {}
+        threads = []
+        for path, _, _ in mounts:
+            with self._lock:
+                if path in self._pending:
+                    continue  # 上次的探测还没有返回
+                self._pending.add(path)
+            thread = threading.Thread(target=self._run, args=(path, results), daemon=True,
+                                      name=f"volume-probe {path}")
+            thread.start()
+            threads.append(thread)
+
+        # 所有卷共用同一个截止时间：总等待时间不超过一次超时
+        deadline = time.monotonic() + self.timeout
+        for thread in threads:
+            if token is not None and token.cancelled:
+                break
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        volumes = []
+        for path, kind, device in mounts:
+            status, value = results.get(path, ("timeout", None))
+            if status == "ok":
+                label, fs_name, total, free = value
+                volumes.append(Volume(path, label, fs_name or kind, device, total, free, "ok"))
+            else:
+                volumes.append(Volume(path, "", kind, device, None, None, status))
+        return volumes
+
+
+class VolumeCache:
+    """按 TTL 缓存卷列表；过期后下一次 discover 重新探测"""
+
+    def __init__(self, ttl=VOLUME_TTL, timeout=PROBE_TIMEOUT):
+        self.ttl = ttl
+        self.prober = VolumeProber(timeout)
+        self.volumes = []
+        self.updated = None  # 上次探测完成的时间（time.monotonic()）
+        self._lock = threading.Lock()
+
+    def is_fresh(self):
+        return self.updated is not None and time.monotonic() - self.updated < self.ttl
+
+    def discover(self, force=False, token=None, emit=None):
+        """返回卷列表：缓存未过期时直接返回，否则重新探测（最多等待一次超时）
+
+        可以作为 TaskRunner 任务提交。
+        """
+        with self._lock:
+            if not force and self.is_fresh():
+                return self.volumes
+        volumes = self.prober.probe(list_mounts(), token=token)
+        with self._lock:
+            self.volumes = volumes
+            self.updated = time.monotonic()
+        return volumes
+
+    def volume_for(self, path):
+        """缓存中包含 path 的卷（挂载点最长匹配）；只读缓存，不访问文件系统"""
+        path = os.path.normcase(os.path.abspath(path))
+        best = None
+        for volume in self.volumes:
+            mount = os.path.normcase(os.path.abspath(volume.path))
+            if path == mount or path.startswith(os.path.join(mount, "")):
+                if best is None or len(mount) > len(os.path.normcase(os.path.abspath(best.path))):
+                    best = volume
+        return best